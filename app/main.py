@@ -1,27 +1,23 @@
-import os
-import json
+import startup_trace  # primero: marca el inicio del arranque
 import flet as ft
-from ui.pages.onboarding import create_onboarding_page, is_onboarding_completed
-from ui.pages.home import create_home_page
-from ui.pages.profile_setup import create_profile_setup_page, create_profile_page
-from ui.pages.history import create_history_page
-from ui.pages.settings import create_settings_page
-from services.profile_service import has_profile_data
+from ui.router import get_view, loaded_pages
+from ui.nav import select_tab
+from ui.updates import flush_updates
+from services.profile_service import has_profile_data, flush_profile
+from services.intake_service import init_db, flush
 from services.theme_service import load_theme_preference
 from config import Colors
 
-
-def _profile_file_path() -> str:
-    # app/main.py -> root -> storage/data/profile.json
-    root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-    # root_dir ahora apunta a .../app; subir uno más al root del proyecto
-    project_root = os.path.abspath(os.path.join(root_dir, ".."))
-    data_dir = os.path.join(project_root, "storage", "data")
-    os.makedirs(data_dir, exist_ok=True)
-    return os.path.join(data_dir, "profile.json")
+startup_trace.mark("imports")
 
 
 def main(page: ft.Page):
+    startup_trace.mark("main")
+    # Abrir la BD y migrar el esquema una sola vez, antes del primer render.
+    # Tema, perfil y onboarding salen de la misma BD (settings_service) en una
+    # sola lectura, al pedir el primero.
+    init_db()
+
     # Cargar y aplicar tema
     dark_mode = load_theme_preference()
     Colors.set_dark_mode(dark_mode)
@@ -43,47 +39,72 @@ def main(page: ft.Page):
     except Exception:
         pass
 
+    # Las ingestas se escriben en segundo plano: asegurar que lleguen a disco
+    # cuando la app pasa a segundo plano o se cierra
+    try:
+        page.on_app_lifecycle_state_change = lambda e: (flush(), flush_profile())
+        page.on_disconnect = lambda e: (flush(), flush_profile())
+    except Exception:
+        pass
+
     # Icono de la ventana (ruta relativa al assets_dir)
     try:
         page.window_icon = "Icon.png"
     except:
         pass
 
-    # Router/navegación entre páginas
-    def route_change(route):
+    # Router/navegación entre páginas. Las pestañas salen de la caché de
+    # vistas de ui.router: cambiar de pestaña reutiliza la View ya construida
+    # y tocar la pestaña en la que ya se está no reconstruye nada.
+    def show(name: str):
+        view, changed = get_view(name, page)
+        # La barra inferior de la vista (ui.nav) marca la pestaña de la ruta
+        changed = select_tab(view, page.route) or changed
+        if len(page.views) == 1 and page.views[0] is view:
+            if changed:
+                flush_updates(page)
+            return
         page.views.clear()
+        page.views.append(view)
+        # Sin esperar al siguiente cuadro; incluye lo que los handlers dejaron pendiente
+        flush_updates(page)
+        startup_trace.mark("first_update")
+
+    def route_change(route):
+        # Kiosco compartido: no depende del perfil del dispositivo
+        if page.route.startswith("/kiosk"):
+            show("kiosk")
+            return
 
         has_profile = has_profile_data()
 
         if not has_profile:
             # Sin datos -> flujo onboarding -> setup
             if page.route.startswith("/onboarding"):
-                page.views.append(create_onboarding_page(page))
+                show("onboarding")
             elif page.route == "/setup":
-                page.views.append(create_profile_setup_page(page))
+                show("setup")
             else:
                 page.go("/onboarding/1")
-                return
         else:
             # Con datos -> home directo
             if page.route == "/" or page.route == "":
-                page.views.append(create_home_page(page))
+                show("home")
             elif page.route.startswith("/history"):
-                page.views.append(create_history_page(page))
+                show("history")
             elif page.route.startswith("/profile"):
-                page.views.append(create_profile_page(page))
+                show("profile")
             elif page.route.startswith("/settings"):
-                page.views.append(create_settings_page(page))
+                show("settings")
             elif page.route.startswith("/onboarding") or page.route == "/setup":
                 page.go("/")
-                return
             else:
-                page.views.append(create_home_page(page))
-
-        page.update()
+                show("home")
 
     page.on_route_change = route_change
     page.go("/")  # Página inicial
+    startup_trace.mark("interactive")
+    startup_trace.report(loaded_pages())
 
 
 if __name__ == "__main__":
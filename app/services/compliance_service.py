@@ -0,0 +1,119 @@
+import time
+from datetime import date
+from typing import List, NamedTuple, Optional, Tuple
+
+from . import db
+from .intake_service import _day_key, flush
+
+# sub_area de la fila que agrega el área completa
+WHOLE_AREA = ""
+
+
+class AreaCompliance(NamedTuple):
+    """Cumplimiento de meta diaria de un área (o sub área) hoy y en la semana."""
+    area: str
+    sub_area: str       # WHOLE_AREA para el área completa
+    headcount: int
+    met_today: int      # personas que hoy llegaron a su meta
+    met_week: int       # días-persona cumplidos desde el lunes (incluye hoy)
+    days_week: int      # días transcurridos de la semana
+
+    @property
+    def today_pct(self) -> float:
+        return 100.0 * self.met_today / self.headcount if self.headcount else 0.0
+
+    @property
+    def week_pct(self) -> float:
+        possible = self.headcount * self.days_week
+        return 100.0 * self.met_week / possible if possible else 0.0
+
+
+# Resumen por área con el "hoy" de cada área: el día de turno según su inicio
+# en area_settings (medianoche si no tiene), o el `today` que se pida. La
+# semana va del lunes a ese día (date.toordinal() % 7 == 1 es lunes), así que
+# el join con area_daily_met sigue siendo un rango sobre su llave primaria.
+_COMPLIANCE_SQL = """
+    WITH t AS (
+        SELECT h.area, h.sub_area, h.headcount, {today} AS today
+        FROM area_headcount h LEFT JOIN area_settings s ON s.area = h.area
+        WHERE {where}
+    )
+    SELECT t.area, t.sub_area, t.headcount,
+           COALESCE(SUM(CASE WHEN m.day = t.today THEN m.met END), 0),
+           COALESCE(SUM(m.met), 0),
+           (t.today - 1) % 7 + 1
+    FROM t
+    LEFT JOIN area_daily_met m
+        ON m.area = t.area AND m.sub_area = t.sub_area
+       AND m.day BETWEEN t.today - (t.today - 1) % 7 AND t.today
+    GROUP BY t.area, t.sub_area
+    ORDER BY t.area, t.sub_area
+"""
+
+
+def _compliance(where: str, params: dict, today: Optional[date]) -> List[AreaCompliance]:
+    if today is None:
+        # Las áreas sin inicio propio usan la fecha de hoy ya calculada
+        today_sql = "CASE WHEN s.day_start_min IS NULL THEN :today ELSE {} END".format(
+            db.SHIFT_DAY_SQL.format(ts=":now", minutes="s.day_start_min")
+        )
+        now = int(time.time())
+        params = dict(params, now=now, today=_day_key(date.fromtimestamp(now)))
+    else:
+        today_sql = ":today"
+        params = dict(params, today=_day_key(today))
+    flush()
+    with db.connection() as con:
+        cur = con.execute(_COMPLIANCE_SQL.format(today=today_sql, where=where), params)
+        return [AreaCompliance(*r) for r in cur.fetchall()]
+
+
+def get_area_compliance(area: str, sub_area: str = WHOLE_AREA, today: Optional[date] = None) -> AreaCompliance:
+    """Cumplimiento de un área o sub área. Lee solo los resúmenes (una fila de
+    plantilla y a lo más 7 días), sin importar cuántas personas o ingestas haya.
+    Sin `today`, hoy es el día de turno del área (ver user_service.set_day_start)."""
+    rows = _compliance("h.area = :area AND h.sub_area = :sub_area", {"area": area, "sub_area": sub_area}, today)
+    if rows:
+        return rows[0]
+    days_week = (today or date.today()).weekday() + 1
+    return AreaCompliance(area, sub_area, 0, 0, 0, days_week)
+
+
+def list_area_compliance(today: Optional[date] = None) -> List[AreaCompliance]:
+    """Cumplimiento de todas las áreas y sub áreas con personal, ordenadas por
+    área; la fila del área completa va antes que sus sub áreas."""
+    return _compliance("h.headcount > 0", {}, today)
+
+
+def check_area_rollups(repair: bool = False) -> List[Tuple[str, str, Optional[int], int, int]]:
+    """Compara area_headcount/area_daily_met con un recálculo completo desde users
+    y daily_totals. Devuelve [(área, sub_área, día o None para plantilla,
+    valor_resumen, valor_real)] de lo que difiere; con repair=True reconstruye."""
+    flush()
+    with db.connection() as con:
+        cur = con.execute(
+            """
+            SELECT area, sub_area, day, SUM(rollup), SUM(raw) FROM (
+                SELECT area, sub_area, NULL AS day, headcount AS rollup, 0 AS raw FROM area_headcount
+                UNION ALL
+                SELECT area, sub_area, NULL, 0, COUNT(*) FROM user_scopes GROUP BY area, sub_area
+                UNION ALL
+                SELECT area, sub_area, day, met, 0 FROM area_daily_met
+                UNION ALL
+                SELECT s.area, s.sub_area, d.day, 0, COUNT(*)
+                FROM daily_totals d
+                JOIN users u ON u.id = d.user_id
+                JOIN user_scopes s ON s.user_id = d.user_id
+                WHERE d.total_ml >= u.daily_goal_ml
+                GROUP BY s.area, s.sub_area, d.day
+            )
+            GROUP BY area, sub_area, day
+            HAVING SUM(rollup) != SUM(raw)
+            ORDER BY area, sub_area, day
+            """
+        )
+        diffs = [tuple(r) for r in cur.fetchall()]
+        if diffs and repair:
+            db.rebuild_area_rollups(con)
+            con.commit()
+    return diffs
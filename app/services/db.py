@@ -0,0 +1,678 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+def _project_root() -> str:
+    # app/services -> app -> repo root
+    return os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+def _data_dir() -> str:
+    d = os.path.join(_project_root(), "storage", "data")
+    os.makedirs(d, exist_ok=True)
+    return d
+
+
+def db_path() -> str:
+    return os.path.join(_data_dir(), "intake.db")
+
+
+def _legacy_dirs() -> List[str]:
+    """Donde versiones anteriores guardaban profile.json y theme.json (theme_service
+    subía un nivel de más y lo dejaba fuera del repo)."""
+    return [_data_dir(), os.path.join(os.path.dirname(_project_root()), "storage", "data")]
+
+
+# Conexión única por proceso. Flet ejecuta los handlers en hilos distintos,
+# así que todo acceso pasa por el lock (RLock para permitir anidar llamadas).
+_lock = threading.RLock()
+_con: Optional[sqlite3.Connection] = None
+
+# Tamaño de la caché de sentencias preparadas de sqlite3 (por conexión)
+_STATEMENT_CACHE_SIZE = 128
+
+
+# Usuario dueño del dispositivo: a él pertenecen las ingestas previas a users
+LOCAL_USER_ID = 1
+
+
+# --- Migraciones -----------------------------------------------------------
+# Cada paso lleva la BD de la versión N-1 a N (PRAGMA user_version) y corre en
+# su propia transacción. Nunca editar un paso ya publicado: agregar uno nuevo al
+# final de MIGRATIONS. Un paso puede usar los helpers del esquema actual de más
+# abajo solo mientras sea el último que cambia esas tablas; cuando otro paso las
+# cambia, el viejo se queda con una copia de su SQL (p. ej. los triggers de la
+# v3). Los pasos
+# toleran BDs creadas antes de existir el motor (user_version = 0 pero con parte
+# del esquema ya aplicado).
+
+def _m001_intake(con: sqlite3.Connection) -> None:
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS intake (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts TEXT NOT NULL,
+            amount_ml INTEGER NOT NULL
+        )
+        """
+    )
+
+
+def _m002_day_column(con: sqlite3.Connection) -> None:
+    # Columna `day` (número de día, date.toordinal()).
+    # julianday('0001-01-01') = 1721425.5 y su ordinal es 1.
+    cols = {r[1] for r in con.execute("PRAGMA table_info(intake)")}
+    if "day" not in cols:
+        con.execute("ALTER TABLE intake ADD COLUMN day INTEGER")
+        con.execute("UPDATE intake SET day = CAST(julianday(substr(ts,1,10)) - 1721424.5 AS INTEGER)")
+    # Rangos de fechas y paginación por (day, ts, id); `id` desempata filas del mismo segundo.
+    con.execute("DROP INDEX IF EXISTS idx_intake_day_ts")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_intake_day_ts_id ON intake(day, ts, id)")
+
+
+def _v3_daily_totals_triggers(con: sqlite3.Connection) -> None:
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_intake_insert AFTER INSERT ON intake
+        BEGIN
+            INSERT INTO daily_totals (day, total_ml, count) VALUES (NEW.day, NEW.amount_ml, 1)
+            ON CONFLICT(day) DO UPDATE SET total_ml = total_ml + excluded.total_ml, count = count + 1;
+        END
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_intake_delete AFTER DELETE ON intake
+        BEGIN
+            UPDATE daily_totals SET total_ml = total_ml - OLD.amount_ml, count = count - 1
+            WHERE day = OLD.day;
+            DELETE FROM daily_totals WHERE day = OLD.day AND count <= 0;
+        END
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_intake_update AFTER UPDATE OF day, amount_ml ON intake
+        BEGIN
+            UPDATE daily_totals SET total_ml = total_ml - OLD.amount_ml, count = count - 1
+            WHERE day = OLD.day;
+            DELETE FROM daily_totals WHERE day = OLD.day AND count <= 0;
+            INSERT INTO daily_totals (day, total_ml, count) VALUES (NEW.day, NEW.amount_ml, 1)
+            ON CONFLICT(day) DO UPDATE SET total_ml = total_ml + excluded.total_ml, count = count + 1;
+        END
+        """
+    )
+
+
+def _v3_rebuild_daily_totals(con: sqlite3.Connection) -> None:
+    con.execute("DELETE FROM daily_totals")
+    con.execute(
+        """
+        INSERT INTO daily_totals (day, total_ml, count)
+        SELECT day, SUM(amount_ml), COUNT(*) FROM intake GROUP BY day
+        """
+    )
+
+
+def _m003_daily_totals(con: sqlite3.Connection) -> None:
+    """Resumen por día mantenido por triggers: cualquier INSERT/UPDATE/DELETE
+    sobre intake (individual, masivo o edición) lo mantiene al día."""
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS daily_totals (
+            day INTEGER PRIMARY KEY,
+            total_ml INTEGER NOT NULL,
+            count INTEGER NOT NULL
+        )
+        """
+    )
+    _v3_daily_totals_triggers(con)
+    _v3_rebuild_daily_totals(con)
+
+
+def _m004_epoch_ts(con: sqlite3.Connection) -> None:
+    """`ts` pasa de texto ISO local a epoch en segundos (INTEGER).
+    SQLite no cambia el tipo de una columna: se reconstruye la tabla."""
+    con.execute(
+        """
+        CREATE TABLE intake_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            amount_ml INTEGER NOT NULL
+        )
+        """
+    )
+    # El modificador 'utc' interpreta el texto como hora local, igual que
+    # datetime.timestamp() con fechas sin zona horaria. Filas ilegibles se descartan.
+    con.execute(
+        """
+        INSERT INTO intake_new (id, ts, day, amount_ml)
+        SELECT id, CAST(strftime('%s', ts, 'utc') AS INTEGER), day, amount_ml
+        FROM intake
+        WHERE strftime('%s', ts, 'utc') IS NOT NULL AND day IS NOT NULL
+        ORDER BY id
+        """
+    )
+    # DROP TABLE también elimina el índice y los triggers de la tabla vieja
+    con.execute("DROP TABLE intake")
+    con.execute("ALTER TABLE intake_new RENAME TO intake")
+    con.execute("CREATE INDEX idx_intake_day_ts_id ON intake(day, ts, id)")
+    _v3_daily_totals_triggers(con)
+    _v3_rebuild_daily_totals(con)
+
+
+def _m005_users(con: sqlite3.Connection) -> None:
+    """Varios usuarios por dispositivo: tabla users, intake.user_id y
+    daily_totals por (user_id, day). Lo existente queda en LOCAL_USER_ID."""
+    con.execute(
+        """
+        CREATE TABLE users (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            puesto TEXT,
+            area TEXT,
+            sub_area TEXT,
+            daily_goal_ml INTEGER NOT NULL DEFAULT 2000
+        )
+        """
+    )
+    con.execute("INSERT INTO users (id, name) VALUES (?, '')", (LOCAL_USER_ID,))
+    con.execute(f"ALTER TABLE intake ADD COLUMN user_id INTEGER NOT NULL DEFAULT {LOCAL_USER_ID} REFERENCES users(id)")
+    con.execute("DROP INDEX idx_intake_day_ts_id")
+    con.execute("CREATE INDEX idx_intake_user_day_ts_id ON intake(user_id, day, ts, id)")
+
+    for name in ("insert", "delete", "update"):
+        con.execute(f"DROP TRIGGER trg_intake_{name}")
+    con.execute("DROP TABLE daily_totals")
+    con.execute(
+        """
+        CREATE TABLE daily_totals (
+            user_id INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            total_ml INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (user_id, day)
+        ) WITHOUT ROWID
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER trg_intake_insert AFTER INSERT ON intake
+        BEGIN
+            INSERT INTO daily_totals (user_id, day, total_ml, count) VALUES (NEW.user_id, NEW.day, NEW.amount_ml, 1)
+            ON CONFLICT(user_id, day) DO UPDATE SET total_ml = total_ml + excluded.total_ml, count = count + 1;
+        END
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER trg_intake_delete AFTER DELETE ON intake
+        BEGIN
+            UPDATE daily_totals SET total_ml = total_ml - OLD.amount_ml, count = count - 1
+            WHERE user_id = OLD.user_id AND day = OLD.day;
+            DELETE FROM daily_totals WHERE user_id = OLD.user_id AND day = OLD.day AND count <= 0;
+        END
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER trg_intake_update AFTER UPDATE OF user_id, day, amount_ml ON intake
+        BEGIN
+            UPDATE daily_totals SET total_ml = total_ml - OLD.amount_ml, count = count - 1
+            WHERE user_id = OLD.user_id AND day = OLD.day;
+            DELETE FROM daily_totals WHERE user_id = OLD.user_id AND day = OLD.day AND count <= 0;
+            INSERT INTO daily_totals (user_id, day, total_ml, count) VALUES (NEW.user_id, NEW.day, NEW.amount_ml, 1)
+            ON CONFLICT(user_id, day) DO UPDATE SET total_ml = total_ml + excluded.total_ml, count = count + 1;
+        END
+        """
+    )
+    rebuild_daily_totals(con)
+
+
+def _m006_roster_key(con: sqlite3.Connection) -> None:
+    """Identidad estable de los usuarios importados de la plantilla (nombre
+    normalizado), para que reimportar actualice en lugar de duplicar."""
+    con.execute("ALTER TABLE users ADD COLUMN roster_key TEXT")
+    con.execute("CREATE UNIQUE INDEX idx_users_roster_key ON users(roster_key)")
+
+
+def _m007_area_rollups(con: sqlite3.Connection) -> None:
+    """Cumplimiento por área y sub área: plantilla (area_headcount) y personas
+    que llegaron a su meta cada día (area_daily_met). Triggers sobre users y
+    daily_totals los mantienen al día. La fila con sub_area = '' es el área completa."""
+    con.execute(
+        """
+        CREATE VIEW user_scopes AS
+        SELECT id AS user_id, area, '' AS sub_area FROM users WHERE area IS NOT NULL
+        UNION ALL
+        SELECT id, area, sub_area FROM users WHERE area IS NOT NULL AND sub_area IS NOT NULL
+        """
+    )
+    con.execute(
+        """
+        CREATE TABLE area_headcount (
+            area TEXT NOT NULL,
+            sub_area TEXT NOT NULL,
+            headcount INTEGER NOT NULL,
+            PRIMARY KEY (area, sub_area)
+        ) WITHOUT ROWID
+        """
+    )
+    con.execute(
+        """
+        CREATE TABLE area_daily_met (
+            area TEXT NOT NULL,
+            sub_area TEXT NOT NULL,
+            day INTEGER NOT NULL,
+            met INTEGER NOT NULL,
+            PRIMARY KEY (area, sub_area, day)
+        ) WITHOUT ROWID
+        """
+    )
+    # Un día cuenta como cumplido si total_ml >= daily_goal_ml. Los triggers solo
+    # escriben cuando el día cruza la meta en uno u otro sentido.
+    con.execute(
+        """
+        CREATE TRIGGER trg_daily_totals_met_insert AFTER INSERT ON daily_totals
+        WHEN NEW.total_ml >= (SELECT daily_goal_ml FROM users WHERE id = NEW.user_id)
+        BEGIN
+            INSERT INTO area_daily_met (area, sub_area, day, met)
+            SELECT area, sub_area, NEW.day, 1 FROM user_scopes WHERE user_id = NEW.user_id
+            ON CONFLICT(area, sub_area, day) DO UPDATE SET met = met + 1;
+        END
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER trg_daily_totals_met_delete AFTER DELETE ON daily_totals
+        WHEN OLD.total_ml >= (SELECT daily_goal_ml FROM users WHERE id = OLD.user_id)
+        BEGIN
+            UPDATE area_daily_met SET met = met - 1
+            WHERE day = OLD.day AND (area, sub_area) IN (
+                SELECT area, sub_area FROM user_scopes WHERE user_id = OLD.user_id
+            );
+        END
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER trg_daily_totals_met_update AFTER UPDATE OF total_ml ON daily_totals
+        BEGIN
+            INSERT INTO area_daily_met (area, sub_area, day, met)
+            SELECT s.area, s.sub_area, NEW.day,
+                   (NEW.total_ml >= u.daily_goal_ml) - (OLD.total_ml >= u.daily_goal_ml)
+            FROM users u JOIN user_scopes s ON s.user_id = u.id
+            WHERE u.id = NEW.user_id AND (NEW.total_ml >= u.daily_goal_ml) != (OLD.total_ml >= u.daily_goal_ml)
+            ON CONFLICT(area, sub_area, day) DO UPDATE SET met = met + excluded.met;
+        END
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER trg_users_scope_insert AFTER INSERT ON users
+        WHEN NEW.area IS NOT NULL
+        BEGIN
+            INSERT INTO area_headcount (area, sub_area, headcount)
+            SELECT area, sub_area, 1 FROM user_scopes WHERE user_id = NEW.id
+            ON CONFLICT(area, sub_area) DO UPDATE SET headcount = headcount + 1;
+        END
+        """
+    )
+    # Cambiar de área o de meta: se retira lo que aportaba con los valores viejos
+    # (plantilla y días cumplidos) y se suma con los nuevos.
+    con.execute(
+        """
+        CREATE TRIGGER trg_users_scope_update AFTER UPDATE OF area, sub_area, daily_goal_ml ON users
+        WHEN OLD.area IS NOT NEW.area OR OLD.sub_area IS NOT NEW.sub_area OR OLD.daily_goal_ml != NEW.daily_goal_ml
+        BEGIN
+            UPDATE area_headcount SET headcount = headcount - 1
+            WHERE area = OLD.area AND (sub_area = '' OR sub_area = OLD.sub_area);
+            UPDATE area_daily_met SET met = met - 1
+            WHERE area = OLD.area AND (sub_area = '' OR sub_area = OLD.sub_area) AND day IN (
+                SELECT day FROM daily_totals WHERE user_id = OLD.id AND total_ml >= OLD.daily_goal_ml
+            );
+            INSERT INTO area_headcount (area, sub_area, headcount)
+            SELECT area, sub_area, 1 FROM user_scopes WHERE user_id = NEW.id
+            ON CONFLICT(area, sub_area) DO UPDATE SET headcount = headcount + 1;
+            INSERT INTO area_daily_met (area, sub_area, day, met)
+            SELECT s.area, s.sub_area, d.day, 1
+            FROM daily_totals d JOIN user_scopes s ON s.user_id = d.user_id
+            WHERE d.user_id = NEW.id AND d.total_ml >= NEW.daily_goal_ml
+            ON CONFLICT(area, sub_area, day) DO UPDATE SET met = met + 1;
+        END
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER trg_users_scope_delete AFTER DELETE ON users
+        WHEN OLD.area IS NOT NULL
+        BEGIN
+            UPDATE area_headcount SET headcount = headcount - 1
+            WHERE area = OLD.area AND (sub_area = '' OR sub_area = OLD.sub_area);
+            UPDATE area_daily_met SET met = met - 1
+            WHERE area = OLD.area AND (sub_area = '' OR sub_area = OLD.sub_area) AND day IN (
+                SELECT day FROM daily_totals WHERE user_id = OLD.id AND total_ml >= OLD.daily_goal_ml
+            );
+        END
+        """
+    )
+    rebuild_area_rollups(con)
+
+
+def _m008_users_area_index(con: sqlite3.Connection) -> None:
+    # Listados y rankings por área / sub área sin recorrer toda la plantilla
+    con.execute("CREATE INDEX idx_users_area ON users(area, sub_area)")
+
+
+def _m009_day_start(con: sqlite3.Connection) -> None:
+    """Inicio del día por persona (turnos nocturnos): minutos después de la
+    medianoche en que empieza su día. intake.day pasa a ser el día de turno,
+    date(hora local - day_start_min); con 0 (lo existente) es la fecha de calendario.
+    area_settings guarda el inicio por área que heredan las altas en esa área."""
+    con.execute("ALTER TABLE users ADD COLUMN day_start_min INTEGER NOT NULL DEFAULT 0")
+    con.execute(
+        """
+        CREATE TABLE area_settings (
+            area TEXT PRIMARY KEY,
+            day_start_min INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER trg_users_day_start_insert AFTER INSERT ON users
+        WHEN NEW.area IN (SELECT area FROM area_settings)
+        BEGIN
+            UPDATE users SET day_start_min = (SELECT day_start_min FROM area_settings WHERE area = NEW.area)
+            WHERE id = NEW.id;
+        END
+        """
+    )
+
+
+def _m010_settings(con: sqlite3.Connection) -> List[str]:
+    """Preferencias de la app (tema, perfil, onboarding) como clave -> JSON, en
+    la misma BD que ya se abre al arrancar. Importa theme.json y profile.json y
+    devuelve sus rutas: migrate() los renombra a *.migrated tras el commit para
+    no volver a importarlos (p. ej. tras un reset)."""
+    con.execute("CREATE TABLE settings (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID")
+    values, imported = {}, []
+    for d in _legacy_dirs():
+        for name in ("theme.json", "profile.json"):
+            path = os.path.join(d, name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError):
+                continue  # ilegible: se deja el archivo como estaba
+            if not isinstance(data, dict):
+                continue
+            if name == "theme.json":
+                values["dark_mode"] = bool(data.get("dark_mode", False))
+            else:
+                values["profile"] = data
+                values["onboarding_completed"] = True
+            imported.append(path)
+    con.executemany(
+        "INSERT INTO settings (key, value) VALUES (?, ?)",
+        [(k, json.dumps(v, ensure_ascii=False, separators=(",", ":"))) for k, v in values.items()],
+    )
+    return imported
+
+
+def _m011_empty_sub_area(con: sqlite3.Connection) -> None:
+    """sub_area = '' es la fila del área completa en user_scopes: una persona con
+    sub área vacía contaba dos veces en ella. Las vacías pasan a NULL (como las
+    deja roster_service) y la vista ya no las repite."""
+    con.execute("UPDATE users SET area = NULL WHERE area = ''")
+    con.execute("UPDATE users SET sub_area = NULL WHERE sub_area = ''")
+    con.execute("DROP VIEW user_scopes")
+    con.execute(
+        """
+        CREATE VIEW user_scopes AS
+        SELECT id AS user_id, area, '' AS sub_area FROM users WHERE area IS NOT NULL
+        UNION ALL
+        SELECT id, area, sub_area FROM users WHERE area IS NOT NULL AND sub_area IS NOT NULL AND sub_area <> ''
+        """
+    )
+    rebuild_area_rollups(con)
+
+
+def _m012_roster_employee_number(con: sqlite3.Connection) -> None:
+    """Filas de la plantilla con No. empleado, Nombre, Area, Puesto se importaban
+    con el número como nombre, el nombre como puesto y el puesto como sub área.
+    Se corrigen en su lugar (conservan id e historial) con la misma clave que
+    usa ahora roster_service.read_roster."""
+    from .roster_service import display_name, roster_key  # roster_service importa este módulo
+
+    rows = con.execute(
+        """
+        SELECT id, puesto, sub_area FROM users
+        WHERE roster_key IS NOT NULL AND name <> '' AND name NOT GLOB '*[^0-9]*' AND puesto IS NOT NULL
+        """
+    ).fetchall()
+    for user_id, full_name, puesto in rows:
+        key = roster_key(full_name)
+        if con.execute("SELECT 1 FROM users WHERE roster_key = ?", (key,)).fetchone():
+            continue  # ya se importó bien; se deja la fila vieja como está
+        con.execute(
+            "UPDATE users SET roster_key = ?, name = ?, puesto = ?, sub_area = NULL WHERE id = ?",
+            (key, display_name(full_name), puesto, user_id),
+        )
+
+
+def _m013_day_start_area_change(con: sqlite3.Connection) -> None:
+    """Quien cambia de área (update_user o reimportar la plantilla) toma el
+    inicio del día de area_settings de la nueva, como las altas; si sale de un
+    área configurada a otra sin configurar y tenía el inicio heredado, vuelve a
+    0. Sus registros pasan al día de turno nuevo antes de mover la fila, igual
+    que set_day_start: las sumas del área vieja se ajustan mientras aún cuenta
+    en ella y trg_users_scope_update las retira ya reagrupadas."""
+    minutes = """COALESCE(
+                (SELECT day_start_min FROM area_settings WHERE area = NEW.area),
+                CASE WHEN OLD.day_start_min = (SELECT day_start_min FROM area_settings WHERE area = OLD.area)
+                     THEN 0 ELSE OLD.day_start_min END
+            )"""
+    shift_day = SHIFT_DAY_SQL.format(ts="ts", minutes=minutes)
+    con.execute(
+        f"""
+        CREATE TRIGGER trg_users_day_start_area_intake BEFORE UPDATE OF area ON users
+        WHEN OLD.area IS NOT NEW.area
+        BEGIN
+            UPDATE intake SET day = {shift_day}
+            WHERE user_id = OLD.id AND day != {shift_day};
+        END
+        """
+    )
+    con.execute(
+        f"""
+        CREATE TRIGGER trg_users_day_start_area AFTER UPDATE OF area ON users
+        WHEN OLD.area IS NOT NEW.area
+        BEGIN
+            UPDATE users SET day_start_min = {minutes}
+            WHERE id = NEW.id AND day_start_min != {minutes};
+        END
+        """
+    )
+
+
+MIGRATIONS = [
+    _m001_intake,
+    _m002_day_column,
+    _m003_daily_totals,
+    _m004_epoch_ts,
+    _m005_users,
+    _m006_roster_key,
+    _m007_area_rollups,
+    _m008_users_area_index,
+    _m009_day_start,
+    _m010_settings,
+    _m011_empty_sub_area,
+    _m012_roster_employee_number,
+    _m013_day_start_area_change,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def migrate(con: sqlite3.Connection) -> int:
+    """Aplica en orden las migraciones pendientes y devuelve la versión final.
+    Si la BD ya está al día solo cuesta leer PRAGMA user_version. Una migración
+    puede devolver archivos heredados que importó: se renombran a *.migrated
+    solo después del commit de su paso (si el paso falla, siguen donde estaban)."""
+    version = con.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return version
+    for target in range(version + 1, SCHEMA_VERSION + 1):
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            imported = MIGRATIONS[target - 1](con)
+            # PRAGMA no admite parámetros; `target` es un int nuestro
+            con.execute(f"PRAGMA user_version = {target}")
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+        for path in imported or ():
+            try:
+                os.replace(path, path + ".migrated")
+            except OSError:
+                pass  # ya está en la BD y el paso no se repite
+    return SCHEMA_VERSION
+
+
+# --- Helpers del esquema actual ----------------------------------------------
+
+def _create_insert_trigger(con: sqlite3.Connection) -> None:
+    """Mismo trigger que crea la última migración que lo define (hoy _m005_users)."""
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_intake_insert AFTER INSERT ON intake
+        BEGIN
+            INSERT INTO daily_totals (user_id, day, total_ml, count) VALUES (NEW.user_id, NEW.day, NEW.amount_ml, 1)
+            ON CONFLICT(user_id, day) DO UPDATE SET total_ml = total_ml + excluded.total_ml, count = count + 1;
+        END
+        """
+    )
+
+
+@contextmanager
+def insert_trigger_suspended(con: sqlite3.Connection) -> Iterator[None]:
+    """Quita el trigger de inserción de daily_totals mientras dura el bloque, para
+    cargas masivas que actualizan el resumen por su cuenta (add_totals_by_day).
+    Debe usarse dentro de una transacción abierta: si se hace rollback, el DDL
+    también se revierte y el trigger nunca desaparece."""
+    assert con.in_transaction, "insert_trigger_suspended requiere una transacción abierta"
+    con.execute("DROP TRIGGER IF EXISTS trg_intake_insert")
+    try:
+        yield
+    finally:
+        _create_insert_trigger(con)
+
+
+def add_totals_by_day(con: sqlite3.Connection, totals: Dict[Tuple[int, int], List[int]]) -> None:
+    """Suma {(user_id, day): [total_ml, count]} a daily_totals (no hace commit)."""
+    con.executemany(
+        """
+        INSERT INTO daily_totals (user_id, day, total_ml, count) VALUES (?, ?, ?, ?)
+        ON CONFLICT(user_id, day) DO UPDATE
+        SET total_ml = total_ml + excluded.total_ml, count = count + excluded.count
+        """,
+        [(user_id, day, t, c) for (user_id, day), (t, c) in totals.items()],
+    )
+
+
+def rebuild_daily_totals(con: sqlite3.Connection) -> None:
+    """Recalcula daily_totals desde las filas de intake (no hace commit)."""
+    con.execute("DELETE FROM daily_totals")
+    con.execute(
+        """
+        INSERT INTO daily_totals (user_id, day, total_ml, count)
+        SELECT user_id, day, SUM(amount_ml), COUNT(*) FROM intake GROUP BY user_id, day
+        """
+    )
+
+
+def rebuild_area_rollups(con: sqlite3.Connection) -> None:
+    """Recalcula area_headcount y area_daily_met desde users y daily_totals (no hace commit)."""
+    con.execute("DELETE FROM area_headcount")
+    con.execute("DELETE FROM area_daily_met")
+    con.execute(
+        """
+        INSERT INTO area_headcount (area, sub_area, headcount)
+        SELECT area, sub_area, COUNT(*) FROM user_scopes GROUP BY area, sub_area
+        """
+    )
+    con.execute(
+        """
+        INSERT INTO area_daily_met (area, sub_area, day, met)
+        SELECT s.area, s.sub_area, d.day, COUNT(*)
+        FROM daily_totals d
+        JOIN users u ON u.id = d.user_id
+        JOIN user_scopes s ON s.user_id = d.user_id
+        WHERE d.total_ml >= u.daily_goal_ml
+        GROUP BY s.area, s.sub_area, d.day
+        """
+    )
+
+
+# Día de turno (date.toordinal()) del epoch `ts` con el día empezando `minutes`
+# minutos después de la medianoche local; el mismo cálculo que
+# intake_service._shift_day. Plantilla: SHIFT_DAY_SQL.format(ts=..., minutes=...).
+SHIFT_DAY_SQL = "CAST(julianday(date({ts} - {minutes} * 60, 'unixepoch', 'localtime')) - 1721424.5 AS INTEGER)"
+
+
+def _open() -> sqlite3.Connection:
+    con = sqlite3.connect(
+        db_path(),
+        check_same_thread=False,
+        cached_statements=_STATEMENT_CACHE_SIZE,
+    )
+    # WAL: lecturas sin bloquear escrituras y un solo fsync por checkpoint.
+    # synchronous=NORMAL es seguro ante cierres de la app con WAL.
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    migrate(con)
+    return con
+
+
+def _get_connection() -> sqlite3.Connection:
+    global _con
+    if _con is None:
+        _con = _open()
+    return _con
+
+
+@contextmanager
+def connection() -> Iterator[sqlite3.Connection]:
+    """Entrega la conexión compartida (abriéndola y migrando el esquema la primera vez)."""
+    with _lock:
+        yield _get_connection()
+
+
+def close_db() -> None:
+    """Cierra la conexión compartida; la siguiente llamada a connection() la reabre."""
+    global _con
+    with _lock:
+        if _con is not None:
+            try:
+                _con.close()
+            finally:
+                _con = None
+
+
+def delete_db() -> None:
+    """Cierra la conexión y elimina el archivo de la BD junto con sus archivos WAL."""
+    with _lock:
+        close_db()
+        path = db_path()
+        for p in (path, path + "-wal", path + "-shm"):
+            if os.path.exists(p):
+                os.remove(p)
@@ -0,0 +1,84 @@
+import threading
+from typing import Callable, List, NamedTuple, Optional
+
+# Avisos de cambios en las ingestas para que las vistas montadas parcheen solo
+# los controles afectados (el total, una fila del historial) sin volver a
+# consultar ni reconstruirse. Los publica intake_service (y user_service para
+# la meta); se entregan en el hilo que publica, después de soltar la conexión
+# y las cachés, así un suscriptor puede leer de los servicios sin bloquearse.
+ADDED = "added"                # ingesta registrada (aún puede estar encolada)
+DELETED = "deleted"            # ingesta eliminada (deshacer)
+DAY_ROLLOVER = "day_rollover"  # empezó otro día de turno para el usuario activo
+GOAL_CHANGED = "goal_changed"  # cambió la meta diaria de un usuario
+RELOADED = "reloaded"          # cambios en bloque (importación, reseteo, inicio de turno): releer todo
+
+# Cada cuánto se comprueba el cambio de día mientras haya suscriptores
+_ROLLOVER_CHECK_S = 60
+
+
+class IntakeEvent(NamedTuple):
+    kind: str
+    user_id: Optional[int] = None   # None: afecta a todos (RELOADED)
+    day: Optional[int] = None       # día de turno, date.toordinal()
+    amount_ml: int = 0
+    ts: Optional[int] = None        # epoch de la ingesta
+    total_ml: Optional[int] = None  # total de hoy del usuario tras el cambio, si se conoce
+    goal_ml: Optional[int] = None   # meta nueva (GOAL_CHANGED)
+
+
+_lock = threading.Lock()
+_subscribers: List[Callable[[IntakeEvent], None]] = []
+_timer: Optional[threading.Timer] = None
+
+
+def subscribe(callback: Callable[[IntakeEvent], None]) -> Callable[[], None]:
+    """Registra `callback` y devuelve la función que lo da de baja."""
+    with _lock:
+        _subscribers.append(callback)
+        _schedule_rollover_check()
+
+    def unsubscribe() -> None:
+        with _lock:
+            if callback in _subscribers:
+                _subscribers.remove(callback)
+
+    return unsubscribe
+
+
+def has_subscribers() -> bool:
+    """Para no calcular el contenido de un evento que nadie va a recibir."""
+    return bool(_subscribers)
+
+
+def publish(event: IntakeEvent) -> None:
+    with _lock:
+        subscribers = list(_subscribers)
+    for callback in subscribers:
+        try:
+            callback(event)
+        except Exception as e:
+            print(f"Error en suscriptor de ingestas: {e}")
+
+
+def _schedule_rollover_check() -> None:
+    # Con _lock tomado
+    global _timer
+    if _timer is None and _subscribers:
+        _timer = threading.Timer(_ROLLOVER_CHECK_S, _check_rollover)
+        _timer.daemon = True
+        _timer.start()
+
+
+def _check_rollover() -> None:
+    """Una vista abierta al pasar la medianoche (o el inicio de turno) también se entera."""
+    global _timer
+    from . import intake_service  # intake_service importa este módulo
+    with _lock:
+        _timer = None
+        if not _subscribers:
+            return
+    try:
+        intake_service.get_today()  # publica DAY_ROLLOVER si cambió el día
+    finally:
+        with _lock:
+            _schedule_rollover_check()
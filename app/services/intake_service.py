@@ -1,23 +1,19 @@
-import os
-import sqlite3
-from datetime import datetime, date, timedelta
-from typing import List, Tuple, Optional, Dict
+import atexit
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, date
+from itertools import islice, starmap
+from typing import Callable, List, Tuple, Optional, Dict, Iterable, NamedTuple
 
-
-def _project_root() -> str:
-    # app/services -> app -> repo root
-    return os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-
-
-def _data_dir() -> str:
-    d = os.path.join(_project_root(), "storage", "data")
-    os.makedirs(d, exist_ok=True)
-    return d
+from . import db, intake_events, user_service
+from .intake_events import IntakeEvent
 
 
 def _get_db_path() -> str:
     """Función pública para obtener la ruta de la BD (usada por profile_service)."""
-    return os.path.join(_data_dir(), "intake.db")
+    return db.db_path()
 
 
 def db_path() -> str:
@@ -25,118 +21,556 @@ def db_path() -> str:
 
 
 def init_db() -> None:
-    con = sqlite3.connect(db_path())
+    """Abre la conexión compartida y aplica las migraciones pendientes (una vez por proceso)."""
+    with db.connection():
+        pass
+
+
+# Usuario al que se atribuyen las ingestas cuando no se indica user_id
+# (en un dispositivo personal siempre es el usuario local).
+_active_user = db.LOCAL_USER_ID
+
+
+def set_active_user(user_id: int) -> None:
+    """Cambia el usuario por defecto de este módulo (dispositivos compartidos).
+    No descarta nada: la caché de totales guarda a varios usuarios."""
+    global _active_user
+    _active_user = int(user_id)
+
+
+def get_active_user() -> int:
+    return _active_user
+
+
+def _uid(user_id: Optional[int]) -> int:
+    return _active_user if user_id is None else int(user_id)
+
+
+def _day_key(d: date) -> int:
+    """Clave de día usada en la columna indexada `day`."""
+    return d.toordinal()
+
+
+# El día de una ingesta es el día de turno de su usuario: con day_start_min=360
+# lo registrado antes de las 6:00 cuenta para el día anterior (turnos nocturnos).
+# Se calcula una vez al escribir y se guarda en `day`, así totales, resúmenes e
+# historial agrupan por la columna indexada sin recalcular nada al leer.
+def _day_start(user_id: int) -> int:
+    user = user_service.get_user(user_id)  # caché LRU de user_service
+    return user.day_start_min if user is not None else 0
+
+
+def _shift_day(epoch: float, day_start_min: int) -> int:
+    """Día de turno de un epoch; igual que db.SHIFT_DAY_SQL."""
+    return _day_key(datetime.fromtimestamp(epoch - day_start_min * 60).date())
+
+
+# Último día de turno visto del usuario activo: get_today publica DAY_ROLLOVER
+# cuando cambia (lo consulta cada navegación y, con suscriptores, un temporizador
+# de intake_events)
+_today_seen: Dict[str, Optional[int]] = {"user": None, "day": None}
+
+
+def get_today(user_id: Optional[int] = None) -> date:
+    """Fecha del día de turno en curso de `user_id` (la de calendario si su día empieza a medianoche)."""
+    user_id = _uid(user_id)
+    day = _shift_day(time.time(), _day_start(user_id))
+    if user_id == _active_user:
+        previous = _today_seen["day"] if _today_seen["user"] == user_id else None
+        _today_seen.update(user=user_id, day=day)
+        if previous is not None and previous != day:
+            intake_events.publish(IntakeEvent(intake_events.DAY_ROLLOVER, user_id, day))
+    return date.fromordinal(day)
+
+
+class IntakeRow(NamedTuple):
+    """Fila de ingesta tal como se guarda: sin texto que parsear."""
+    id: int
+    ts: int                          # epoch en segundos
+    day: int                         # día de turno local, date.toordinal()
+    amount_ml: int
+    day_total: Optional[int] = None  # total del día, si la consulta lo pidió
+
+    @property
+    def local_dt(self) -> datetime:
+        return datetime.fromtimestamp(self.ts)
+
+    @property
+    def date(self) -> date:
+        return date.fromordinal(self.day)
+
+
+def _to_epoch(ts: datetime) -> int:
+    # datetime sin tzinfo se interpreta como hora local
+    return int(ts.timestamp())
+
+
+# Caché en memoria del estado de "hoy": total del día de los últimos usuarios
+# consultados (LRU, para cambiar de persona en un kiosco sin ir a la BD) y
+# ventana de filas recientes (desc) de un solo usuario; consultar otro la
+# recarga. Se actualiza en cada escritura de este módulo, se recarga al cambiar
+# de día y se descarta con invalidate_cache().
+#
+# Orden de locks: primero la conexión (db.connection()) y luego _cache_lock,
+# nunca al revés. Así el escritor en segundo plano puede hacer commit sin
+# bloquear a quien solo lee la caché (p. ej. get_today_total desde la UI).
+_RECENT_WINDOW = 100
+_TOTALS_CACHE_SIZE = 64
+_cache_lock = threading.RLock()
+# user_id -> [_day_key, total de ese día], del menos al más reciente
+_totals: "OrderedDict[int, List[int]]" = OrderedDict()
+_totals_stats = {"hits": 0, "misses": 0}
+_cache: Dict[str, object] = {
+    "user": None,       # user_id dueño de "recent"
+    "recent": None,     # List[IntakeRow] o None si no está cargada
+    "complete": False,  # True si "recent" contiene todas las filas de la tabla
+}
+# ml encolados aún sin escribir, por (user_id, día) (ya sumados de forma optimista)
+_pending: Dict[Tuple[int, int], int] = {}
+
+
+def _clear_cache() -> None:
+    with _cache_lock:
+        _totals.clear()
+        _cache.update(user=None, recent=None, complete=False)
+
+
+def invalidate_cache() -> None:
+    """Descarta el estado cacheado (p. ej. tras resetear o editar la BD por fuera)
+    y avisa a los suscriptores (RELOADED). No llamar con la conexión tomada."""
+    _clear_cache()
+    intake_events.publish(IntakeEvent(intake_events.RELOADED))
+
+
+def cache_stats() -> Dict[str, int]:
+    """Aciertos y fallos de get_today_total contra la caché de totales."""
+    with _cache_lock:
+        return dict(_totals_stats, size=len(_totals))
+
+
+def _recent_insert(user_id: int, row: IntakeRow) -> None:
+    """Agrega una fila recién escrita a la ventana de recientes (con _cache_lock tomado)."""
+    recent = _cache["recent"]
+    if recent is None or _cache["user"] != user_id:
+        return
+    if not recent or (row.day, row.ts) >= (recent[0].day, recent[0].ts):
+        recent.insert(0, row)
+        if len(recent) > _RECENT_WINDOW:
+            recent.pop()
+            _cache["complete"] = False
+    else:
+        # Ingesta con fecha pasada: su posición en la ventana no es trivial
+        _cache.update(recent=None, complete=False)
+
+
+# --- Escritura diferida (write-behind) -------------------------------------
+# add_intake solo actualiza la caché y encola; un hilo escritor agrupa lo que
+# haya en la cola en una sola transacción (group commit). Las lecturas que van
+# a la BD llaman antes a flush() para ver las ingestas pendientes.
+_GROUP_COMMIT_MAX = 256
+_queue: "queue.Queue[Tuple[int, int, int, int, Optional[Callable[[Optional[IntakeRow]], None]]]]" = queue.Queue()
+_writer: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+
+
+def _ensure_writer() -> None:
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_writer_loop, name="intake-writer", daemon=True)
+            _writer.start()
+
+
+def _writer_loop() -> None:
+    while True:
+        batch = [_queue.get()]
+        while len(batch) < _GROUP_COMMIT_MAX:
+            try:
+                batch.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+        rows = None
+        try:
+            rows = _write_batch(batch)
+            # Avisos antes de task_done: cuando flush() vuelve, los on_durable
+            # del lote ya corrieron. Si un suscriptor o un on_durable llama a
+            # flush() desde este hilo, no espera (ver flush)
+            if rows is None:
+                intake_events.publish(IntakeEvent(intake_events.RELOADED))
+            for (_user, _epoch, _day, _amount, cb), row in zip(batch, rows or [None] * len(batch)):
+                if cb is not None:
+                    try:
+                        cb(row)
+                    except Exception as e:
+                        print(f"Error en callback de ingesta: {e}")
+        finally:
+            for _ in batch:
+                _queue.task_done()
+
+
+def _settle(batch: list, rows: Optional[List[IntakeRow]]) -> None:
+    """Descuenta el lote de _pending; si no se escribió (rows None), el total
+    optimista ya no es válido y la caché se recarga desde la BD."""
+    with _cache_lock:
+        for user_id, _epoch, day, amount, _cb in batch:
+            key = (user_id, day)
+            left = _pending.get(key, 0) - amount
+            if left:
+                _pending[key] = left
+            else:
+                _pending.pop(key, None)
+        if rows is None:
+            _clear_cache()
+        else:
+            for item, row in zip(batch, rows):
+                _recent_insert(item[0], row)
+
+
+def _write_batch(batch: list) -> Optional[List[IntakeRow]]:
+    """Escribe el lote en una transacción. Devuelve las filas, o None si falló
+    (también si no se pudo abrir la BD: disco lleno o bloqueado, migración).
+    Pase lo que pase el lote sale de _pending: no quedan ml fantasma en el total."""
+    rows = None
+    settled = False
     try:
-        con.execute(
-            """
-            CREATE TABLE IF NOT EXISTS intake (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ts TEXT NOT NULL,
-                amount_ml INTEGER NOT NULL
-            )
-            """
-        )
-        con.commit()
-    finally:
-        con.close()
+        with db.connection() as con:
+            try:
+                written = []
+                for user_id, epoch, day, amount, _cb in batch:
+                    cur = con.execute(
+                        "INSERT INTO intake (user_id, ts, day, amount_ml) VALUES (?, ?, ?, ?)",
+                        (user_id, epoch, day, amount),
+                    )
+                    written.append(IntakeRow(cur.lastrowid, epoch, day, amount))
+                con.commit()
+                rows = written
+            except Exception:
+                con.rollback()
+                raise
+            finally:
+                # Con la conexión tomada: un lector no ve a la vez la fila escrita y lo pendiente
+                _settle(batch, rows)
+                settled = True
+    except Exception as e:
+        print(f"Error al guardar ingestas: {e}")
+        if not settled:
+            _settle(batch, None)
+        return None
+    return rows
 
 
-def add_intake(amount_ml: int, ts: Optional[datetime] = None) -> None:
+def flush() -> None:
+    """Bloquea hasta que todas las ingestas encoladas estén escritas en la BD.
+    No llamar con la conexión o la caché tomadas. Desde el hilo escritor (un
+    suscriptor de intake_events o un on_durable) no espera: lo encolado solo lo
+    puede escribir ese mismo hilo, al terminar lo que está haciendo."""
+    if _writer is not None and threading.current_thread() is not _writer:
+        _queue.join()
+
+
+atexit.register(flush)
+
+
+def add_intake(
+    amount_ml: int,
+    ts: Optional[datetime] = None,
+    on_durable: Optional[Callable[[Optional[IntakeRow]], None]] = None,
+    user_id: Optional[int] = None,
+) -> None:
+    """Registra una ingesta de `user_id` (por defecto el usuario activo). El total
+    de hoy se actualiza al instante y la fila se escribe en segundo plano;
+    `on_durable(fila)` se llama (desde el hilo escritor) cuando el commit
+    terminó, o con None si la escritura falló; flush() no vuelve antes de que
+    corra. Puede leer de este módulo, pero no debe bloquear: mientras corre no
+    se escribe nada más."""
+    user_id = _uid(user_id)
     if ts is None:
         ts = datetime.now()
-    init_db()
-    con = sqlite3.connect(db_path())
-    try:
-        con.execute(
-            "INSERT INTO intake (ts, amount_ml) VALUES (?, ?)", (ts.isoformat(timespec="seconds"), int(amount_ml))
-        )
-        con.commit()
-    finally:
-        con.close()
+    epoch = _to_epoch(ts)
+    day = _shift_day(epoch, _day_start(user_id))
+    amount = int(amount_ml)
+    with _cache_lock:
+        key = (user_id, day)
+        _pending[key] = _pending.get(key, 0) + amount
+        entry = _totals.get(user_id)
+        if entry is not None and entry[0] == day:
+            entry[1] += amount
+    _ensure_writer()
+    _queue.put((user_id, epoch, day, amount, on_durable))
+    if intake_events.has_subscribers():
+        intake_events.publish(IntakeEvent(
+            intake_events.ADDED, user_id, day, amount, epoch, get_today_total(user_id)
+        ))
 
 
-def get_today_total() -> int:
-    init_db()
-    con = sqlite3.connect(db_path())
+def _parse_row(row, day_start_min: int = 0) -> Optional[Tuple[int, int, int]]:
+    """Valida un (ts, amount_ml) de add_intakes. Devuelve (epoch, day, amount) o None."""
     try:
-        today = date.today().isoformat()  # YYYY-MM-DD
-        cur = con.execute(
-            "SELECT COALESCE(SUM(amount_ml), 0) FROM intake WHERE substr(ts,1,10)=?",
-            (today,),
-        )
-        row = cur.fetchone()
-        return int(row[0] or 0)
-    finally:
-        con.close()
+        ts, amount_ml = row
+        if isinstance(ts, str):
+            ts = datetime.fromisoformat(ts)
+        elif isinstance(ts, (int, float)) and not isinstance(ts, bool):
+            ts = datetime.fromtimestamp(ts)
+        amount = int(amount_ml)
+        if not isinstance(ts, datetime) or amount <= 0:
+            return None
+        epoch = _to_epoch(ts)
+        return (epoch, _shift_day(epoch, day_start_min), amount)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
 
 
-def get_recent(limit: int = 20) -> List[Tuple[str, int]]:
-    init_db()
-    con = sqlite3.connect(db_path())
-    try:
-        cur = con.execute(
-            "SELECT ts, amount_ml FROM intake ORDER BY ts DESC LIMIT ?",
-            (int(limit),),
-        )
-        return [(r[0], int(r[1])) for r in cur.fetchall()]
-    finally:
-        con.close()
+def add_intakes(
+    rows: Iterable[Tuple[object, int]],
+    chunk_size: int = 5000,
+    user_id: Optional[int] = None,
+) -> Dict[str, int]:
+    """Inserta muchas ingestas (ts, amount_ml) de `user_id` en una sola transacción.
+    `ts` puede ser datetime, texto ISO o epoch. Las filas se consumen en bloques de
+    `chunk_size`, así que `rows` puede ser un generador. Las filas inválidas se
+    descartan. Devuelve {"inserted": n, "rejected": m}."""
+    user_id = _uid(user_id)
+    day_start_min = _day_start(user_id)
+    chunk_size = max(1, int(chunk_size))
+    inserted = rejected = 0
+    flush()
+    with db.connection() as con:
+        # El resumen diario se acumula aquí y se aplica una vez al final, en
+        # lugar de disparar el trigger por cada fila.
+        totals: Dict[Tuple[int, int], List[int]] = {}
+        try:
+            con.execute("BEGIN")
+            with db.insert_trigger_suspended(con):
+                it = iter(rows)
+                while True:
+                    batch = list(islice(it, chunk_size))
+                    if not batch:
+                        break
+                    chunk = [p for p in (_parse_row(r, day_start_min) for r in batch) if p is not None]
+                    rejected += len(batch) - len(chunk)
+                    if not chunk:
+                        continue
+                    # user_id ya es int (_uid): va en el SQL para no copiar cada tupla
+                    con.executemany(
+                        f"INSERT INTO intake (user_id, ts, day, amount_ml) VALUES ({user_id}, ?, ?, ?)", chunk
+                    )
+                    inserted += len(chunk)
+                    for _ts, day, amount in chunk:
+                        acc = totals.get((user_id, day))
+                        if acc is None:
+                            totals[(user_id, day)] = [amount, 1]
+                        else:
+                            acc[0] += amount
+                            acc[1] += 1
+                db.add_totals_by_day(con, totals)
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+    invalidate_cache()
+    return {"inserted": inserted, "rejected": rejected}
 
 
-def get_between_dates(start: date, end: date) -> List[Tuple[str, int]]:
-    """Devuelve intakes entre fechas inclusive, ordenados desc por ts.
-    start/end son objetos date (local)."""
-    init_db()
-    con = sqlite3.connect(db_path())
-    try:
+def get_today_total(user_id: Optional[int] = None) -> int:
+    user_id = _uid(user_id)
+    today = _day_key(get_today(user_id))
+    with _cache_lock:
+        entry = _totals.get(user_id)
+        if entry is not None and entry[0] == today:
+            _totals.move_to_end(user_id)
+            _totals_stats["hits"] += 1
+            return entry[1]
+        _totals_stats["misses"] += 1
+    # Usuario sin cachear o cambio de día: total escrito + lo aún encolado
+    with db.connection() as con:
+        row = con.execute(
+            "SELECT total_ml FROM daily_totals WHERE user_id=? AND day=?", (user_id, today)
+        ).fetchone()
+        with _cache_lock:
+            total = (int(row[0]) if row else 0) + _pending.get((user_id, today), 0)
+            _totals[user_id] = [today, total]
+            _totals.move_to_end(user_id)
+            if len(_totals) > _TOTALS_CACHE_SIZE:
+                _totals.popitem(last=False)
+            return total
+
+
+def get_recent(limit: int = 20, user_id: Optional[int] = None) -> List[IntakeRow]:
+    user_id = _uid(user_id)
+    limit = int(limit)
+    if _pending:
+        flush()
+    with _cache_lock:
+        recent = _cache["recent"]
+        if (_cache["user"] == user_id and recent is not None
+                and (limit <= len(recent) or _cache["complete"])):
+            return recent[:limit]
+    window = max(limit, _RECENT_WINDOW)
+    with db.connection() as con:
         cur = con.execute(
             """
-            SELECT ts, amount_ml
-            FROM intake
-            WHERE substr(ts,1,10) BETWEEN ? AND ?
-            ORDER BY ts DESC
+            SELECT id, ts, day, amount_ml FROM intake WHERE user_id=?
+            ORDER BY day DESC, ts DESC, id DESC LIMIT ?
             """,
-            (start.isoformat(), end.isoformat()),
+            (user_id, window),
         )
-        return [(r[0], int(r[1])) for r in cur.fetchall()]
-    finally:
-        con.close()
+        rows = list(starmap(IntakeRow, cur.fetchall()))
+        with _cache_lock:
+            _cache.update(user=user_id, recent=rows[:_RECENT_WINDOW], complete=len(rows) < window)
+    return rows[:limit]
+
+
+# Cursor opaco de get_page: (day, ts, id) de la última fila entregada
+Cursor = Tuple[int, int, int]
+
+
+def _query_intakes(
+    con,
+    user_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    cursor: Optional[Cursor] = None,
+    limit: Optional[int] = None,
+    with_day_totals: bool = True,
+) -> List[IntakeRow]:
+    """IntakeRow (con total del día) de `user_id`, de la más reciente a la más antigua.
+    Usuario, rango de días y keyset son condiciones sobre el índice
+    (user_id, day, ts, id); el total del día sale del mismo SELECT vía la llave
+    primaria (user_id, day) de daily_totals."""
+    where, params = ["i.user_id = ?"], [user_id]
+    if start is not None:
+        where.append("i.day >= ?")
+        params.append(_day_key(start))
+    if end is not None:
+        where.append("i.day <= ?")
+        params.append(_day_key(end))
+    if cursor is not None:
+        where.append("(i.day, i.ts, i.id) < (?, ?, ?)")
+        params.extend(cursor)
+    if with_day_totals:
+        sql = """
+            SELECT i.id, i.ts, i.day, i.amount_ml, d.total_ml
+            FROM intake i JOIN daily_totals d ON d.user_id = i.user_id AND d.day = i.day
+        """
+    else:
+        sql = "SELECT i.id, i.ts, i.day, i.amount_ml, NULL FROM intake i"
+    sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY i.day DESC, i.ts DESC, i.id DESC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    return list(starmap(IntakeRow, con.execute(sql, params).fetchall()))
+
 
+def get_page(
+    cursor: Optional[Cursor] = None,
+    limit: int = 50,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    user_id: Optional[int] = None,
+) -> Tuple[List[IntakeRow], Optional[Cursor]]:
+    """Página de ingestas (con day_total) de la más reciente a la más antigua,
+    opcionalmente acotada a las fechas [start, end].
+    Pagina por keyset sobre el índice (user_id, day, ts, id): el costo de cada página no
+    depende de cuántas filas se hayan saltado. Devuelve (filas, siguiente_cursor);
+    siguiente_cursor es None cuando no quedan más filas."""
+    limit = int(limit)
+    flush()
+    with db.connection() as con:
+        rows = _query_intakes(con, _uid(user_id), start, end, cursor, limit)
+    next_cursor = (rows[-1].day, rows[-1].ts, rows[-1].id) if len(rows) == limit else None
+    return rows, next_cursor
 
-def get_daily_totals(days: int = 7) -> List[Tuple[str, int]]:
+
+def get_between_dates(
+    start: date,
+    end: date,
+    with_day_totals: bool = False,
+    user_id: Optional[int] = None,
+) -> List[IntakeRow]:
+    """Devuelve intakes entre fechas inclusive, ordenados desc por ts.
+    start/end son objetos date (local). Con with_day_totals=True cada fila trae
+    además el total de su día en `day_total`."""
+    flush()
+    with db.connection() as con:
+        return _query_intakes(con, _uid(user_id), start, end, with_day_totals=with_day_totals)
+
+
+def get_daily_totals(days: int = 7, user_id: Optional[int] = None) -> List[Tuple[str, int]]:
     """Totales por día para los últimos N días (incluye hoy). Orden ascendente por fecha."""
-    init_db()
-    con = sqlite3.connect(db_path())
-    try:
-        start = (date.today() - timedelta(days=days - 1)).isoformat()
-        end = date.today().isoformat()
+    end = _day_key(get_today(user_id))
+    flush()
+    with db.connection() as con:
+        start = end - (days - 1)
         cur = con.execute(
             """
-            SELECT substr(ts,1,10) as d, COALESCE(SUM(amount_ml),0) as total
-            FROM intake
-            WHERE d BETWEEN ? AND ?
-            GROUP BY d
-            ORDER BY d ASC
+            SELECT day, total_ml FROM daily_totals
+            WHERE user_id = ? AND day BETWEEN ? AND ? ORDER BY day ASC
             """,
-            (start, end),
+            (_uid(user_id), start, end),
         )
-        return [(r[0], int(r[1])) for r in cur.fetchall()]
-    finally:
-        con.close()
+        return [(date.fromordinal(r[0]).isoformat(), int(r[1])) for r in cur.fetchall()]
 
 
-def delete_last_intake() -> Optional[Tuple[str, int]]:
-    """Elimina la última ingesta (por ts más reciente). Devuelve (ts, amount) si existía."""
-    init_db()
-    con = sqlite3.connect(db_path())
-    try:
-        cur = con.execute("SELECT id, ts, amount_ml FROM intake ORDER BY ts DESC LIMIT 1")
+def delete_last_intake(user_id: Optional[int] = None) -> Optional[IntakeRow]:
+    """Elimina la última ingesta (por ts más reciente) de `user_id`. Devuelve la fila si existía."""
+    user_id = _uid(user_id)
+    flush()
+    with db.connection() as con:
+        cur = con.execute(
+            """
+            SELECT id, ts, day, amount_ml FROM intake WHERE user_id=?
+            ORDER BY day DESC, ts DESC, id DESC LIMIT 1
+            """,
+            (user_id,),
+        )
         row = cur.fetchone()
         if not row:
             return None
-        _id, ts_val, amount = row
-        con.execute("DELETE FROM intake WHERE id=?", (_id,))
+        row = IntakeRow(*row)
+        con.execute("DELETE FROM intake WHERE id=?", (row.id,))
         con.commit()
-        return (ts_val, int(amount))
-    finally:
-        con.close()
+        with _cache_lock:
+            entry = _totals.get(user_id)
+            if entry is not None and entry[0] == row.day:
+                entry[1] -= row.amount_ml
+            if _cache["user"] == user_id:
+                recent = _cache["recent"]
+                if recent and recent[0].id == row.id:
+                    recent.pop(0)
+                elif recent is not None:
+                    _cache.update(recent=None, complete=False)
+    if intake_events.has_subscribers():
+        intake_events.publish(IntakeEvent(
+            intake_events.DELETED, user_id, row.day, row.amount_ml, row.ts, get_today_total(user_id)
+        ))
+    return row
+
+
+def check_daily_totals(repair: bool = False, user_id: Optional[int] = None) -> List[Tuple[str, int, int]]:
+    """Compara daily_totals de `user_id` con un recálculo desde las filas de intake.
+    Devuelve [(fecha, total_resumen, total_real)] de los días que difieren;
+    con repair=True reconstruye el resumen (de todos los usuarios) si hay diferencias."""
+    user_id = _uid(user_id)
+    flush()
+    with db.connection() as con:
+        cur = con.execute(
+            """
+            SELECT day, SUM(rollup), SUM(raw) FROM (
+                SELECT day, total_ml AS rollup, 0 AS raw FROM daily_totals WHERE user_id = ?1
+                UNION ALL
+                SELECT day, 0, SUM(amount_ml) FROM intake WHERE user_id = ?1 GROUP BY day
+            )
+            GROUP BY day
+            HAVING SUM(rollup) != SUM(raw)
+            ORDER BY day ASC
+            """,
+            (user_id,),
+        )
+        diffs = [(date.fromordinal(r[0]).isoformat(), int(r[1]), int(r[2])) for r in cur.fetchall()]
+        if diffs and repair:
+            db.rebuild_daily_totals(con)
+            con.commit()
+    if diffs and repair:
+        invalidate_cache()
+    return diffs
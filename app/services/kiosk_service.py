@@ -0,0 +1,40 @@
+from typing import Dict, NamedTuple
+
+from . import intake_service, user_service
+from .user_service import User
+
+
+class WorkerState(NamedTuple):
+    """Lo que muestra el kiosco de la persona activa."""
+    user: User
+    today_total: int
+
+    @property
+    def goal_ml(self) -> int:
+        return self.user.daily_goal_ml
+
+
+def switch_worker(user_id: int) -> WorkerState:
+    """Hace activa a `user_id` en el kiosco. Perfil, meta y total de hoy salen
+    de las cachés LRU de user_service e intake_service: volver a alguien
+    reciente no toca la BD. ValueError si el usuario no existe.
+    No cambia el usuario por defecto de intake_service (el del dispositivo, que
+    ven inicio e historial): el kiosco pasa user_id en cada llamada."""
+    user = user_service.get_user(user_id)
+    if user is None:
+        raise ValueError(f"No existe el usuario {user_id}")
+    return WorkerState(user, intake_service.get_today_total(user.id))
+
+
+def log_intake(state: WorkerState, amount_ml: int) -> WorkerState:
+    """Registra una ingesta de la persona activa y devuelve su estado actualizado."""
+    intake_service.add_intake(amount_ml, user_id=state.user.id)
+    return state._replace(today_total=intake_service.get_today_total(state.user.id))
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    """Aciertos/fallos de las cachés que usa switch_worker."""
+    return {
+        "profiles": user_service.cache_stats(),
+        "totals": intake_service.cache_stats(),
+    }
@@ -0,0 +1,144 @@
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from . import db
+from .intake_service import _day_key, flush
+
+
+class LeaderEntry(NamedTuple):
+    user_id: int
+    name: str
+    area: Optional[str]
+    sub_area: Optional[str]
+    total_ml: int
+    goal_ml: int
+
+    @property
+    def pct(self) -> float:
+        """Avance hacia la meta del día (puede pasar de 100)."""
+        return 100.0 * self.total_ml / self.goal_ml if self.goal_ml > 0 else 0.0
+
+
+# Resultados por (área, sub_área, día) -> {("top"|"bottom", k): [LeaderEntry]};
+# "hoy" se guarda por minuto, la resolución de los inicios de día de turno: al
+# guardar un minuto se descartan los anteriores (una pantalla sin ingestas no
+# acumula uno por minuto). LRU de _CACHE_SIZE alcances. Se invalida entera
+# cuando la conexión registra cualquier escritura (total_changes cambia):
+# nuevas ingestas, bajas, cambios de meta o de área.
+_CACHE_SIZE = 64
+_cache_lock = threading.Lock()
+_cache: "OrderedDict[Tuple, Dict[Tuple[str, int], List[LeaderEntry]]]" = OrderedDict()
+_cache_version: Optional[Tuple[object, int]] = None
+
+# Cada fila empieza con su llave de orden (avance, ml, id) para que el heap
+# compare tuplas directamente; LeaderEntry se arma solo para las k elegidas.
+# {day} es un día fijo o, para "hoy", el día de turno de cada persona. El
+# usuario local (el perfil del dispositivo) no es parte de la plantilla.
+_SELECT = """
+    SELECT CASE WHEN u.daily_goal_ml > 0
+                THEN CAST(COALESCE(d.total_ml, 0) AS REAL) / u.daily_goal_ml ELSE 0.0 END,
+           COALESCE(d.total_ml, 0), u.id,
+           u.name, u.area, u.sub_area, u.daily_goal_ml
+    FROM users u
+    LEFT JOIN daily_totals d ON d.user_id = u.id AND d.day = {day}
+    WHERE u.id <> %d
+""" % db.LOCAL_USER_ID
+# Quien empieza el día a medianoche (casi todos) usa la fecha de hoy ya calculada
+_SHIFT_TODAY = "CASE u.day_start_min WHEN 0 THEN ? ELSE {} END".format(
+    db.SHIFT_DAY_SQL.format(ts="?", minutes="u.day_start_min")
+)
+
+
+def invalidate_cache() -> None:
+    global _cache_version
+    with _cache_lock:
+        _cache.clear()
+        _cache_version = None
+
+
+def _store(scope: Tuple, key: Tuple[str, int], result: List[LeaderEntry]) -> None:
+    # Con _cache_lock tomado
+    if scope not in _cache:
+        day = scope[2]
+        if isinstance(day, tuple):  # ("today", minuto): los minutos anteriores ya no se piden
+            for old in [s for s in _cache if isinstance(s[2], tuple) and s[2] < day]:
+                del _cache[old]
+        _cache[scope] = {}
+    _cache[scope][key] = result
+    _cache.move_to_end(scope)
+    while len(_cache) > _CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+def _leaders(
+    which: str,
+    k: int,
+    area: Optional[str],
+    sub_area: Optional[str],
+    day: Optional[date],
+) -> List[LeaderEntry]:
+    global _cache_version
+    k = max(0, int(k))
+    if day is None:
+        now = int(time.time())
+        scope = (area, sub_area, ("today", now // 60))
+        now -= now % 60
+        sql, params = _SELECT.format(day=_SHIFT_TODAY), [_day_key(date.fromtimestamp(now)), now]
+    else:
+        scope = (area, sub_area, _day_key(day))
+        sql, params = _SELECT.format(day="?"), [_day_key(day)]
+    flush()
+    with db.connection() as con:
+        version = (con, con.total_changes)
+        with _cache_lock:
+            if _cache_version != version:
+                _cache.clear()
+                _cache_version = version
+            hit = _cache.get(scope, {}).get((which, k))
+            if hit is not None:
+                _cache.move_to_end(scope)
+        if hit is not None:
+            return hit
+        if area is not None:
+            sql += " AND u.area = ?"
+            params.append(area)
+            if sub_area is not None:
+                sql += " AND u.sub_area = ?"
+                params.append(sub_area)
+        # Heap acotado a k sobre el cursor: no se ordena ni se materializa la plantilla
+        select = heapq.nlargest if which == "top" else heapq.nsmallest
+        result = [
+            LeaderEntry(user_id, name, area_, sub_area_, total, goal)
+            for _pct, total, user_id, name, area_, sub_area_, goal in select(k, con.execute(sql, params))
+        ]
+        with _cache_lock:
+            if _cache_version == version:
+                _store(scope, (which, k), result)
+    return result
+
+
+def top_workers(
+    k: int = 10,
+    area: Optional[str] = None,
+    sub_area: Optional[str] = None,
+    day: Optional[date] = None,
+) -> List[LeaderEntry]:
+    """Las k personas con mayor avance hacia su meta el día `day` (por defecto
+    el día de turno en curso de cada quien), en toda la plantilla o dentro de
+    un área / sub área."""
+    return _leaders("top", k, area, sub_area, day)
+
+
+def bottom_workers(
+    k: int = 10,
+    area: Optional[str] = None,
+    sub_area: Optional[str] = None,
+    day: Optional[date] = None,
+) -> List[LeaderEntry]:
+    """Las k personas con menor avance hacia su meta (incluye a quien no ha
+    registrado nada), de la menor a la mayor."""
+    return _leaders("bottom", k, area, sub_area, day)
@@ -1,38 +1,93 @@
-import os
-import json
-from typing import Optional
-
-
-def _project_root() -> str:
-    # This file is in app/services -> go up 2 levels to repo root
-    return os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-
-
-def _data_dir() -> str:
-    d = os.path.join(_project_root(), "storage", "data")
-    os.makedirs(d, exist_ok=True)
-    return d
-
-
-def profile_file_path() -> str:
-    return os.path.join(_data_dir(), "profile.json")
+import atexit
+import threading
+from typing import Dict, Optional
+
+from . import db, settings_service
+
+# El perfil vive en settings_service (clave "profile"), que lo carga junto con
+# el resto de preferencias en la lectura única del arranque: main.py lo consulta
+# en cada cambio de ruta y las páginas al construirse sin tocar disco.
+_PROFILE_KEY = "profile"
+
+# Escritura diferida: save_profile deja el perfil en _pending y un temporizador
+# lo escribe _SAVE_DELAY_S después, así varios guardados seguidos son una sola
+# transacción: el UPSERT en settings y el nombre y la meta del usuario local en
+# users. load_profile ve _pending antes que lo guardado. Un corte a mitad deja
+# el perfil anterior completo.
+_SAVE_DELAY_S = 0.25
+_lock = threading.Lock()
+_pending: Dict[str, Optional[dict]] = {"data": None}
+_version = {"n": 0}  # sube en cada guardado o borrado (ver profile_version)
+_timer: Optional[threading.Timer] = None
+_write_lock = threading.Lock()  # serializa escrituras; se toma antes que _lock
+
+
+def flush_profile() -> None:
+    """Escribe ya el perfil pendiente, si lo hay."""
+    global _timer
+    with _write_lock:
+        with _lock:
+            data = _pending["data"]
+            _pending["data"] = None
+            if _timer is not None:
+                _timer.cancel()
+                _timer = None
+        if data is None:
+            return
+        # El perfil del dispositivo es el usuario local de la BD
+        from . import user_service
+        fields = {"name": data.get("name") or ""}
+        if data.get("daily_goal_ml"):
+            fields["daily_goal_ml"] = int(data["daily_goal_ml"])
+        try:
+            with db.connection() as con:
+                try:
+                    text = settings_service._upsert(con, _PROFILE_KEY, data)
+                    updated = user_service._update(con, user_service.LOCAL_USER_ID, fields)
+                    con.commit()
+                except Exception:
+                    con.rollback()
+                    raise
+                settings_service._remember(_PROFILE_KEY, text)
+                user_service.invalidate_cache()
+            if updated:
+                user_service._updated(user_service.LOCAL_USER_ID, fields)
+        except Exception as e:
+            print(f"Error al guardar perfil: {e}")
+            with _lock:
+                if _pending["data"] is None:  # reintentar en el siguiente guardado o al salir
+                    _pending["data"] = data
+
+
+atexit.register(flush_profile)
 
 
 def load_profile() -> Optional[dict]:
-    p = profile_file_path()
-    if not os.path.exists(p):
-        return None
-    try:
-        with open(p, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return None
+    with _lock:
+        data = _pending["data"]
+    if data is None:
+        data = settings_service.get_value(_PROFILE_KEY)
+    return dict(data) if isinstance(data, dict) else None
 
 
 def save_profile(data: dict) -> None:
-    p = profile_file_path()
-    with open(p, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    """Guarda el perfil. Es visible al instante para load_profile; la BD se
+    escribe en segundo plano (ver flush_profile)."""
+    global _timer
+    with _lock:
+        _pending["data"] = dict(data)
+        _version["n"] += 1
+        if _timer is None:
+            _timer = threading.Timer(_SAVE_DELAY_S, flush_profile)
+            _timer.daemon = True
+            _timer.start()
+
+
+def profile_version() -> int:
+    """Contador que cambia con cada save_profile/delete_profile. Las vistas
+    cacheadas (ui.router) se reconstruyen cuando no coincide."""
+    with _lock:
+        return _version["n"]
 
 
 def has_profile_data() -> bool:
@@ -44,28 +99,42 @@ def has_profile_data() -> bool:
 
 
 def delete_profile() -> bool:
-    """Elimina el archivo de perfil. Retorna True si se eliminó o no existía."""
-    p = profile_file_path()
+    """Elimina el perfil guardado (y el pendiente de escribir). Retorna True si se eliminó o no existía."""
+    global _timer
     try:
-        if os.path.exists(p):
-            os.remove(p)
+        with _write_lock:
+            with _lock:
+                _pending["data"] = None
+                _version["n"] += 1
+                if _timer is not None:
+                    _timer.cancel()
+                    _timer = None
+            settings_service.delete_value(_PROFILE_KEY)
         return True
     except Exception:
         return False
 
 
 def reset_app_data() -> bool:
-    """Elimina todos los datos de la app (perfil y base de datos)."""
+    """Elimina todos los datos de la app (perfil y base de datos). Conserva el tema."""
     try:
         # Eliminar perfil
         delete_profile()
-        
-        # Eliminar base de datos de ingestas
-        from .intake_service import _get_db_path
-        db_path = _get_db_path()
-        if os.path.exists(db_path):
-            os.remove(db_path)
-        
+
+        # Eliminar base de datos de ingestas (cierra antes la conexión compartida)
+        from .db import delete_db
+        from .intake_service import flush, invalidate_cache
+        from . import search_service, user_service
+        dark_mode = settings_service.get_value("dark_mode")
+        flush()  # que ninguna ingesta encolada recree la BD después de borrarla
+        delete_db()
+        invalidate_cache()
+        user_service.invalidate_cache()
+        search_service.invalidate()
+        settings_service.invalidate()
+        if dark_mode is not None:
+            settings_service.set_value("dark_mode", dark_mode)
+
         return True
     except Exception as e:
         print(f"Error al resetear datos: {e}")
@@ -0,0 +1,186 @@
+import csv
+import unicodedata
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import db, user_service
+
+# La plantilla se exporta desde Excel en Latin-1/cp1252; se acepta también UTF-8.
+# Se prueba por línea y, en cuanto una no es UTF-8, se usa el respaldo en adelante.
+_ENCODINGS = ("utf-8", "cp1252", "latin-1")
+
+# Encabezado normalizado (sin acentos, minúsculas) -> columna de users
+_HEADERS = {
+    "nombre completo": "name",
+    "nombre": "name",
+    "puesto": "puesto",
+    "area": "area",
+    "sub area": "sub_area",
+    "subarea": "sub_area",
+}
+
+_BATCH_SIZE = 1000
+
+# (name, puesto, area, sub_area) tal como se guarda en users
+Fields = Tuple[str, Optional[str], Optional[str], Optional[str]]
+
+
+class _StripAccents(dict):
+    """Tabla para str.translate que quita acentos; cada carácter se calcula una vez."""
+
+    def __missing__(self, code: int) -> str:
+        decomposed = unicodedata.normalize("NFKD", chr(code))
+        self[code] = folded = "".join(c for c in decomposed if not unicodedata.combining(c))
+        return folded
+
+
+_STRIP_ACCENTS = _StripAccents()
+
+
+def _fold(text: str) -> str:
+    """Minúsculas y sin acentos: 'Sub Área' -> 'sub area'."""
+    if not text.isascii():
+        text = text.translate(_STRIP_ACCENTS)
+    return text.casefold()
+
+
+def _decode_lines(lines: Iterable[bytes]) -> Iterator[str]:
+    encodings = list(_ENCODINGS)
+    first = True
+    for raw in lines:
+        if first:
+            first = False
+            if raw.startswith(b"\xef\xbb\xbf"):
+                raw = raw[3:]
+        while True:
+            try:
+                yield raw.decode(encodings[0])
+                break
+            except UnicodeDecodeError:
+                encodings.pop(0)
+
+
+def roster_key(full_name: str) -> str:
+    """Clave de identidad de un nombre de la plantilla: sin comas, espacios de
+    más, mayúsculas ni acentos ('Muñoz Perez, Veronica' -> 'munoz perez veronica')."""
+    return " ".join(_fold(full_name).replace(",", " ").split())
+
+
+def display_name(full_name: str) -> str:
+    """'Apellidos, Nombres' -> 'Nombres Apellidos'; sin coma se deja igual."""
+    last, sep, first = full_name.partition(",")
+    parts = (first, last) if sep else (full_name,)
+    return " ".join(" ".join(p.split()) for p in parts if p.strip())
+
+
+def _clean(value: Optional[str]) -> Optional[str]:
+    value = " ".join((value or "").split())
+    return value or None
+
+
+def read_roster(path: str) -> Iterator[Optional[Tuple[str, Fields]]]:
+    """Recorre la plantilla fila por fila. Entrega (roster_key, campos), o None
+    para filas sin nombre.
+    Algunas filas vienen como No. empleado, "Apellidos, Nombre", Area, Puesto
+    (un número en la columna del nombre): se leen con ese orden y sin sub área."""
+    with open(path, "rb") as f:
+        reader = csv.reader(_decode_lines(f))
+        header = next(reader, None)
+        if header is None:
+            return
+        positions = {}
+        for i, h in enumerate(header):
+            positions.setdefault(_HEADERS.get(" ".join(_fold(h).split())), i)
+        if "name" not in positions:
+            raise ValueError(f"La plantilla no tiene columna de nombre: {header}")
+        # Columnas ausentes apuntan más allá del final: siempre quedan vacías
+        name_i, puesto_i, area_i, sub_area_i = (
+            positions.get(col, len(header)) for col in ("name", "puesto", "area", "sub_area")
+        )
+        for record in reader:
+            record.extend([""] * (len(header) + 1 - len(record)))
+            full_name, puesto, sub_area = record[name_i], record[puesto_i], record[sub_area_i]
+            if full_name.strip().isdigit():
+                full_name, puesto, sub_area = record[puesto_i], record[sub_area_i], ""
+            key = roster_key(full_name)
+            if not key:
+                yield None
+                continue
+            yield key, (
+                display_name(full_name),
+                _clean(puesto),
+                _clean(record[area_i]),
+                _clean(sub_area),
+            )
+
+
+def import_roster(path: str, batch_size: int = _BATCH_SIZE) -> Dict[str, int]:
+    """Da de alta o actualiza usuarios desde la plantilla del personal (CSV con
+    Nombre completo, Puesto, Area, Sub área; ver read_roster para las filas
+    con No. empleado).
+    Idempotente: el usuario se identifica por su nombre normalizado y solo se
+    escriben las filas nuevas o con cambios, en transacciones de `batch_size`
+    filas. No da de baja a quien ya no aparece (conserva su historial).
+    Devuelve {"inserted", "updated", "unchanged", "rejected"}."""
+    batch_size = max(1, int(batch_size))
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0, "rejected": 0}
+    changed: List[str] = []
+    moved = False  # alguien cambió de área: puede cambiar su inicio del día
+    from . import intake_service  # intake_service importa user_service
+    intake_service.flush()  # lo encolado se calculó con el inicio actual
+    with db.connection() as con:
+        # Estado actual en memoria: el diff no consulta la BD por fila
+        cur = con.execute(
+            "SELECT roster_key, name, puesto, area, sub_area FROM users WHERE roster_key IS NOT NULL"
+        )
+        known: Dict[str, Fields] = {r[0]: tuple(r[1:]) for r in cur}
+        inserts: List[tuple] = []
+        updates: List[tuple] = []
+
+        def write() -> None:
+            if not inserts and not updates:
+                return
+            try:
+                con.execute("BEGIN")
+                con.executemany(
+                    "INSERT INTO users (roster_key, name, puesto, area, sub_area) VALUES (?, ?, ?, ?, ?)",
+                    inserts,
+                )
+                con.executemany(
+                    "UPDATE users SET name=?, puesto=?, area=?, sub_area=? WHERE roster_key=?",
+                    updates,
+                )
+                con.commit()
+            except Exception:
+                con.rollback()
+                raise
+            finally:
+                user_service.invalidate_cache()
+            inserts.clear()
+            updates.clear()
+
+        for item in read_roster(path):
+            if item is None:
+                counts["rejected"] += 1
+                continue
+            key, fields = item
+            current = known.get(key)
+            if current == fields:
+                counts["unchanged"] += 1
+                continue
+            if current is None:
+                inserts.append((key,) + fields)
+                counts["inserted"] += 1
+            else:
+                updates.append(fields + (key,))
+                counts["updated"] += 1
+                moved = moved or current[2] != fields[2]
+            known[key] = fields
+            changed.append(key)
+            if len(inserts) + len(updates) >= batch_size:
+                write()
+        write()
+    if moved:
+        intake_service.invalidate_cache()  # trg_users_day_start_area pudo reagrupar registros
+    from .search_service import refresh_users  # search_service importa este módulo
+    refresh_users(roster_keys=changed)
+    return counts
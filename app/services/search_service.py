@@ -0,0 +1,216 @@
+import bisect
+import heapq
+import json
+import threading
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+from . import db
+from .roster_service import roster_key
+from .user_service import User, _COLUMNS
+
+# Índice en memoria sobre los nombres de users para buscar mientras se escribe
+# en el kiosco. Cada palabra del nombre normalizado (sin acentos ni mayúsculas)
+# se indexa por sus prefijos de 1 a _PREFIX_LEN letras (un trie aplanado en un
+# dict); un nombre coincide si cada palabra tecleada es prefijo de alguna de sus
+# palabras ("cruz mau" -> "Mauricia De La Cruz Ramirez"). Se construye completo
+# en la primera búsqueda y después se actualiza por usuario (refresh_users)
+# cuando roster_service o user_service escriben.
+# Orden de los resultados: primero los nombres cuya primera palabra empieza con
+# algo de lo tecleado, luego los que tienen una palabra igual a lo tecleado
+# (_words) y al final el resto; dentro de cada grupo, alfabético.
+# Orden de locks: _lock y luego la conexión; no llamar con la conexión tomada.
+_PREFIX_LEN = 3
+# Con más candidatos que esto conviene recorrer la lista ya ordenada, grupo por
+# grupo, y parar en `limit` coincidencias en lugar de ordenar todos los candidatos.
+_SCAN_THRESHOLD = 2000
+
+_lock = threading.Lock()
+_built = False
+_prefixes: Dict[str, Set[int]] = {}
+# palabra completa -> user_ids
+_words: Dict[str, Set[int]] = {}
+# user_id -> (clave normalizada, palabras de la clave, User)
+_entries: Dict[int, Tuple[str, Tuple[str, ...], User]] = {}
+# (clave, user_id) en orden alfabético: el desempate de los resultados. Las
+# claves que empiezan con una palabra tecleada forman un tramo contiguo.
+_ordered: List[Tuple[str, int]] = []
+
+_EMPTY: Set[int] = set()
+
+
+def _word_prefixes(words: Iterable[str]) -> Set[str]:
+    return {w[:n] for w in words for n in range(1, min(len(w), _PREFIX_LEN) + 1)}
+
+
+def _add(user: User, ordered: bool = True) -> None:
+    key = roster_key(user.name)
+    if not key:
+        return
+    words = tuple(key.split())
+    _entries[user.id] = (key, words, user)
+    for prefix in _word_prefixes(words):
+        _prefixes.setdefault(prefix, set()).add(user.id)
+    for word in words:
+        _words.setdefault(word, set()).add(user.id)
+    if ordered:
+        bisect.insort(_ordered, (key, user.id))
+
+
+def _remove(user_id: int) -> None:
+    entry = _entries.pop(user_id, None)
+    if entry is None:
+        return
+    key, words, _user = entry
+    for prefix in _word_prefixes(words):
+        ids = _prefixes.get(prefix)
+        if ids is not None:
+            ids.discard(user_id)
+            if not ids:
+                del _prefixes[prefix]
+    for word in words:
+        ids = _words.get(word)
+        if ids is not None:
+            ids.discard(user_id)
+            if not ids:
+                del _words[word]
+    i = bisect.bisect_left(_ordered, (key, user_id))
+    if i < len(_ordered) and _ordered[i] == (key, user_id):
+        del _ordered[i]
+
+
+def _ensure_built() -> None:
+    """Construye el índice completo (con _lock tomado)."""
+    global _built
+    if _built:
+        return
+    with db.connection() as con:
+        for row in con.execute(f"SELECT {_COLUMNS} FROM users"):
+            _add(User(*row), ordered=False)
+    _ordered[:] = sorted((key, user_id) for user_id, (key, _w, _u) in _entries.items())
+    _built = True
+
+
+def invalidate() -> None:
+    """Descarta el índice; la siguiente búsqueda lo reconstruye desde la BD."""
+    global _built
+    with _lock:
+        _prefixes.clear()
+        _words.clear()
+        _entries.clear()
+        _ordered.clear()
+        _built = False
+
+
+def refresh_users(ids: Iterable[int] = (), roster_keys: Iterable[str] = ()) -> None:
+    """Reindexa los usuarios indicados (por id o roster_key) tras altas o cambios.
+    Si el índice aún no se construyó no hace nada: se construirá completo."""
+    ids, roster_keys = list(ids), list(roster_keys)
+    with _lock:
+        if not _built or not (ids or roster_keys):
+            return
+        with db.connection() as con:
+            rows = con.execute(
+                f"""
+                SELECT {_COLUMNS} FROM users
+                WHERE id IN (SELECT value FROM json_each(?))
+                   OR roster_key IN (SELECT value FROM json_each(?))
+                """,
+                (json.dumps(ids), json.dumps(roster_keys)),
+            ).fetchall()
+        for row in rows:
+            user = User(*row)
+            _remove(user.id)
+            _add(user)
+
+
+def _starting_with(tokens: List[str]) -> Iterator[int]:
+    """user_ids cuya clave (su primera palabra) empieza con alguno de `tokens`,
+    en orden alfabético (con _lock tomado)."""
+    spans = [
+        _ordered[bisect.bisect_left(_ordered, (t,)):bisect.bisect_left(_ordered, (t + "\U0010ffff",))]
+        for t in set(tokens)
+    ]
+    if len(spans) == 1:
+        for _key, user_id in spans[0]:
+            yield user_id
+        return
+    last = None
+    for _key, user_id in heapq.merge(*spans):
+        if user_id != last:
+            yield user_id
+            last = user_id
+
+
+def search(query: str, limit: int = 20) -> List[User]:
+    """Usuarios cuyo nombre tiene, para cada palabra de `query`, una palabra que
+    empieza con ella (sin acentos ni mayúsculas). Primero los que empiezan con
+    lo tecleado, luego los que tienen una palabra exacta; alfabético dentro de
+    cada grupo."""
+    tokens = roster_key(query).split()
+    if not tokens or limit <= 0:
+        return []
+    with _lock:
+        _ensure_built()
+        sets = sorted((_prefixes.get(t[:_PREFIX_LEN], _EMPTY) for t in tokens), key=len)
+        first, rest = sets[0], sets[1:]
+        # Palabras más largas que el prefijo indexado se confirman contra el nombre
+        long_tokens = [t for t in tokens if len(t) > _PREFIX_LEN]
+
+        def matches(user_id: int) -> bool:
+            if not all(user_id in s for s in rest):
+                return False
+            words = _entries[user_id][1]
+            return all(any(w.startswith(t) for w in words) for t in long_tokens)
+
+        # La clave empieza con su primera palabra (y las palabras tecleadas no
+        # tienen espacios): empezar con lo tecleado es key.startswith
+        lead_tokens = tuple(tokens)
+
+        def leads(user_id: int) -> bool:
+            return _entries[user_id][0].startswith(lead_tokens)
+
+        def rank(user_id: int) -> Tuple[bool, bool, str, int]:
+            key, words, _user = _entries[user_id]
+            return (not leads(user_id), not any(t in words for t in tokens), key, user_id)
+
+        if len(first) <= _SCAN_THRESHOLD:
+            found = [user_id for user_id in first if matches(user_id)]
+            found = heapq.nsmallest(limit, found, key=rank)
+        else:
+            exact: Set[int] = set()
+            for t in tokens:
+                exact |= _words.get(t, _EMPTY)
+            # Grupo a grupo, cada uno en orden alfabético, hasta juntar `limit`.
+            # Quien empieza con lo tecleado está en los tramos de _starting_with
+            if len(exact) <= _SCAN_THRESHOLD:
+                exact_found = sorted(
+                    (user_id for user_id in exact if user_id in first),
+                    key=lambda user_id: (_entries[user_id][0], user_id),
+                )
+                exact_leads = [user_id for user_id in exact_found if leads(user_id)]
+                exact_rest = [user_id for user_id in exact_found if not leads(user_id)]
+            else:
+                exact_leads = (user_id for user_id in _starting_with(tokens) if user_id in exact)
+                exact_rest = (
+                    user_id for key, user_id in _ordered
+                    if user_id in exact and user_id in first and not key.startswith(lead_tokens)
+                )
+            groups = (
+                exact_leads,
+                (user_id for user_id in _starting_with(tokens) if user_id not in exact),
+                exact_rest,
+                (
+                    user_id for key, user_id in _ordered
+                    if user_id in first and user_id not in exact and not key.startswith(lead_tokens)
+                ),
+            )
+            found = []
+            for group in groups:
+                for user_id in group:
+                    if user_id in first and matches(user_id):
+                        found.append(user_id)
+                        if len(found) >= limit:
+                            break
+                if len(found) >= limit:
+                    break
+        return [_entries[user_id][2] for user_id in found]
@@ -0,0 +1,85 @@
+import json
+import threading
+from typing import Dict, Optional
+
+from . import db
+
+# Preferencias de la app (tema, perfil, onboarding...) en la tabla settings de
+# la BD: al arrancar se leen todas con un solo SELECT sobre la conexión que ya
+# se abre para las ingestas, en lugar de un archivo JSON (con su makedirs) por
+# preferencia. Después se sirven desde memoria; set_value escribe y actualiza
+# la copia. Los valores son JSON: no modificar lo que devuelve get_value.
+# Orden de locks: primero la conexión y luego _lock.
+_lock = threading.Lock()
+_values: Optional[Dict[str, object]] = None
+_stats = {"hits": 0, "loads": 0}
+
+
+def _dumps(value: object) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _ensure_loaded() -> Dict[str, object]:
+    global _values
+    with _lock:
+        if _values is not None:
+            _stats["hits"] += 1
+            return _values
+    # Se carga sin soltar la conexión: una escritura concurrente espera a que termine
+    with db.connection() as con:
+        with _lock:
+            if _values is None:
+                _stats["loads"] += 1
+                _values = {k: json.loads(v) for k, v in con.execute("SELECT key, value FROM settings")}
+            return _values
+
+
+def get_value(key: str, default: object = None) -> object:
+    return _ensure_loaded().get(key, default)
+
+
+def _upsert(con, key: str, value: object) -> str:
+    """Escribe `key` sin hacer commit (para sumarla a otra transacción) y
+    devuelve el JSON escrito; tras el commit, pasarlo a _remember."""
+    text = _dumps(value)
+    con.execute(
+        "INSERT INTO settings (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (key, text),
+    )
+    return text
+
+
+def _remember(key: str, text: str) -> None:
+    # Con la conexión tomada, después del commit
+    with _lock:
+        if _values is not None:
+            _values[key] = json.loads(text)  # copia: el llamador puede seguir usando el valor
+
+
+def set_value(key: str, value: object) -> None:
+    with db.connection() as con:
+        text = _upsert(con, key, value)
+        con.commit()
+        _remember(key, text)
+
+
+def delete_value(key: str) -> None:
+    with db.connection() as con:
+        con.execute("DELETE FROM settings WHERE key=?", (key,))
+        con.commit()
+        with _lock:
+            if _values is not None:
+                _values.pop(key, None)
+
+
+def invalidate() -> None:
+    """Descarta la copia en memoria (p. ej. tras borrar la BD)."""
+    global _values
+    with _lock:
+        _values = None
+
+
+def cache_stats() -> Dict[str, int]:
+    """Lecturas servidas desde memoria (hits) y cargas desde la BD (loads)."""
+    with _lock:
+        return dict(_stats)
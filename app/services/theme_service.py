@@ -1,38 +1,22 @@
-import os
-import json
-from typing import Optional
+from . import settings_service
 
-
-def _theme_file_path() -> str:
-    """Ruta del archivo de configuración del tema."""
-    # app/services/theme_service.py -> root -> storage/data/theme.json
-    root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-    project_root = os.path.abspath(os.path.join(root_dir, ".."))
-    data_dir = os.path.join(project_root, "storage", "data")
-    os.makedirs(data_dir, exist_ok=True)
-    return os.path.join(data_dir, "theme.json")
+# La preferencia vive en settings_service (antes en theme.json, que se
+# guardaba un directorio por encima de storage/data; la migración lo importa).
+_DARK_MODE_KEY = "dark_mode"
 
 
 def load_theme_preference() -> bool:
-    """Carga la preferencia de tema oscuro desde el archivo."""
+    """Carga la preferencia de tema oscuro."""
     try:
-        path = _theme_file_path()
-        if os.path.exists(path):
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                return data.get("dark_mode", False)
-        return False  # Por defecto tema claro
+        return bool(settings_service.get_value(_DARK_MODE_KEY, False))
     except Exception:
-        return False
+        return False  # Por defecto tema claro
 
 
 def save_theme_preference(dark_mode: bool) -> bool:
-    """Guarda la preferencia de tema oscuro en el archivo."""
+    """Guarda la preferencia de tema oscuro."""
     try:
-        path = _theme_file_path()
-        data = {"dark_mode": dark_mode}
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        settings_service.set_value(_DARK_MODE_KEY, bool(dark_mode))
         return True
     except Exception:
         return False
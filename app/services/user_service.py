@@ -0,0 +1,185 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional
+
+from . import db, intake_events
+from .db import LOCAL_USER_ID
+
+
+class User(NamedTuple):
+    id: int
+    name: str
+    puesto: Optional[str]
+    area: Optional[str]
+    sub_area: Optional[str]
+    daily_goal_ml: int
+    day_start_min: int = 0  # inicio de su día (turno) en minutos desde la medianoche
+
+
+_COLUMNS = "id, name, puesto, area, sub_area, daily_goal_ml, day_start_min"
+# Campos editables con update_user (los nombres van en el SQL: no aceptar otros)
+_EDITABLE = ("name", "puesto", "area", "sub_area", "daily_goal_ml")
+
+# Últimos usuarios leídos con get_user (LRU): en un kiosco se alterna entre las
+# mismas personas y cada cambio no debe ir a la BD. Cualquier escritura en
+# users de este módulo o de roster_service la invalida (con la conexión tomada).
+_CACHE_SIZE = 64
+_cache_lock = threading.Lock()
+_cache: "OrderedDict[int, User]" = OrderedDict()
+_stats = {"hits": 0, "misses": 0}
+
+
+def invalidate_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+def cache_stats() -> Dict[str, int]:
+    """Aciertos y fallos de get_user contra la caché."""
+    with _cache_lock:
+        return dict(_stats, size=len(_cache))
+
+
+def create_user(
+    name: str,
+    puesto: Optional[str] = None,
+    area: Optional[str] = None,
+    sub_area: Optional[str] = None,
+    daily_goal_ml: int = 2000,
+) -> int:
+    """Da de alta un usuario y devuelve su id."""
+    with db.connection() as con:
+        cur = con.execute(
+            "INSERT INTO users (name, puesto, area, sub_area, daily_goal_ml) VALUES (?, ?, ?, ?, ?)",
+            (name, puesto, area or None, sub_area or None, int(daily_goal_ml)),
+        )
+        con.commit()
+        invalidate_cache()
+    from .search_service import refresh_users  # search_service importa este módulo
+    refresh_users(ids=[cur.lastrowid])
+    return cur.lastrowid
+
+
+def get_user(user_id: int) -> Optional[User]:
+    user_id = int(user_id)
+    with _cache_lock:
+        user = _cache.get(user_id)
+        if user is not None:
+            _cache.move_to_end(user_id)
+            _stats["hits"] += 1
+            return user
+        _stats["misses"] += 1
+    # Se cachea sin soltar la conexión: una escritura concurrente invalida después
+    with db.connection() as con:
+        row = con.execute(f"SELECT {_COLUMNS} FROM users WHERE id=?", (user_id,)).fetchone()
+        if not row:
+            return None
+        user = User(*row)
+        with _cache_lock:
+            _cache[user_id] = user
+            if len(_cache) > _CACHE_SIZE:
+                _cache.popitem(last=False)
+    return user
+
+
+def update_user(user_id: int, **fields) -> bool:
+    """Actualiza los campos indicados. Devuelve False si el usuario no existe."""
+    unknown = set(fields) - set(_EDITABLE)
+    if unknown:
+        raise ValueError(f"Campos no editables: {', '.join(sorted(unknown))}")
+    if not fields:
+        return get_user(user_id) is not None
+    if "area" in fields:
+        # El cambio de área puede cambiar el inicio del día (trg_users_day_start_area):
+        # lo encolado se calculó con el anterior y los totales en caché se reagrupan
+        from . import intake_service  # intake_service importa este módulo
+        intake_service.flush()
+    with db.connection() as con:
+        updated = _update(con, user_id, fields)
+        con.commit()
+        invalidate_cache()
+    if updated:
+        _updated(user_id, fields)
+    return updated
+
+
+def _update(con, user_id: int, fields: dict) -> bool:
+    """El UPDATE de update_user sin commit, para sumarlo a otra transacción.
+    Tras el commit: invalidate_cache() con la conexión tomada y, ya sin ella,
+    _updated si devolvió True."""
+    cols = [c for c in _EDITABLE if c in fields]
+    values = []
+    for c in cols:
+        # Área o sub área vacía es "sin": sub_area = '' es la fila del área completa
+        values.append((fields[c] or None) if c in ("area", "sub_area") else fields[c])
+    cur = con.execute(
+        f"UPDATE users SET {', '.join(c + '=?' for c in cols)} WHERE id=?",
+        values + [int(user_id)],
+    )
+    return cur.rowcount > 0
+
+
+def _updated(user_id: int, fields: dict) -> None:
+    """Avisos tras actualizar un usuario (sin la conexión tomada)."""
+    if "name" in fields:
+        from .search_service import refresh_users
+        refresh_users(ids=[int(user_id)])
+    if "daily_goal_ml" in fields:
+        intake_events.publish(intake_events.IntakeEvent(
+            intake_events.GOAL_CHANGED, int(user_id), goal_ml=int(fields["daily_goal_ml"])
+        ))
+    if "area" in fields:
+        from . import intake_service
+        intake_service.invalidate_cache()
+
+
+def set_day_start(minutes: int, user_id: Optional[int] = None, area: Optional[str] = None) -> int:
+    """Fija la hora en que empieza el día de una persona (`user_id`) o de toda
+    un área (`area`; las altas posteriores en ella la heredan), en minutos
+    desde la medianoche: 360 para un turno nocturno que cierra a las 6:00.
+    Reasigna el día de turno solo de las ingestas que cambian de día; los
+    triggers ajustan daily_totals y los resúmenes por área. Devuelve cuántas
+    ingestas se movieron."""
+    minutes = int(minutes)
+    if not 0 <= minutes < 24 * 60:
+        raise ValueError("El inicio del día debe estar entre 0 y 1439 minutos")
+    if (user_id is None) == (area is None):
+        raise ValueError("Indica user_id o area")
+    from . import intake_service  # intake_service importa este módulo
+    intake_service.flush()  # lo encolado se calculó con el inicio anterior
+    shift_day = db.SHIFT_DAY_SQL.format(ts="ts", minutes=":minutes")
+    with db.connection() as con:
+        try:
+            con.execute("BEGIN")
+            if area is not None:
+                con.execute(
+                    "INSERT OR REPLACE INTO area_settings (area, day_start_min) VALUES (?, ?)", (area, minutes)
+                )
+                con.execute("UPDATE users SET day_start_min=? WHERE area=?", (minutes, area))
+                scope = "user_id IN (SELECT id FROM users WHERE area = :scope)"
+            else:
+                con.execute("UPDATE users SET day_start_min=? WHERE id=?", (minutes, int(user_id)))
+                scope = "user_id = :scope"
+            cur = con.execute(
+                f"UPDATE intake SET day = {shift_day} WHERE {scope} AND day != {shift_day}",
+                {"minutes": minutes, "scope": area if area is not None else int(user_id)},
+            )
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+        invalidate_cache()
+    intake_service.invalidate_cache()
+    return cur.rowcount
+
+
+def list_users(area: Optional[str] = None) -> List[User]:
+    """Usuarios ordenados por nombre, opcionalmente solo los de un área."""
+    sql = f"SELECT {_COLUMNS} FROM users"
+    params = []
+    if area is not None:
+        sql += " WHERE area=?"
+        params.append(area)
+    sql += " ORDER BY name"
+    with db.connection() as con:
+        return [User(*r) for r in con.execute(sql, params).fetchall()]
@@ -0,0 +1,44 @@
+"""Medición del arranque en frío.
+
+Con AWA_STARTUP_TRACE=1 la app imprime, al quedar lista, los milisegundos desde
+que empezó a importarse main.py hasta cada hito: fin de los imports, entrada a
+main(), primer page.update() y app interactiva (main() terminó de mostrar la
+primera ruta). Si la variable es una ruta, agrega además una línea JSON a ese
+archivo para comparar arranques entre versiones. Sin la variable no hace nada.
+"""
+import json
+import os
+import time
+from typing import Dict, Iterable
+
+# Importar antes que todo lo demás en main.py: aquí empieza el reloj
+_T0 = time.perf_counter()
+_TARGET = os.environ.get("AWA_STARTUP_TRACE", "")
+_marks: Dict[str, float] = {}
+
+
+def enabled() -> bool:
+    return bool(_TARGET)
+
+
+def mark(name: str) -> None:
+    """Registra el hito `name` (solo la primera vez)."""
+    if _TARGET and name not in _marks:
+        _marks[name] = (time.perf_counter() - _T0) * 1000
+
+
+def report(pages: Iterable[str] = ()) -> None:
+    """Imprime (y guarda, si AWA_STARTUP_TRACE es una ruta) los hitos registrados."""
+    if not _TARGET or "reported" in _marks:
+        return
+    _marks["reported"] = 0.0
+    record = {k: round(v, 2) for k, v in _marks.items() if k != "reported"}
+    record["pages"] = sorted(pages)
+    print("[arranque] " + "  ".join(f"{k}={v} ms" for k, v in record.items() if k != "pages")
+          + f"  páginas={','.join(record['pages'])}")
+    if _TARGET != "1":
+        try:
+            with open(_TARGET, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print(f"No se pudo guardar la medición de arranque: {e}")
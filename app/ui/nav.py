@@ -0,0 +1,124 @@
+from typing import List
+
+import flet as ft
+
+from config import Colors, Design
+
+# Barra inferior de inicio, historial, perfil y ajustes. Cada View tiene la
+# suya (un control de Flet pertenece a un solo árbol), construida con los
+# colores del tema actual y la pestaña de su ruta activa; como las vistas de
+# las pestañas se guardan en ui.router, la barra se construye una vez por
+# vista y no en cada navegación. Las páginas la dejan en view.data["nav"] y
+# main.py llama a select_tab al montar la vista: solo repinta si la pestaña
+# activa no es la de la ruta.
+TABS = [
+    ("Inicio", ft.Icons.HOME_ROUNDED, "/"),
+    ("Historial", ft.Icons.ANALYTICS_ROUNDED, "/history"),
+    ("Perfil", ft.Icons.PERSON_ROUNDED, "/profile"),
+    ("Ajustes", ft.Icons.SETTINGS_ROUNDED, "/settings"),
+]
+
+
+def current_tab_index(route: str) -> int:
+    if route in ("/", ""):  # inicio
+        return 0
+    if route.startswith("/history"):
+        return 1
+    if route.startswith("/profile"):
+        return 2
+    if route.startswith("/settings"):
+        return 3
+    return 0
+
+
+def _go(route: str):
+    # La página sale del evento: la barra no se ata a la primera que la construyó
+    return lambda e: e.page.go(route)
+
+
+def _paint(item: tuple, active: bool) -> None:
+    box, icon, text = item
+    box.bgcolor = Colors.PRIMARY if active else Colors.SURFACE
+    icon.color = Colors.TEXT_LIGHT if active else Colors.TEXT_SECONDARY
+    text.color = Colors.TEXT_PRIMARY if active else Colors.TEXT_SECONDARY
+    text.weight = Colors.get_font_weight("MEDIUM") if active else ft.FontWeight.NORMAL
+
+
+def _nav_item(label: str, icon, route: str) -> tuple:
+    icon_control = ft.Icon(icon, size=Design.ICON_SIZE_LG)
+    box = ft.Container(
+        content=icon_control,
+        width=40,
+        height=40,
+        border_radius=Design.BORDER_RADIUS_SM,
+        alignment=ft.alignment.center,
+    )
+    text = ft.Text(label, size=Design.FONT_SIZE_CAPTION)
+    control = ft.Container(
+        content=ft.Column(
+            [box, text],
+            spacing=Design.SPACE_XXXS,
+            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+        ),
+        padding=ft.padding.symmetric(vertical=Design.SPACE_XS, horizontal=Design.SPACE_XXS),
+        on_click=_go(route),
+        expand=True,
+    )
+    return control, (box, icon_control, text)
+
+
+def _build_nav() -> ft.Container:
+    """Construye la barra (sin pestaña activa) con los colores del tema actual.
+    bar.data = {"items": [(caja, icono, texto)], "active": índice}."""
+    controls: List[ft.Control] = []
+    items: List[tuple] = []
+    for label, icon, route in TABS:
+        control, item = _nav_item(label, icon, route)
+        _paint(item, False)
+        controls.append(control)
+        items.append(item)
+    return ft.Container(
+        content=ft.Row(
+            controls,
+            alignment=ft.MainAxisAlignment.SPACE_EVENLY,
+            vertical_alignment=ft.CrossAxisAlignment.CENTER,
+        ),
+        bgcolor=Colors.CARD_BACKGROUND,
+        padding=ft.padding.only(left=Design.SPACE_SM, right=Design.SPACE_SM, top=Design.SPACE_XS, bottom=Design.SPACE_XS),
+        border=ft.border.only(top=ft.border.BorderSide(1, Colors.BORDER)),
+        shadow=ft.BoxShadow(
+            spread_radius=0,
+            blur_radius=20,
+            color=Colors.with_opacity(0.1, Colors.DARK_NAVY),
+            offset=ft.Offset(0, -4),
+        ),
+        data={"items": items, "active": None},
+    )
+
+
+def _select(bar: ft.Container, idx: int) -> bool:
+    nav = bar.data
+    if nav["active"] == idx:
+        return False
+    if nav["active"] is not None:
+        _paint(nav["items"][nav["active"]], False)
+    _paint(nav["items"][idx], True)
+    nav["active"] = idx
+    return True
+
+
+def select_tab(view: ft.View, route: str) -> bool:
+    """Marca como activa la pestaña de `route` en la barra de `view` (si la
+    tiene). Devuelve True si cambió algo (hace falta page.update())."""
+    bar = view.data.get("nav") if isinstance(view.data, dict) else None
+    if bar is None:
+        return False
+    return _select(bar, current_tab_index(route))
+
+
+def bottom_nav(page: ft.Page) -> ft.Container:
+    """Barra inferior nueva para la View que se está construyendo, con la
+    pestaña de page.route activa. Guardarla en view.data["nav"]."""
+    bar = _build_nav()
+    _select(bar, current_tab_index(page.route))
+    return bar
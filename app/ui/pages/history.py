@@ -1,82 +1,18 @@
 import flet as ft
 from datetime import datetime, date, timedelta
+from typing import Callable, Tuple
 from config import Colors, Design
-from services.intake_service import get_recent, get_daily_totals, delete_last_intake
+from services import intake_events
+from services.intake_service import get_page, get_daily_totals, delete_last_intake, get_today, get_active_user
+from ui.nav import bottom_nav
+from ui.router import is_mounted
+from ui.updates import event_handler, request_update
 
 ft.with_opacity = Colors.with_opacity
 
 
-def _current_tab_index(route: str) -> int:
-    if route in ("/", ""):
-        return 0
-    if route.startswith("/history"):
-        return 1
-    if route.startswith("/profile"):
-        return 2
-    if route.startswith("/settings"):
-        return 3
-    return 0
-
-
-def _nav_item(label: str, icon, active: bool, on_click):
-    return ft.Container(
-        content=ft.Column(
-            [
-                ft.Container(
-                    content=ft.Icon(
-                        icon, 
-                        size=Design.ICON_SIZE_LG, 
-                        color=Colors.TEXT_LIGHT if active else Colors.TEXT_SECONDARY
-                    ),
-                    width=40,
-                    height=40,
-                    bgcolor=Colors.PRIMARY if active else Colors.SURFACE,
-                    border_radius=Design.BORDER_RADIUS_SM,
-                    alignment=ft.alignment.center,
-                ),
-                ft.Text(
-                    label, 
-                    size=Design.FONT_SIZE_CAPTION, 
-                    color=Colors.TEXT_PRIMARY if active else Colors.TEXT_SECONDARY,
-                    weight=Colors.get_font_weight("MEDIUM") if active else ft.FontWeight.NORMAL,
-                ),
-            ],
-            spacing=Design.SPACE_XXXS,
-            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-        ),
-        padding=ft.padding.symmetric(vertical=Design.SPACE_XS, horizontal=Design.SPACE_XXS),
-        on_click=on_click,
-        expand=True,
-    )
-
-
-def _bottom_nav(page: ft.Page):
-    idx = _current_tab_index(page.route)
-    return ft.Container(
-        content=ft.Row(
-            [
-                _nav_item("Inicio", ft.Icons.HOME_ROUNDED, idx == 0, lambda e: page.go("/")),
-                _nav_item("Historial", ft.Icons.ANALYTICS_ROUNDED, idx == 1, lambda e: page.go("/history")),
-                _nav_item("Perfil", ft.Icons.PERSON_ROUNDED, idx == 2, lambda e: page.go("/profile")),
-                _nav_item("Ajustes", ft.Icons.SETTINGS_ROUNDED, idx == 3, lambda e: page.go("/settings")),
-            ],
-            alignment=ft.MainAxisAlignment.SPACE_EVENLY,
-            vertical_alignment=ft.CrossAxisAlignment.CENTER,
-        ),
-        bgcolor=Colors.CARD_BACKGROUND,
-        padding=ft.padding.only(left=Design.SPACE_SM, right=Design.SPACE_SM, top=Design.SPACE_XS, bottom=Design.SPACE_XS),
-        border=ft.border.only(top=ft.border.BorderSide(1, Colors.BORDER)),
-        shadow=ft.BoxShadow(
-            spread_radius=0,
-            blur_radius=20,
-            color=ft.with_opacity(0.1, Colors.DARK_NAVY),
-            offset=ft.Offset(0, -4),
-        ),
-    )
-
-
 def _friendly_date(d: date) -> str:
-    today = date.today()
+    today = get_today()  # día de turno: "Hoy" incluye la madrugada de un turno nocturno
     if d == today:
         return "Hoy"
     if d == today - timedelta(days=1):
@@ -116,76 +52,183 @@ def _build_header(on_filter_change, current_filter: str):
     )
 
 
-def _build_list_view(filter_key: str) -> ft.Control:
-    # Cargar datos según filtro
-    if filter_key == "today":
-        rows = get_recent(100)  # mostramos recientes; el grouping visual aclarará días
-    elif filter_key == "7d":
-        rows = get_recent(300)
-    else:
-        rows = get_recent(1000)
+# Filas por página y distancia al final (px) a la que se pide la siguiente
+PAGE_SIZE = 50
+LOAD_MORE_THRESHOLD_PX = 400
+
+# Días que abarca cada filtro (incluye hoy)
+FILTER_DAYS = {"today": 1, "7d": 7, "30d": 30}
+
+
+# Encabezados y filas llevan en .data lo necesario para parchear la lista con
+# los eventos de intake_events sin volver a consultar
+
+
+def _day_header(d: date, day_total: int) -> ft.Control:
+    # Total del día (viene en la misma consulta que las filas)
+    total_text = ft.Text(f"{day_total:,} ml", size=14, weight=ft.FontWeight.BOLD, color=Colors.PRIMARY)
+    return ft.Container(
+        content=ft.Row([
+            ft.Text(_friendly_date(d), size=14, weight=ft.FontWeight.BOLD, color=Colors.TEXT_PRIMARY),
+            ft.Container(expand=True),
+            total_text,
+        ]),
+        padding=ft.padding.only(top=8, bottom=4),
+        data={"day": d.toordinal(), "total": day_total, "total_text": total_text},
+    )
 
-    items: list[ft.Control] = []
-    last_group: str | None = None
 
-    for ts_iso, amount in rows:
+def _intake_row(dt: datetime, amount: int, ts: int) -> ft.Control:
+    return ft.Container(
+        content=ft.Row(
+            [
+                ft.Text(dt.strftime("%H:%M"), size=14, color=Colors.GREY_DARK),
+                ft.Container(expand=True),
+                ft.Text(f"{amount} ml", size=16, weight=ft.FontWeight.BOLD, color=Colors.TEXT_PRIMARY),
+            ],
+            alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+        ),
+        padding=ft.padding.symmetric(vertical=10, horizontal=12),
+        bgcolor=Colors.ACCENT,
+        border_radius=12,
+        data={"ts": ts, "amount": amount},
+    )
+
+
+def _add_to_header(header: ft.Control, amount: int) -> None:
+    header.data["total"] += amount
+    header.data["total_text"].value = f"{header.data['total']:,} ml"
+
+
+def _is_header(control: ft.Control) -> bool:
+    return isinstance(control.data, dict) and "day" in control.data
+
+
+def _build_list_view(filter_key: str) -> Tuple[ft.ListView, Callable[[intake_events.IntakeEvent], bool]]:
+    """ListView que carga el historial por páginas (keyset) al acercarse al final,
+    y la función que le aplica un evento ADDED/DELETED (False si hay que recargarla)."""
+    end = get_today()
+    start = end - timedelta(days=FILTER_DAYS.get(filter_key, FILTER_DAYS["30d"]) - 1)
+    state = {"cursor": None, "last_group": None, "done": False, "loading": False}
+
+    def load_page() -> list:
+        """Trae la siguiente página del rango y devuelve sus controles (encabezados de día incluidos)."""
+        rows, state["cursor"] = get_page(state["cursor"], PAGE_SIZE, start=start, end=end)
+        state["done"] = state["cursor"] is None
+
+        items: list[ft.Control] = []
+        for row in rows:
+            if row.day != state["last_group"]:
+                # Sección por día
+                items.append(_day_header(row.date, row.day_total))
+                state["last_group"] = row.day
+            items.append(_intake_row(row.local_dt, row.amount_ml, row.ts))
+        return items
+
+    def on_scroll(e: ft.OnScrollEvent):
+        if state["done"] or state["loading"]:
+            return
+        if e.max_scroll_extent - e.pixels > LOAD_MORE_THRESHOLD_PX:
+            return
+        state["loading"] = True
         try:
-            dt = datetime.fromisoformat(ts_iso)
-        except Exception:
-            continue
-        d_key = dt.date().isoformat()
-        if d_key != last_group:
-            # Sección por día
-            items.append(
-                ft.Container(
-                    content=ft.Row([
-                        ft.Text(_friendly_date(dt.date()), size=14, weight=ft.FontWeight.BOLD, color=Colors.TEXT_PRIMARY),
-                        ft.Container(expand=True),
-                        # Total del día (opcional futuro)
-                    ]),
-                    padding=ft.padding.only(top=8, bottom=4),
-                )
-            )
-            last_group = d_key
-        items.append(
-            ft.Container(
-                content=ft.Row(
-                    [
-                        ft.Text(dt.strftime("%H:%M"), size=14, color=Colors.GREY_DARK),
-                        ft.Container(expand=True),
-                        ft.Text(f"{amount} ml", size=16, weight=ft.FontWeight.BOLD, color=Colors.TEXT_PRIMARY),
-                    ],
-                    alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
-                ),
-                padding=ft.padding.symmetric(vertical=10, horizontal=12),
-                bgcolor=Colors.ACCENT,
-                border_radius=12,
-            )
-        )
+            list_view.controls.extend(load_page())
+            list_view.update()
+        finally:
+            state["loading"] = False
+
+    list_view = ft.ListView(
+        controls=load_page(),
+        expand=True,
+        spacing=10,
+        padding=ft.padding.all(0),
+        on_scroll=on_scroll,
+        on_scroll_interval=100,
+    )
+
+    def show_empty():
+        list_view.controls = [ft.Text("Sin registros aún", size=14, color=Colors.TEXT_SECONDARY)]
 
-    if not items:
-        items.append(ft.Text("Sin registros aún", size=14, color=Colors.TEXT_SECONDARY))
+    if not list_view.controls:
+        show_empty()
 
-    return ft.ListView(controls=items, expand=True, spacing=10, padding=ft.padding.all(0))
+    def apply(event: intake_events.IntakeEvent) -> bool:
+        # La lista va de la ingesta más reciente a la más antigua: agregar la
+        # última o deshacerla solo toca las primeras filas
+        if event.day < start.toordinal():
+            return True  # fuera del rango del filtro
+        controls = list_view.controls
+        header = controls[0] if controls and _is_header(controls[0]) else None
+        newest = controls[1] if header is not None and len(controls) > 1 else None
+        if event.kind == intake_events.ADDED:
+            if event.day > end.toordinal():
+                return False  # otro día de turno: recargar con el rango nuevo
+            row = _intake_row(datetime.fromtimestamp(event.ts), event.amount_ml, event.ts)
+            if header is not None and header.data["day"] == event.day:
+                if newest is not None and event.ts < newest.data["ts"]:
+                    return False  # ingesta con fecha anterior: va en medio
+                controls.insert(1, row)
+                _add_to_header(header, event.amount_ml)
+            elif header is None or event.day > header.data["day"]:
+                if header is None:
+                    controls.clear()  # "Sin registros aún"
+                controls[0:0] = [_day_header(date.fromordinal(event.day), event.amount_ml), row]
+            else:
+                return False
+            return True
+        if event.kind == intake_events.DELETED:
+            if (header is None or header.data["day"] != event.day or newest is None
+                    or (newest.data["ts"], newest.data["amount"]) != (event.ts, event.amount_ml)):
+                return False
+            del controls[1]
+            _add_to_header(header, -event.amount_ml)
+            if len(controls) == 1 or _is_header(controls[1]):
+                del controls[0]  # día sin filas
+            if not controls:
+                if not state["done"]:
+                    return False  # quedan páginas por traer
+                show_empty()
+            return True
+        return False
+
+    return list_view, apply
 
 
 def create_history_page(page: ft.Page) -> ft.View:
-    current_filter = {"value": "today"}
+    current_filter = {"value": "today", "apply": None}
+
+    # Sin scroll propio: el ListView es quien desplaza y dispara la carga por páginas
+    content_column = ft.Column(spacing=12, expand=True)
 
-    content_column = ft.Column(spacing=12, expand=True, scroll=ft.ScrollMode.AUTO)
+    def reload():
+        list_view, current_filter["apply"] = _build_list_view(current_filter["value"])
+        content_column.controls = [list_view]
 
+    @event_handler
     def refresh(filter_key: str, undo: bool = False):
         if undo:
+            # La fila se quita al recibir el evento DELETED (on_intake_event)
             deleted = delete_last_intake()
             if deleted:
                 page.snack_bar = ft.SnackBar(ft.Text("Última ingesta eliminada"), bgcolor=Colors.WARNING)
                 page.snack_bar.open = True
-        current_filter["value"] = filter_key
-        content_column.controls = [_build_list_view(filter_key)]
-        page.update()
+        else:
+            current_filter["value"] = filter_key
+            reload()
+        request_update(page)
+
+    def on_intake_event(event: intake_events.IntakeEvent):
+        if event.user_id is not None and event.user_id != get_active_user():
+            return
+        if event.kind == intake_events.GOAL_CHANGED:
+            return
+        if event.kind not in (intake_events.ADDED, intake_events.DELETED) or not current_filter["apply"](event):
+            reload()  # otro día, cambios en bloque o algo que no se puede parchear
+        if is_mounted(page, view):
+            request_update(page, content_column)
 
     header = _build_header(refresh, current_filter["value"])
-    refresh(current_filter["value"])  # primera carga
+    reload()  # primera carga (el router hace el page.update())
 
     body = ft.Container(
         content=content_column,
@@ -194,6 +237,7 @@ def create_history_page(page: ft.Page) -> ft.View:
         expand=True,
     )
 
+    nav = bottom_nav(page)
     content = ft.Column([
         ft.SafeArea(
             content=ft.Column([
@@ -205,15 +249,17 @@ def create_history_page(page: ft.Page) -> ft.View:
             expand=True,
         ),
         ft.SafeArea(
-            content=_bottom_nav(page),
+            content=nav,
             top=False,
             bottom=True,
         ),
     ], spacing=0, expand=True)
 
-    return ft.View(
+    view = ft.View(
         "/history",
         [content],
         padding=ft.padding.all(0),
         bgcolor=Colors.BACKGROUND,
+        data={"dispose": intake_events.subscribe(on_intake_event), "nav": nav},
     )
+    return view
@@ -1,88 +1,31 @@
 import flet as ft
 from config import Colors, Design
-from services.intake_service import add_intake, get_today_total
+from services import intake_events
+from services.intake_service import add_intake, get_today_total, get_active_user
 from services.profile_service import load_profile
+from ui.nav import bottom_nav
+from ui.router import is_mounted
+from ui.updates import event_handler, request_update
 
 
 # Compat: algunas versiones de Flet no exponen with_opacity; usamos nuestro helper
 ft.with_opacity = Colors.with_opacity
 
 
-def _current_tab_index(route: str) -> int:
-    if route in ("/", ""):  # inicio
-        return 0
-    if route.startswith("/history"):
-        return 1
-    if route.startswith("/profile"):
-        return 2
-    if route.startswith("/settings"):
-        return 3
-    return 0
-
-
-def _nav_item(label: str, icon, active: bool, on_click):
-    return ft.Container(
-        content=ft.Column(
-            [
-                ft.Container(
-                    content=ft.Icon(
-                        icon, 
-                        size=Design.ICON_SIZE_LG, 
-                        color=Colors.TEXT_LIGHT if active else Colors.TEXT_SECONDARY
-                    ),
-                    width=40,
-                    height=40,
-                    bgcolor=Colors.PRIMARY if active else Colors.SURFACE,
-                    border_radius=Design.BORDER_RADIUS_SM,
-                    alignment=ft.alignment.center,
-                ),
-                ft.Text(
-                    label, 
-                    size=Design.FONT_SIZE_CAPTION, 
-                    color=Colors.TEXT_PRIMARY if active else Colors.TEXT_SECONDARY,
-                    weight=Colors.get_font_weight("MEDIUM") if active else ft.FontWeight.NORMAL,
-                ),
-            ],
-            spacing=Design.SPACE_XXXS,
-            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-        ),
-        padding=ft.padding.symmetric(vertical=Design.SPACE_XS, horizontal=Design.SPACE_XXS),
-        on_click=on_click,
-        expand=True,
-    )
-
-
-def _bottom_nav(page: ft.Page):
-    idx = _current_tab_index(page.route)
-
-    return ft.Container(
-        content=ft.Row(
-            [
-                _nav_item("Inicio", ft.Icons.HOME_ROUNDED, idx == 0, lambda e: page.go("/")),
-                _nav_item("Historial", ft.Icons.ANALYTICS_ROUNDED, idx == 1, lambda e: page.go("/history")),
-                _nav_item("Perfil", ft.Icons.PERSON_ROUNDED, idx == 2, lambda e: page.go("/profile")),
-                _nav_item("Ajustes", ft.Icons.SETTINGS_ROUNDED, idx == 3, lambda e: page.go("/settings")),
-            ],
-            alignment=ft.MainAxisAlignment.SPACE_EVENLY,
-            vertical_alignment=ft.CrossAxisAlignment.CENTER,
-        ),
-        bgcolor=Colors.CARD_BACKGROUND,
-        padding=ft.padding.only(left=Design.SPACE_SM, right=Design.SPACE_SM, top=Design.SPACE_XS, bottom=Design.SPACE_XS),
-        border=ft.border.only(top=ft.border.BorderSide(1, Colors.BORDER)),
-        shadow=ft.BoxShadow(
-            spread_radius=0,
-            blur_radius=20,
-            color=ft.with_opacity(0.1, Colors.DARK_NAVY),
-            offset=ft.Offset(0, -4),
-        ),
-    )
-
-
 # Lista global para almacenar ingestas personalizadas
 custom_intakes = []
 
-def _add_intake_and_update(amount_ml: int, page: ft.Page, goal_ml: int, total_text: ft.Text, progress_bar: ft.ProgressBar, progress_text: ft.Text):
-    """Función auxiliar para agregar ingesta y actualizar UI"""
+def _render_total(total: int, goal_ml: int, total_text: ft.Text, progress_bar: ft.ProgressBar, progress_text: ft.Text):
+    """Vuelca el total de hoy en los controles de progreso (sin page.update())."""
+    total_text.value = f"{total:,} ml"
+    ratio = min(total / max(goal_ml, 1), 1.0)
+    progress_bar.value = ratio
+    progress_bar.color = Colors.SUCCESS if ratio >= 1.0 else Colors.PRIMARY
+    progress_text.value = f"{total:,} / {goal_ml:,} ml"
+
+def _add_intake_and_update(amount_ml: int, page: ft.Page):
+    """Función auxiliar para agregar ingesta y actualizar UI. El total y el
+    progreso los actualiza la página al recibir el evento (intake_events)."""
     add_intake(amount_ml)
     # Feedback visual mejorado
     page.snack_bar = ft.SnackBar(
@@ -94,19 +37,12 @@ def _add_intake_and_update(amount_ml: int, page: ft.Page, goal_ml: int, total_te
         shape=ft.RoundedRectangleBorder(radius=Design.BORDER_RADIUS_SM),
     )
     page.snack_bar.open = True
-    
-    # Actualizar total y progreso
-    total = get_today_total()
-    total_text.value = f"{total:,} ml"
-    ratio = min(total / max(goal_ml, 1), 1.0)
-    progress_bar.value = ratio
-    progress_bar.color = Colors.SUCCESS if ratio >= 1.0 else Colors.PRIMARY
-    progress_text.value = f"{total:,} / {goal_ml:,} ml"
-    page.update()
+    request_update(page)
 
-def _drink_icon_button(icon, label: str, amount_ml: int, page: ft.Page, goal_ml: int, total_text: ft.Text, progress_bar: ft.ProgressBar, progress_text: ft.Text, color=None):
+def _drink_icon_button(icon, label: str, amount_ml: int, page: ft.Page, color=None):
+    @event_handler
     def on_click(e):
-        _add_intake_and_update(amount_ml, page, goal_ml, total_text, progress_bar, progress_text)
+        _add_intake_and_update(amount_ml, page)
     
     btn_color = color or Colors.PRIMARY
     
@@ -155,7 +91,7 @@ def _drink_icon_button(icon, label: str, amount_ml: int, page: ft.Page, goal_ml:
     )
 
 
-def _show_custom_intake_form(page: ft.Page, goal_ml: int, total_text: ft.Text, progress_bar: ft.ProgressBar, progress_text: ft.Text, custom_drinks_row: ft.Row):
+def _show_custom_intake_form(page: ft.Page, custom_drinks_row: ft.Row):
     """Muestra formulario simple para crear ingesta personalizada"""
     
     # Variables para el formulario
@@ -181,13 +117,14 @@ def _show_custom_intake_form(page: ft.Page, goal_ml: int, total_text: ft.Text, p
     selected_icon_index = [0]  # Usar lista para permitir modificación
     
     def create_icon_button(icon, index):
+        @event_handler
         def on_select(e):
             selected_icon_index[0] = index  # Modificar el valor en la lista
             # Actualizar visual de selección
             for i, btn in enumerate(icon_row.controls):
                 btn.bgcolor = Colors.PRIMARY if i == index else Colors.SURFACE
                 btn.border = ft.border.all(2, Colors.PRIMARY) if i == index else ft.border.all(1, Colors.BORDER)
-            page.update()
+            request_update(page)
         
         return ft.Container(
             content=ft.Icon(icon, size=24, color=Colors.TEXT_PRIMARY),
@@ -205,6 +142,7 @@ def _show_custom_intake_form(page: ft.Page, goal_ml: int, total_text: ft.Text, p
         create_icon_button(icon, i) for i, icon in enumerate(icon_options)
     ], spacing=8, wrap=True)
     
+    @event_handler
     def add_custom_drink(e):
         try:
             amount = int(amount_input.value or 0)
@@ -212,7 +150,7 @@ def _show_custom_intake_form(page: ft.Page, goal_ml: int, total_text: ft.Text, p
                 return
                 
             # Agregar la ingesta
-            _add_intake_and_update(amount, page, goal_ml, total_text, progress_bar, progress_text)
+            _add_intake_and_update(amount, page)
             
             # Crear botón personalizado
             selected_icon = icon_options[selected_icon_index[0]]  # Usar el valor de la lista
@@ -222,10 +160,6 @@ def _show_custom_intake_form(page: ft.Page, goal_ml: int, total_text: ft.Text, p
                 f"{amount}ml",
                 amount,
                 page,
-                goal_ml,
-                total_text,
-                progress_bar,
-                progress_text,
                 color=Colors.PRIMARY_LIGHT
             )
             
@@ -240,7 +174,7 @@ def _show_custom_intake_form(page: ft.Page, goal_ml: int, total_text: ft.Text, p
             form_container.visible = False
             add_button_container.visible = True
             
-            page.update()
+            request_update(page)
             
         except ValueError:
             # Error de conversión - mostrar mensaje
@@ -249,17 +183,19 @@ def _show_custom_intake_form(page: ft.Page, goal_ml: int, total_text: ft.Text, p
                 bgcolor=Colors.ERROR,
             )
             page.snack_bar.open = True
-            page.update()
+            request_update(page)
     
+    @event_handler
     def cancel_form(e):
         form_container.visible = False
         add_button_container.visible = True
-        page.update()
+        request_update(page)
     
+    @event_handler
     def show_form(e):
         form_container.visible = True
         add_button_container.visible = False
-        page.update()
+        request_update(page)
     
     # Contenedor del formulario (inicialmente oculto)
     form_container = ft.Container(
@@ -415,6 +351,13 @@ def create_home_page(page: ft.Page):
         weight=Colors.get_font_weight("MEDIUM"),
     )
 
+    goal_text = ft.Text(
+        f"Meta {goal_ml:,} ml", 
+        size=Design.FONT_SIZE_SMALL, 
+        color=Colors.TEXT_TERTIARY,
+        weight=Colors.get_font_weight("MEDIUM"),
+    )
+
     # Encabezado moderno con gradiente
     title_text = f"Hola, {user_name}" if user_name else "awa"
     header = ft.Container(
@@ -477,12 +420,7 @@ def create_home_page(page: ft.Page):
                 ft.Container(height=Design.SPACE_XS),
                 ft.Row([
                     progress_text,
-                    ft.Text(
-                        f"Meta {goal_ml:,} ml", 
-                        size=Design.FONT_SIZE_SMALL, 
-                        color=Colors.TEXT_TERTIARY,
-                        weight=Colors.get_font_weight("MEDIUM"),
-                    ),
+                    goal_text,
                 ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
             ], spacing=0),
             
@@ -511,7 +449,7 @@ def create_home_page(page: ft.Page):
     custom_drinks_row = ft.Row([], alignment=ft.MainAxisAlignment.START, spacing=8, wrap=True)
     
     # Crear formulario de ingesta personalizada
-    form_container, add_button_container = _show_custom_intake_form(page, goal_ml, total_text, progress_bar_functional, progress_text, custom_drinks_row)
+    form_container, add_button_container = _show_custom_intake_form(page, custom_drinks_row)
     
     # Acciones rápidas con iconos modernos y mejorados
     quick_actions = ft.Column([
@@ -524,9 +462,9 @@ def create_home_page(page: ft.Page):
         ft.Container(height=Design.SPACE_SM),
         # Bebidas predefinidas con mejores iconos - Layout responsive
         ft.Row([
-            _drink_icon_button(ft.Icons.WINE_BAR, "Vaso", 250, page, goal_ml, total_text, progress_bar_functional, progress_text),
-            _drink_icon_button(ft.Icons.LOCAL_DRINK, "Botella", 500, page, goal_ml, total_text, progress_bar_functional, progress_text),
-            _drink_icon_button(ft.Icons.COFFEE, "Termo", 750, page, goal_ml, total_text, progress_bar_functional, progress_text),
+            _drink_icon_button(ft.Icons.WINE_BAR, "Vaso", 250, page),
+            _drink_icon_button(ft.Icons.LOCAL_DRINK, "Botella", 500, page),
+            _drink_icon_button(ft.Icons.COFFEE, "Termo", 750, page),
             add_button_container,  # Usar el contenedor del botón de agregar
         ], alignment=ft.MainAxisAlignment.SPACE_EVENLY, spacing=8),
         ft.Container(height=Design.SPACE_SM),
@@ -599,6 +537,7 @@ def create_home_page(page: ft.Page):
     )
 
     # Compose with SafeArea: top for header/body, bottom for bottom nav
+    nav = bottom_nav(page)
     content = ft.Column([
         ft.SafeArea(
             content=ft.Column([
@@ -610,15 +549,35 @@ def create_home_page(page: ft.Page):
             expand=True,
         ),
         ft.SafeArea(
-            content=_bottom_nav(page),
+            content=nav,
             top=False,
             bottom=True,
         ),
     ], spacing=0, expand=True)
 
-    return ft.View(
+    # Total, progreso y meta se parchean con cada evento de ingestas del
+    # usuario, también con la vista guardada fuera de pantalla (ui.router)
+    state = {"total": total, "goal": goal_ml}
+
+    def on_intake_event(event: intake_events.IntakeEvent):
+        if event.user_id is not None and event.user_id != get_active_user():
+            return
+        if event.kind == intake_events.GOAL_CHANGED:
+            state["goal"] = event.goal_ml
+            goal_text.value = f"Meta {event.goal_ml:,} ml"
+        elif event.total_ml is not None:
+            state["total"] = event.total_ml
+        else:
+            state["total"] = get_today_total()  # otro día o cambios en bloque
+        _render_total(state["total"], state["goal"], total_text, progress_bar_functional, progress_text)
+        if is_mounted(page, view):
+            request_update(page, total_text, progress_bar_functional, progress_text, goal_text)
+
+    view = ft.View(
         "/",
         [content],
         padding=ft.padding.all(0),
         bgcolor=Colors.BACKGROUND,
+        data={"dispose": intake_events.subscribe(on_intake_event), "nav": nav},
     )
+    return view
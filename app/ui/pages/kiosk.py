@@ -0,0 +1,165 @@
+import flet as ft
+from config import Colors, Design
+from services.kiosk_service import switch_worker, log_intake
+from services.search_service import search as search_users
+from services.user_service import get_user
+from ui.updates import event_handler, request_update
+
+ft.with_opacity = Colors.with_opacity
+
+# Cantidades de los botones rápidos del kiosco
+KIOSK_AMOUNTS = (250, 500, 750)
+# Resultados visibles en el buscador y accesos directos a personas recientes
+MAX_RESULTS = 50
+MAX_RECENT = 6
+
+
+def create_kiosk_page(page: ft.Page) -> ft.View:
+    recent = []            # ids de las últimas personas activas, la más reciente primero
+    state = {"worker": None}
+
+    search = ft.TextField(
+        label="Buscar por nombre",
+        prefix_icon=ft.Icons.SEARCH_ROUNDED,
+        autofocus=True,
+        border_radius=Design.BORDER_RADIUS_MD,
+    )
+    results = ft.ListView(expand=True, spacing=Design.SPACE_XXXS)
+    recent_row = ft.Row(wrap=True, spacing=Design.SPACE_XXS)
+
+    name_text = ft.Text("", size=Design.FONT_SIZE_TITLE, weight=ft.FontWeight.BOLD, color=Colors.TEXT_PRIMARY)
+    area_text = ft.Text("", size=Design.FONT_SIZE_SMALL, color=Colors.TEXT_SECONDARY)
+    total_text = ft.Text("", size=Design.FONT_SIZE_HERO, weight=ft.FontWeight.BOLD, color=Colors.TEXT_PRIMARY)
+    progress = ft.ProgressBar(value=0, height=10, color=Colors.PRIMARY, bgcolor=Colors.GREY_LIGHT)
+    goal_text = ft.Text("", size=Design.FONT_SIZE_SMALL, color=Colors.TEXT_SECONDARY)
+
+    def show_worker(worker):
+        state["worker"] = worker
+        user = worker.user
+        name_text.value = user.name
+        area_text.value = " · ".join(p for p in (user.area, user.sub_area) if p)
+        total_text.value = f"{worker.today_total:,} ml"
+        ratio = min(worker.today_total / max(worker.goal_ml, 1), 1.0)
+        progress.value = ratio
+        progress.color = Colors.SUCCESS if ratio >= 1.0 else Colors.PRIMARY
+        goal_text.value = f"{worker.today_total:,} / {worker.goal_ml:,} ml"
+        picker.visible = False
+        panel.visible = True
+
+    @event_handler
+    def select(user_id: int):
+        show_worker(switch_worker(user_id))
+        if user_id in recent:
+            recent.remove(user_id)
+        recent.insert(0, user_id)
+        del recent[MAX_RECENT:]
+        request_update(page)
+
+    @event_handler
+    def refresh_results(e=None):
+        matches = search_users(search.value or "", limit=MAX_RESULTS)
+        results.controls = [
+            ft.ListTile(
+                title=ft.Text(u.name),
+                subtitle=ft.Text(" · ".join(p for p in (u.area, u.sub_area) if p)),
+                on_click=lambda e, uid=u.id: select(uid),
+            )
+            for u in matches
+        ]
+        if e is not None:
+            request_update(page)
+
+    def refresh_recent():
+        # get_user sale de la caché LRU: son las personas recién activas
+        users = [u for u in map(get_user, recent) if u is not None]
+        recent_row.controls = [
+            ft.Chip(label=ft.Text(u.name.split(" ")[0]), on_click=lambda e, uid=u.id: select(uid))
+            for u in users
+        ]
+
+    @event_handler
+    def back_to_picker(e=None):
+        state["worker"] = None
+        search.value = ""
+        refresh_results()
+        refresh_recent()
+        panel.visible = False
+        picker.visible = True
+        request_update(page)
+
+    @event_handler
+    def on_amount(amount_ml: int):
+        worker = state["worker"]
+        if worker is None:
+            return
+        show_worker(log_intake(worker, amount_ml))
+        request_update(page)
+
+    search.on_change = refresh_results
+
+    amount_buttons = ft.Row(
+        [
+            ft.ElevatedButton(
+                f"+{amount} ml",
+                icon=ft.Icons.LOCAL_DRINK_ROUNDED,
+                bgcolor=Colors.PRIMARY,
+                color=Colors.TEXT_LIGHT,
+                height=64,
+                expand=True,
+                on_click=lambda e, amount=amount: on_amount(amount),
+            )
+            for amount in KIOSK_AMOUNTS
+        ],
+        spacing=Design.SPACE_XS,
+    )
+
+    picker = ft.Column(
+        [
+            ft.Row(
+                [
+                    ft.Text("¿Quién registra agua?", size=Design.FONT_SIZE_TITLE, weight=ft.FontWeight.BOLD, color=Colors.TEXT_PRIMARY),
+                    ft.IconButton(ft.Icons.CLOSE_ROUNDED, tooltip="Salir del kiosco", on_click=lambda e: page.go("/")),
+                ],
+                alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+            ),
+            recent_row,
+            search,
+            results,
+        ],
+        spacing=Design.SPACE_SM,
+        expand=True,
+    )
+    panel = ft.Column(
+        [
+            name_text,
+            area_text,
+            ft.Container(height=Design.SPACE_MD),
+            total_text,
+            progress,
+            goal_text,
+            ft.Container(height=Design.SPACE_MD),
+            amount_buttons,
+            ft.Container(expand=True),
+            ft.OutlinedButton("Cambiar de persona", icon=ft.Icons.SWITCH_ACCOUNT_ROUNDED, on_click=back_to_picker),
+        ],
+        spacing=Design.SPACE_XS,
+        expand=True,
+        visible=False,
+    )
+
+    content = ft.SafeArea(
+        content=ft.Container(
+            content=ft.Column([picker, panel], expand=True),
+            padding=ft.padding.all(Design.SPACE_LG),
+            bgcolor=Colors.BACKGROUND,
+            expand=True,
+        ),
+        expand=True,
+    )
+
+    return ft.View(
+        "/kiosk",
+        [content],
+        padding=ft.padding.all(0),
+        bgcolor=Colors.BACKGROUND,
+    )
@@ -1,8 +1,9 @@
 import flet as ft
 from config import Colors, Design
+from services import settings_service
 
-# Estado de finalización del onboarding
-onboarding_completed = False
+# Estado de finalización del onboarding (persistente, en settings)
+_ONBOARDING_KEY = "onboarding_completed"
 
 
 def _get_step_from_route(route: str) -> int:
@@ -19,8 +20,6 @@ def _get_step_from_route(route: str) -> int:
 
 
 def create_onboarding_page(page: ft.Page) -> ft.View:
-    global onboarding_completed
-
     # Slides (3 pasos)
     slides = [
         {
@@ -65,8 +64,7 @@ def create_onboarding_page(page: ft.Page) -> ft.View:
             go_to(i - 1)
 
     def on_finish(e):
-        global onboarding_completed
-        onboarding_completed = True
+        settings_service.set_value(_ONBOARDING_KEY, True)
         # Ir a setup para capturar datos de perfil si aún no existen
         e.page.go("/setup")
 
@@ -176,4 +174,4 @@ def create_onboarding_page(page: ft.Page) -> ft.View:
 
 
 def is_onboarding_completed() -> bool:
-    return onboarding_completed
\ No newline at end of file
+    return bool(settings_service.get_value(_ONBOARDING_KEY, False))
\ No newline at end of file
@@ -2,80 +2,12 @@ import flet as ft
 from datetime import datetime
 from config import Colors, Design
 from services.profile_service import save_profile, load_profile
+from ui.nav import bottom_nav
+from ui.updates import event_handler, request_update
 
 ft.with_opacity = Colors.with_opacity
 
 
-# Navegación inferior (se usa en la vista de perfil, no en setup)
-def _current_tab_index(route: str) -> int:
-    if route in ("/", ""):
-        return 0
-    if route.startswith("/history"):
-        return 1
-    if route.startswith("/profile"):
-        return 2
-    if route.startswith("/settings"):
-        return 3
-    return 0
-
-
-def _nav_item(label: str, icon, active: bool, on_click):
-    return ft.Container(
-        content=ft.Column(
-            [
-                ft.Container(
-                    content=ft.Icon(
-                        icon, 
-                        size=Design.ICON_SIZE_LG, 
-                        color=Colors.TEXT_LIGHT if active else Colors.TEXT_SECONDARY
-                    ),
-                    width=40,
-                    height=40,
-                    bgcolor=Colors.PRIMARY if active else Colors.SURFACE,
-                    border_radius=Design.BORDER_RADIUS_SM,
-                    alignment=ft.alignment.center,
-                ),
-                ft.Text(
-                    label, 
-                    size=Design.FONT_SIZE_CAPTION, 
-                    color=Colors.TEXT_PRIMARY if active else Colors.TEXT_SECONDARY,
-                    weight=Colors.get_font_weight("MEDIUM") if active else ft.FontWeight.NORMAL,
-                ),
-            ],
-            spacing=Design.SPACE_XXXS,
-            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-        ),
-        padding=ft.padding.symmetric(vertical=Design.SPACE_XS, horizontal=Design.SPACE_XXS),
-        on_click=on_click,
-        expand=True,
-    )
-
-
-def _bottom_nav(page: ft.Page):
-    idx = _current_tab_index(page.route)
-    return ft.Container(
-        content=ft.Row(
-            [
-                _nav_item("Inicio", ft.Icons.HOME_ROUNDED, idx == 0, lambda e: page.go("/")),
-                _nav_item("Historial", ft.Icons.ANALYTICS_ROUNDED, idx == 1, lambda e: page.go("/history")),
-                _nav_item("Perfil", ft.Icons.PERSON_ROUNDED, idx == 2, lambda e: page.go("/profile")),
-                _nav_item("Ajustes", ft.Icons.SETTINGS_ROUNDED, idx == 3, lambda e: page.go("/settings")),
-            ],
-            alignment=ft.MainAxisAlignment.SPACE_EVENLY,
-            vertical_alignment=ft.CrossAxisAlignment.CENTER,
-        ),
-        bgcolor=Colors.CARD_BACKGROUND,
-        padding=ft.padding.only(left=Design.SPACE_SM, right=Design.SPACE_SM, top=Design.SPACE_XS, bottom=Design.SPACE_XS),
-        border=ft.border.only(top=ft.border.BorderSide(1, Colors.BORDER)),
-        shadow=ft.BoxShadow(
-            spread_radius=0,
-            blur_radius=20,
-            color=ft.with_opacity(0.1, Colors.DARK_NAVY),
-            offset=ft.Offset(0, -4),
-        ),
-    )
-
-
 def _build_profile_page(page: ft.Page, *, view_route: str, header_title: str, header_subtitle: str, button_text: str, after_save_route: str) -> ft.View:
     existing = load_profile() or {}
 
@@ -265,12 +197,13 @@ def _build_profile_page(page: ft.Page, *, view_route: str, header_title: str, he
     def refresh_avatar_row():
         avatar_row.controls = [make_avatar_chip(i) for i in range(len(avatar_files))]
 
+    @event_handler
     def select_avatar(i: int):
         sel["index"] = i
         # Actualizar el preview completo
         avatar_preview.content = avatar_preview_control().content
         refresh_avatar_row()
-        page.update()
+        request_update(page)
 
     refresh_avatar_row()
 
@@ -287,7 +220,9 @@ def _build_profile_page(page: ft.Page, *, view_route: str, header_title: str, he
         except Exception:
             return 2000
 
-    def update_preview(e=None):
+    @event_handler
+    def update_preview(e=None, render: bool = True):
+        # Corre en cada tecla de siete campos: el envío lo junta ui.updates
         try:
             w = float(weight.value or 0)
             h = float(height.value or 0)
@@ -300,13 +235,15 @@ def _build_profile_page(page: ft.Page, *, view_route: str, header_title: str, he
             else:
                 goal_value.value = f"{int(daily_goal.value)} ml"
             bmi_value.value = f"{bmi}" if bmi else "—"
-            page.update()
+            if render:
+                request_update(page, bmi_value, goal_value)
         except Exception:
             pass
 
     for c in (name, age, weight, height, sex, activity, daily_goal):
         c.on_change = update_preview
 
+    @event_handler
     def save_and_continue(e):
         # Validaciones básicas
         try:
@@ -316,13 +253,13 @@ def _build_profile_page(page: ft.Page, *, view_route: str, header_title: str, he
         except Exception:
             page.snack_bar = ft.SnackBar(ft.Text("Revisa los datos numéricos"), bgcolor=Colors.ERROR)
             page.snack_bar.open = True
-            page.update()
+            request_update(page)
             return
 
         if w <= 0 or h <= 0:
             page.snack_bar = ft.SnackBar(ft.Text("Peso y altura deben ser mayores a 0"), bgcolor=Colors.ERROR)
             page.snack_bar.open = True
-            page.update()
+            request_update(page)
             return
 
         goal = int(daily_goal.value) if (daily_goal.value or "").strip().isdigit() else compute_defaults()
@@ -342,12 +279,12 @@ def _build_profile_page(page: ft.Page, *, view_route: str, header_title: str, he
             save_profile(data)
             page.snack_bar = ft.SnackBar(ft.Text("Perfil guardado"), bgcolor=Colors.SUCCESS)
             page.snack_bar.open = True
-            page.update()
+            request_update(page)
             page.go(after_save_route)
         except Exception:
             page.snack_bar = ft.SnackBar(ft.Text("No se pudo guardar el perfil"), bgcolor=Colors.ERROR)
             page.snack_bar.open = True
-            page.update()
+            request_update(page)
 
     # Header moderno con gradiente
     header = ft.Container(
@@ -465,7 +402,7 @@ def _build_profile_page(page: ft.Page, *, view_route: str, header_title: str, he
                 ft.Container(
                     content=ft.TextButton(
                         "Usar sugerida",
-                        on_click=lambda e: (daily_goal.__setattr__("value", str(compute_defaults())), update_preview()),
+                        on_click=event_handler(lambda e: (daily_goal.__setattr__("value", str(compute_defaults())), update_preview(), request_update(page, daily_goal))),
                         style=ft.ButtonStyle(
                             color=Colors.PRIMARY,
                             bgcolor=ft.with_opacity(0.1, Colors.PRIMARY),
@@ -603,10 +540,10 @@ def _build_profile_page(page: ft.Page, *, view_route: str, header_title: str, he
     )
 
     controls = [header, body]
-    has_bottom_nav = view_route == "/profile"
+    nav = bottom_nav(page) if view_route == "/profile" else None
 
     # Respect safe areas: top for content, bottom for nav if present
-    if has_bottom_nav:
+    if nav is not None:
         content = ft.Column([
             ft.SafeArea(
                 content=ft.Column([header, body], spacing=0),
@@ -615,7 +552,7 @@ def _build_profile_page(page: ft.Page, *, view_route: str, header_title: str, he
                 expand=True,
             ),
             ft.SafeArea(
-                content=_bottom_nav(page),
+                content=nav,
                 top=False,
                 bottom=True,
             ),
@@ -628,8 +565,8 @@ def _build_profile_page(page: ft.Page, *, view_route: str, header_title: str, he
             expand=True,
         )
 
-    update_preview()
-    return ft.View(view_route, [content], padding=ft.padding.all(0), bgcolor=Colors.BACKGROUND)
+    update_preview(render=False)  # aún no está en la página
+    return ft.View(view_route, [content], padding=ft.padding.all(0), bgcolor=Colors.BACKGROUND, data={"nav": nav})
 
 
 def create_profile_setup_page(page: ft.Page) -> ft.View:
@@ -2,81 +2,17 @@ import flet as ft
 from config import Colors, Design
 from services.profile_service import reset_app_data
 from services.theme_service import load_theme_preference, save_theme_preference
+from ui.router import clear_views
+from ui.nav import bottom_nav
+from ui.updates import event_handler, request_update
 
 ft.with_opacity = Colors.with_opacity
 
 
-def _current_tab_index(route: str) -> int:
-    if route in ("/", ""):
-        return 0
-    if route.startswith("/history"):
-        return 1
-    if route.startswith("/profile"):
-        return 2
-    if route.startswith("/settings"):
-        return 3
-    return 0
-
-
-def _nav_item(label: str, icon, active: bool, on_click):
-    return ft.Container(
-        content=ft.Column(
-            [
-                ft.Container(
-                    content=ft.Icon(
-                        icon, 
-                        size=Design.ICON_SIZE_LG, 
-                        color=Colors.TEXT_LIGHT if active else Colors.TEXT_SECONDARY
-                    ),
-                    width=40,
-                    height=40,
-                    bgcolor=Colors.PRIMARY if active else Colors.SURFACE,
-                    border_radius=Design.BORDER_RADIUS_SM,
-                    alignment=ft.alignment.center,
-                ),
-                ft.Text(
-                    label, 
-                    size=Design.FONT_SIZE_CAPTION, 
-                    color=Colors.TEXT_PRIMARY if active else Colors.TEXT_SECONDARY,
-                    weight=Colors.get_font_weight("MEDIUM") if active else ft.FontWeight.NORMAL,
-                ),
-            ],
-            spacing=Design.SPACE_XXXS,
-            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-        ),
-        padding=ft.padding.symmetric(vertical=Design.SPACE_XS, horizontal=Design.SPACE_XXS),
-        on_click=on_click,
-        expand=True,
-    )
-
-
-def _bottom_nav(page: ft.Page):
-    idx = _current_tab_index(page.route)
-    return ft.Container(
-        content=ft.Row(
-            [
-                _nav_item("Inicio", ft.Icons.HOME_ROUNDED, idx == 0, lambda e: page.go("/")),
-                _nav_item("Historial", ft.Icons.ANALYTICS_ROUNDED, idx == 1, lambda e: page.go("/history")),
-                _nav_item("Perfil", ft.Icons.PERSON_ROUNDED, idx == 2, lambda e: page.go("/profile")),
-                _nav_item("Ajustes", ft.Icons.SETTINGS_ROUNDED, idx == 3, lambda e: page.go("/settings")),
-            ],
-            alignment=ft.MainAxisAlignment.SPACE_EVENLY,
-            vertical_alignment=ft.CrossAxisAlignment.CENTER,
-        ),
-        bgcolor=Colors.CARD_BACKGROUND,
-        padding=ft.padding.only(left=Design.SPACE_SM, right=Design.SPACE_SM, top=Design.SPACE_XS, bottom=Design.SPACE_XS),
-        border=ft.border.only(top=ft.border.BorderSide(1, Colors.BORDER)),
-        shadow=ft.BoxShadow(
-            spread_radius=0,
-            blur_radius=20,
-            color=ft.with_opacity(0.1, Colors.DARK_NAVY),
-            offset=ft.Offset(0, -4),
-        ),
-    )
-
-
 def create_settings_page(page: ft.Page) -> ft.View:
+    @event_handler
     def reset_app(e):
+        @event_handler
         def confirm_reset(e):
             close_dialog()
             success = reset_app_data()
@@ -86,7 +22,7 @@ def create_settings_page(page: ft.Page) -> ft.View:
                     bgcolor=Colors.SUCCESS
                 )
                 page.snack_bar.open = True
-                page.update()
+                request_update(page)
                 # En Android, redirigir al onboarding en lugar de cerrar
                 import time
                 import threading
@@ -97,7 +33,7 @@ def create_settings_page(page: ft.Page) -> ft.View:
             else:
                 page.snack_bar = ft.SnackBar(ft.Text("Error al eliminar datos"), bgcolor=Colors.ERROR)
                 page.snack_bar.open = True
-                page.update()
+                request_update(page)
         
         # Diálogo de confirmación moderno
         dlg = ft.AlertDialog(
@@ -165,14 +101,16 @@ def create_settings_page(page: ft.Page) -> ft.View:
             actions_alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
         )
         
+        @event_handler
         def close_dialog():
             dlg.open = False
-            page.update()
+            request_update(page)
         
         page.dialog = dlg
         dlg.open = True
-        page.update()
+        request_update(page)
 
+    @event_handler
     def toggle_dark_mode(e):
         # Alternar tema
         current_dark = load_theme_preference()
@@ -203,9 +141,10 @@ def create_settings_page(page: ft.Page) -> ft.View:
         )
         page.snack_bar.open = True
         
-        # Recargar página para aplicar colores
+        # Recargar página para aplicar colores (las vistas guardadas son del tema anterior)
+        clear_views()
         page.go(page.route)
-        page.update()
+        request_update(page)
 
     # Estado actual del tema
     is_dark = load_theme_preference()
@@ -309,12 +248,21 @@ def create_settings_page(page: ft.Page) -> ft.View:
         ),
         
         ft.Divider(height=1, color=Colors.BORDER, thickness=0.5),
-        
+
+        create_setting_item(
+            ft.Icons.GROUPS_ROUNDED,
+            "Modo kiosco",
+            "Registrar agua de varias personas en este dispositivo",
+            on_click=lambda e: page.go("/kiosk"),
+        ),
+
+        ft.Divider(height=1, color=Colors.BORDER, thickness=0.5),
+
         create_setting_item(
             ft.Icons.NOTIFICATIONS_OUTLINED,
             "Recordatorios",
             "Configurar notificaciones de hidratación",
-            on_click=lambda e: page.snack_bar.__setattr__('open', True) or page.update() if not hasattr(page, '_temp_snack') and setattr(page, '_temp_snack', True) and setattr(page, 'snack_bar', ft.SnackBar(
+            on_click=lambda e: page.snack_bar.__setattr__('open', True) or request_update(page) if not hasattr(page, '_temp_snack') and setattr(page, '_temp_snack', True) and setattr(page, 'snack_bar', ft.SnackBar(
                 content=ft.Text("Función próximamente disponible", color=Colors.TEXT_LIGHT),
                 bgcolor=Colors.INFO,
             )) else None,
@@ -382,6 +330,7 @@ def create_settings_page(page: ft.Page) -> ft.View:
         expand=True,
     )
 
+    nav = bottom_nav(page)
     content = ft.Column([
         ft.SafeArea(
             content=ft.Column([
@@ -393,7 +342,7 @@ def create_settings_page(page: ft.Page) -> ft.View:
             expand=True,
         ),
         ft.SafeArea(
-            content=_bottom_nav(page),
+            content=nav,
             top=False,
             bottom=True,
         ),
@@ -404,4 +353,5 @@ def create_settings_page(page: ft.Page) -> ft.View:
         [content],
         padding=ft.padding.all(0),
         bgcolor=Colors.BACKGROUND,
+        data={"nav": nav},
     )
@@ -0,0 +1,105 @@
+import importlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Tuple
+
+import flet as ft
+
+from config import Colors
+from services import profile_service
+
+# Páginas por nombre: (módulo, función que construye la View). El módulo se
+# importa la primera vez que se navega a la página, no al arrancar: la primera
+# ruta solo paga sus propios imports (controles, servicios, helpers).
+PAGES: Dict[str, Tuple[str, str]] = {
+    "onboarding": ("ui.pages.onboarding", "create_onboarding_page"),
+    "setup": ("ui.pages.profile_setup", "create_profile_setup_page"),
+    "home": ("ui.pages.home", "create_home_page"),
+    "history": ("ui.pages.history", "create_history_page"),
+    "profile": ("ui.pages.profile_setup", "create_profile_page"),
+    "settings": ("ui.pages.settings", "create_settings_page"),
+    "kiosk": ("ui.pages.kiosk", "create_kiosk_page"),
+}
+
+_builders: Dict[str, Callable[[ft.Page], ft.View]] = {}
+
+# Vistas ya construidas de las pestañas, por (página, tema oscuro): volver a
+# una pestaña reutiliza su View en lugar de reconstruir el árbol de controles.
+# Las páginas que muestran ingestas se mantienen al día solas (suscritas a
+# services.intake_events, también mientras no están en pantalla); cada entrada
+# guarda la versión del perfil con la que se construyó y, si cambió (meta,
+# nombre, avatar), se reconstruye. Al descartar una vista se llama a su
+# view.data["dispose"] (p. ej. para darla de baja del bus). LRU de
+# _VIEW_CACHE_SIZE entradas: las pestañas de un tema. Onboarding, setup y
+# kiosco son de paso y no se guardan.
+CACHED_PAGES = frozenset({"home", "history", "profile", "settings"})
+_VIEW_CACHE_SIZE = 4
+_views_lock = threading.RLock()
+# (página, oscuro) -> (View, profile_version)
+_views: "OrderedDict[Tuple[str, bool], Tuple[ft.View, int]]" = OrderedDict()
+_view_stats = {"hits": 0, "builds": 0}
+
+
+def build_page(name: str, page: ft.Page) -> ft.View:
+    """Construye la View de la página `name`, importando su módulo si hace falta."""
+    builder = _builders.get(name)
+    if builder is None:
+        module, func = PAGES[name]
+        builder = _builders[name] = getattr(importlib.import_module(module), func)
+    return builder(page)
+
+
+def _dispose(view: ft.View) -> None:
+    dispose = view.data.get("dispose") if isinstance(view.data, dict) else None
+    if dispose is not None:
+        dispose()
+
+
+def is_mounted(page: ft.Page, view: ft.View) -> bool:
+    """True si `view` está en pantalla (si no, basta con cambiar sus controles:
+    se envían cuando el router la vuelva a montar)."""
+    return any(v is view for v in page.views)
+
+
+def get_view(name: str, page: ft.Page) -> Tuple[ft.View, bool]:
+    """View de la página `name`, desde la caché si sigue vigente. Devuelve
+    (view, nueva): nueva es False si se reutilizó (sus controles ya están al
+    día; no hace falta page.update() si ya estaba en pantalla)."""
+    if name not in CACHED_PAGES:
+        return build_page(name, page), True
+    with _views_lock:
+        key = (name, Colors.is_dark_mode())
+        profile = profile_service.profile_version()
+        entry = _views.get(key)
+        if entry is not None and entry[1] == profile:
+            _views.move_to_end(key)
+            _view_stats["hits"] += 1
+            return entry[0], False
+        if entry is not None:
+            _dispose(entry[0])
+        view = build_page(name, page)
+        _view_stats["builds"] += 1
+        _views[key] = (view, profile)
+        _views.move_to_end(key)
+        while len(_views) > _VIEW_CACHE_SIZE:
+            _dispose(_views.popitem(last=False)[1][0])
+        return view, True
+
+
+def clear_views() -> None:
+    """Descarta las vistas guardadas (la próxima navegación las reconstruye)."""
+    with _views_lock:
+        for view, _profile in _views.values():
+            _dispose(view)
+        _views.clear()
+
+
+def view_cache_stats() -> Dict[str, int]:
+    """Navegaciones servidas desde la caché (hits) y vistas construidas."""
+    with _views_lock:
+        return dict(_view_stats, size=len(_views))
+
+
+def loaded_pages() -> List[str]:
+    """Páginas cuyo módulo ya se importó."""
+    return list(_builders)
@@ -0,0 +1,139 @@
+import functools
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, TypeVar
+
+if TYPE_CHECKING:
+    import flet as ft
+
+# Cada page.update() serializa el diff de controles y lo envía al cliente
+# Flutter. Los handlers piden el update con request_update y este módulo los
+# junta: como mucho un envío por cuadro (_FRAME_S), con los controles marcados
+# (page.update(*controles)) o la página entera si alguien no indicó controles.
+#
+# Flet corre los handlers síncronos en hilos de su executor, así que un envío
+# programado puede coincidir con un handler que sigue cambiando controles. Los
+# handlers decorados con @event_handler guardan lo que piden en su hilo y lo
+# pasan al planificador al terminar: el temporizador arranca cuando el handler
+# ya devolvió. Fuera de un handler (suscriptores del bus, temporizadores) el
+# pedido se programa en el momento. flush_updates envía ya lo pendiente
+# (cambios de ruta, donde el frame debe salir sin espera).
+_FRAME_S = 1 / 60
+_MIN_DELAY_S = 0.004
+_lock = threading.Lock()
+# id(page) -> {"page", "whole", "dirty": {id: control}, "timer", "last"}. Las
+# entradas sin nada pendiente se descartan un cuadro después de su último envío
+# (_prune): no retienen páginas de sesiones cerradas.
+_pages: Dict[int, dict] = {}
+_stats = {"requested": 0, "flushed": 0}
+# Pedidos del handler en curso en este hilo: {"depth", "pages": {id(page): [page, whole, dirty]}}
+_local = threading.local()
+
+F = TypeVar("F", bound=Callable)
+
+
+def _state(page: "ft.Page") -> dict:
+    # Con _lock tomado
+    st = _pages.get(id(page))
+    if st is None or st["page"] is not page:
+        st = _pages[id(page)] = {"page": page, "whole": False, "dirty": {}, "timer": None, "last": 0.0}
+    return st
+
+
+def _prune(now: float) -> None:
+    # Con _lock tomado
+    idle = [
+        key for key, st in _pages.items()
+        if st["timer"] is None and not st["whole"] and not st["dirty"] and now - st["last"] >= _FRAME_S
+    ]
+    for key in idle:
+        del _pages[key]
+
+
+def _schedule(page: "ft.Page", whole: bool, dirty: Dict[int, "ft.Control"]) -> None:
+    # Con _lock tomado
+    now = time.monotonic()
+    _prune(now)
+    st = _state(page)
+    st["whole"] = st["whole"] or whole
+    st["dirty"].update(dirty)
+    if st["timer"] is None:
+        delay = max(st["last"] + _FRAME_S - now, _MIN_DELAY_S)
+        timer = st["timer"] = threading.Timer(delay, _on_timer)
+        timer.args = (page, timer)
+        timer.daemon = True
+        timer.start()
+
+
+def request_update(page: "ft.Page", *controls: "ft.Control") -> None:
+    """Pide enviar los `controls` (o toda la página si no se indican) en el
+    próximo cuadro. Reemplaza a page.update() en los handlers."""
+    dirty = {id(c): c for c in controls}
+    pending = getattr(_local, "pages", None)
+    if pending is not None:
+        # Dentro de un @event_handler: se programa cuando termine
+        entry = pending.setdefault(id(page), [page, False, {}])
+        entry[1] = entry[1] or not controls
+        entry[2].update(dirty)
+        with _lock:
+            _stats["requested"] += 1
+        return
+    with _lock:
+        _stats["requested"] += 1
+        _schedule(page, not controls, dirty)
+
+
+def event_handler(func: F) -> F:
+    """Decora un handler de eventos de Flet: los request_update que haga (él o
+    lo que llame en el mismo hilo) se programan cuando devuelve."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        outer = getattr(_local, "pages", None) is None
+        if outer:
+            _local.pages = {}
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if outer:
+                pending, _local.pages = _local.pages, None
+                if pending:
+                    with _lock:
+                        for page, whole, dirty in pending.values():
+                            _schedule(page, whole, dirty)
+    return wrapper  # type: ignore[return-value]
+
+
+def _on_timer(page: "ft.Page", timer: threading.Timer) -> None:
+    with _lock:
+        st = _pages.get(id(page))
+        if st is None or st["timer"] is not timer:
+            return  # flush_updates ya lo envió
+    flush_updates(page)
+
+
+def flush_updates(page: "ft.Page") -> None:
+    """Envía ya lo pendiente de `page` con un solo page.update()."""
+    with _lock:
+        st = _state(page)
+        if st["timer"] is not None:
+            st["timer"].cancel()
+            st["timer"] = None
+        whole, dirty = st["whole"], list(st["dirty"].values())
+        st["whole"], st["dirty"] = False, {}
+        st["last"] = time.monotonic()
+        _stats["flushed"] += 1
+    try:
+        if whole or not dirty:
+            page.update()
+        else:
+            page.update(*dirty)
+    except Exception:
+        # Un control marcado que ya no está en la página: enviar la página entera
+        page.update()
+
+
+def update_stats() -> Dict[str, int]:
+    """Updates pedidos (requested), envíos hechos (flushed) y páginas con
+    estado en el planificador (pages)."""
+    with _lock:
+        return dict(_stats, pages=len(_pages))
@@ -0,0 +1,45 @@
+"""Utilidades compartidas por los benchmarks (no forman parte de la app)."""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, List
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "app"))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+
+def use_temp_data_dir() -> str:
+    """Redirige storage/data a un directorio temporal para no tocar los datos reales."""
+    from services import db, settings_service
+
+    d = tempfile.mkdtemp(prefix="awa-bench-")
+    db.close_db()
+    db._data_dir = lambda: d
+    db._legacy_dirs = lambda: [d]
+    settings_service.invalidate()
+    return d
+
+
+def per_call_us(fn: Callable[[], object], n: int = 200, setup: Callable[[], object] = None) -> float:
+    """Mediana del tiempo por llamada en microsegundos. `setup` corre fuera de la medición."""
+    samples: List[float] = []
+    for _ in range(n):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e6)
+    return statistics.median(samples)
+
+
+def print_table(title: str, rows: List[tuple], headers: tuple) -> None:
+    print(f"\n{title}")
+    widths = [max(len(str(x)) for x in col) for col in zip(headers, *rows)]
+    fmt = "  ".join(f"{{:<{w}}}" for w in widths)
+    print(fmt.format(*headers))
+    print(fmt.format(*("-" * w for w in widths)))
+    for r in rows:
+        print(fmt.format(*r))
@@ -0,0 +1,53 @@
+"""add_intakes (una transacción, executemany por bloques) vs. add_intake en bucle.
+
+Uso: python benchmarks/bench_bulk_ingest.py [filas_bulk] [filas_bucle]
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+
+from _common import print_table, use_temp_data_dir
+
+from services import db, intake_service as svc
+
+
+def _rows(n: int):
+    start = datetime.now().replace(microsecond=0) - timedelta(minutes=n)
+    for i in range(n):
+        yield (start + timedelta(minutes=i), 250 + (i % 4) * 125)
+
+
+def main() -> None:
+    bulk_n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    loop_n = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+
+    use_temp_data_dir()
+    t0 = time.perf_counter()
+    for ts, amount in _rows(loop_n):
+        svc.add_intake(amount, ts=ts)
+    svc.flush()
+    loop_s = time.perf_counter() - t0
+
+    use_temp_data_dir()
+    t0 = time.perf_counter()
+    counts = svc.add_intakes(_rows(bulk_n))
+    bulk_s = time.perf_counter() - t0
+    assert counts == {"inserted": bulk_n, "rejected": 0}, counts
+    assert svc.check_daily_totals() == []
+
+    bad = svc.add_intakes([("no-es-fecha", 250), (datetime.now(), -5), (datetime.now(), 300)])
+    assert bad == {"inserted": 1, "rejected": 2}, bad
+
+    print_table(
+        "Ingesta masiva",
+        [
+            ("add_intake en bucle", loop_n, f"{loop_s:.2f}", f"{loop_n / loop_s:,.0f}"),
+            ("add_intakes", bulk_n, f"{bulk_s:.2f}", f"{bulk_n / bulk_s:,.0f}"),
+        ],
+        ("método", "filas", "segundos", "filas/s"),
+    )
+    db.close_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Imports del arranque: páginas perezosas (ui.router) vs. todas al inicio.
+
+Uso: python benchmarks/bench_cold_start.py [arranques]
+
+Cada arranque es un proceso nuevo que importa main.py (lo que corre antes del
+primer frame) y después el módulo de la primera página; "todas al inicio"
+importa además las demás páginas, como hacía main.py antes del registro de
+rutas. Para medir la app real (primer page.update() e interactiva) usar
+AWA_STARTUP_TRACE=1 (ver app/startup_trace.py). Requiere flet.
+"""
+import json
+import statistics
+import subprocess
+import sys
+
+from _common import APP_DIR, print_table
+
+_CHILD = r"""
+import importlib, json, sys, time
+sys.path.insert(0, {app_dir!r})
+t0 = time.perf_counter()
+import main
+from ui.router import PAGES
+importlib.import_module(PAGES["home"][0])
+t1 = time.perf_counter()
+for module, _func in PAGES.values():
+    importlib.import_module(module)
+t2 = time.perf_counter()
+print(json.dumps({{"lazy": (t1 - t0) * 1000, "eager": (t2 - t0) * 1000}}))
+"""
+
+
+def main() -> None:
+    launches = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    try:
+        import flet  # noqa: F401
+    except ImportError:
+        print("flet no está instalado: no se puede medir el arranque")
+        return
+    code = _CHILD.format(app_dir=APP_DIR)
+    runs = [
+        json.loads(subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout)
+        for _ in range(launches)
+    ]
+    print_table(
+        f"Imports hasta la primera página ({launches} arranques, mediana)",
+        [
+            ("todas las páginas al inicio (antes)", f"{statistics.median(r['eager'] for r in runs):.1f}"),
+            ("solo la primera página (ui.router)", f"{statistics.median(r['lazy'] for r in runs):.1f}"),
+        ],
+        ("imports", "ms"),
+    )
+
+
+if __name__ == "__main__":
+    main()
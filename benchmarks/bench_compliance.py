@@ -0,0 +1,123 @@
+"""Cumplimiento de meta por área y sub área (compliance_service).
+
+Uso: python benchmarks/bench_compliance.py [días]
+
+Importa la plantilla real, siembra N días de ingestas por persona y compara
+leer los resúmenes incrementales contra recalcular desde daily_totals. Antes de
+medir verifica que los resúmenes coincidan con el recálculo tras ingestas,
+cambios de meta y de área, bajas y una reconstrucción.
+"""
+import os
+import random
+import sys
+from datetime import date, datetime, timedelta
+
+from _common import per_call_us, print_table, use_temp_data_dir
+
+from services import compliance_service as cs, db, intake_service as svc, roster_service, user_service
+
+ROSTER = os.path.join(os.path.dirname(__file__), "..", "Plantilla del personal 08-12-2025.csv")
+
+# Recálculo completo: lo que costaría cada consulta sin los resúmenes
+_RECOMPUTE = """
+    SELECT s.area, s.sub_area,
+           SUM(d.day = :end AND d.total_ml >= u.daily_goal_ml),
+           SUM(d.total_ml >= u.daily_goal_ml)
+    FROM user_scopes s
+    JOIN users u ON u.id = s.user_id
+    LEFT JOIN daily_totals d ON d.user_id = s.user_id AND d.day BETWEEN :start AND :end
+    GROUP BY s.area, s.sub_area
+"""
+
+
+def _seed(days: int) -> None:
+    roster_service.import_roster(ROSTER)
+    rnd = random.Random(3)
+    today = datetime.now().replace(hour=8, minute=0, second=0, microsecond=0)
+    for user in user_service.list_users():
+        rows = []
+        for d in range(days):
+            start = today - timedelta(days=d)
+            for i in range(rnd.randint(3, 9)):
+                rows.append((start + timedelta(minutes=45 * i), rnd.choice((250, 350, 500))))
+        svc.add_intakes(rows, user_id=user.id)
+
+
+def check_consistency() -> None:
+    assert cs.check_area_rollups() == [], "resúmenes por área no coinciden"
+    users = [u for u in user_service.list_users() if u.area]
+    rnd = random.Random(5)
+    # Ingestas que cruzan la meta, cambios de meta y de área, borrados
+    for u in rnd.sample(users, 50):
+        svc.add_intake(u.daily_goal_ml, user_id=u.id)
+    for u in rnd.sample(users, 20):
+        user_service.update_user(u.id, daily_goal_ml=rnd.choice((1500, 2500, 3000)))
+    for u in rnd.sample(users, 20):
+        user_service.update_user(u.id, area="Inventarios", sub_area=rnd.choice((None, "Ciclicos")))
+    for u in rnd.sample(users, 20):
+        svc.delete_last_intake(user_id=u.id)
+    assert svc.check_daily_totals(repair=True, user_id=users[0].id) == []
+    assert cs.check_area_rollups() == [], cs.check_area_rollups()[:5]
+
+    with db.connection() as con:
+        con.execute("UPDATE area_daily_met SET met = met + 3 WHERE day = (SELECT MAX(day) FROM area_daily_met)")
+        con.execute("UPDATE area_headcount SET headcount = headcount + 1 WHERE sub_area = ''")
+        con.commit()
+    assert cs.check_area_rollups(repair=True)
+    assert cs.check_area_rollups() == []
+    whole = cs.get_area_compliance("Suministros")
+    parts = [c for c in cs.list_area_compliance() if c.area == "Suministros" and c.sub_area != cs.WHOLE_AREA]
+    assert whole.headcount == sum(c.headcount for c in parts) and whole.met_today == sum(c.met_today for c in parts)
+
+    # Sub área vacía: cuenta una sola vez en el área completa
+    uid = user_service.create_user("Sin sub área", area="Montaje", sub_area="", daily_goal_ml=1000)
+    assert user_service.get_user(uid).sub_area is None
+    with db.connection() as con:  # como una fila vieja que no pasó por user_service
+        con.execute("INSERT INTO users (name, area, sub_area, daily_goal_ml) VALUES ('Vacía', 'Montaje', '', 1000)")
+        con.commit()
+    svc.add_intake(1000, user_id=uid)
+    svc.flush()
+    montaje = cs.get_area_compliance("Montaje")
+    assert (montaje.headcount, montaje.met_today) == (2, 1), montaje
+    assert cs.check_area_rollups() == [], cs.check_area_rollups()[:5]
+    print("resúmenes por área: OK (consistentes con el recálculo)")
+
+
+def main() -> None:
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    use_temp_data_dir()
+    _seed(days)
+    check_consistency()
+
+    today = date.today()
+    params = {"start": today.toordinal() - today.weekday(), "end": today.toordinal()}
+
+    def recompute():
+        with db.connection() as con:
+            return con.execute(_RECOMPUTE, params).fetchall()
+
+    def recompute_one():
+        with db.connection() as con:
+            return con.execute(
+                "SELECT * FROM (" + _RECOMPUTE + ") WHERE area = 'Suministros' AND sub_area = ''", params
+            ).fetchall()
+
+    calls = [
+        ("un área", recompute_one, lambda: cs.get_area_compliance("Suministros")),
+        ("todas las áreas", recompute, cs.list_area_compliance),
+    ]
+    results = []
+    for name, before_fn, after_fn in calls:
+        before = per_call_us(before_fn, n=50)
+        after = per_call_us(after_fn)
+        results.append((name, f"{before:.1f}", f"{after:.1f}", f"{before / max(after, 1e-9):.1f}x"))
+    print_table(
+        f"Cumplimiento por área, {len(user_service.list_users())} personas x {days} días (µs/llamada, mediana)",
+        results,
+        ("consulta", "recálculo", "resúmenes", "mejora"),
+    )
+    db.close_db()
+
+
+if __name__ == "__main__":
+    main()
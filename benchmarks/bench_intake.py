@@ -0,0 +1,232 @@
+"""Latencia por llamada de las funciones públicas de intake_service.
+
+Uso: python benchmarks/bench_intake.py [filas]
+
+"en frío" cierra la conexión compartida y vacía la caché de intake_service
+antes de cada medición: paga reabrir la conexión (pragmas de WAL y la lectura de
+user_version) y las consultas sin caché, pero no el patrón anterior completo.
+"en caliente" usa la conexión persistente y la caché. El costo fijo por llamada
+del patrón anterior (makedirs, init_db con su conexión y CREATE TABLE, y una
+segunda conexión) se mide aparte con una copia de esas funciones, porque su
+esquema (ts en texto, sin user_id) no sirve para las consultas de ahora. Antes
+de medir se verifica con EXPLAIN QUERY PLAN que las consultas por fecha usan el
+índice de `(user_id, day)`. Además de las
+filas del usuario medido se siembran otros usuarios (BD compartida) para
+comprobar que sus filas no encarecen las consultas de un usuario.
+"""
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, date, timedelta
+
+from _common import per_call_us, print_table, use_temp_data_dir
+
+from services import db, intake_service as svc, user_service
+
+# Usuarios extra con el mismo volumen que el usuario medido
+_OTHER_USERS = 9
+
+
+def _seed(rows: int) -> None:
+    rnd = random.Random(42)
+    now = datetime.now().replace(microsecond=0)
+
+    def gen():
+        for _ in range(rows):
+            yield now - timedelta(minutes=rnd.randint(0, 60 * 24 * 365)), rnd.choice((250, 350, 500, 750))
+
+    for ts, amount in gen():
+        svc.add_intake(amount, ts=ts)
+    svc.flush()
+    for i in range(_OTHER_USERS):
+        uid = user_service.create_user(f"Usuario {i}", area="Suministros")
+        svc.add_intakes(gen(), user_id=uid)
+
+
+# Consultas de lectura por fecha -> índice que deben usar
+_PLANS = [
+    ("SELECT total_ml FROM daily_totals WHERE user_id=? AND day=?", (1, 0), "PRIMARY KEY (user_id=? AND day=?)"),
+    (
+        "SELECT day, total_ml FROM daily_totals WHERE user_id=? AND day BETWEEN ? AND ? ORDER BY day ASC",
+        (1, 0, 1),
+        "PRIMARY KEY (user_id=? AND day>? AND day<?)",
+    ),
+    (
+        "SELECT ts, amount_ml FROM intake WHERE user_id=? ORDER BY day DESC, ts DESC, id DESC LIMIT ?",
+        (1, 20),
+        "idx_intake_user_day_ts_id (user_id=?)",
+    ),
+]
+
+
+def _range_plans(con) -> list:
+    """Las variantes de _query_intakes (rango, keyset, ambos) capturando el SQL generado."""
+    captured = []
+
+    class _Spy:
+        def execute(self, sql, params):
+            captured.append((sql, tuple(params)))
+            return con.execute("SELECT 1 WHERE 0")
+
+    today = date.today()
+    svc._query_intakes(_Spy(), 1, today, today)
+    svc._query_intakes(_Spy(), 1, None, None, (0, 0, 0), 50)
+    svc._query_intakes(_Spy(), 1, today - timedelta(days=6), today, (0, 0, 0), 50)
+    return [(sql, params, "idx_intake_user_day_ts_id (user_id=?") for sql, params in captured]
+
+
+def check_query_plans() -> None:
+    with db.connection() as con:
+        for sql, params, index in _PLANS + _range_plans(con):
+            plan = " | ".join(r[-1] for r in con.execute("EXPLAIN QUERY PLAN " + sql, params))
+            assert index in plan, f"{sql!r} no usa {index}: {plan}"
+            assert "SCAN d" not in plan, f"{sql!r} recorre daily_totals: {plan}"
+            assert "TEMP B-TREE" not in plan, f"{sql!r} ordena en memoria: {plan}"
+    print("EXPLAIN QUERY PLAN: OK (todas las consultas usan el índice)")
+
+
+def check_rollup() -> None:
+    assert svc.check_daily_totals() == [], "daily_totals no coincide con intake"
+    with db.connection() as con:
+        # Una edición y un resumen corrompido a mano deben detectarse y repararse
+        con.execute("UPDATE intake SET amount_ml = amount_ml + 1 WHERE id = (SELECT MIN(id) FROM intake)")
+        con.execute(
+            "UPDATE daily_totals SET total_ml = total_ml + 7 "
+            "WHERE user_id = 1 AND day = (SELECT MAX(day) FROM daily_totals WHERE user_id = 1)"
+        )
+        con.commit()
+    assert len(svc.check_daily_totals(repair=True)) == 1
+    assert svc.check_daily_totals() == []
+    print("daily_totals: OK (consistente con intake)")
+
+
+def check_writer_failures() -> None:
+    """on_durable corre antes de que flush() vuelva y puede leer sin bloquear al
+    escritor; si la BD no se puede abrir, el lote sale de lo pendiente y
+    on_durable recibe None."""
+    total = svc.get_today_total()
+    # flush() vuelve con los on_durable del lote ya ejecutados, aunque tarden
+    def slow(row):
+        time.sleep(0.005)
+        durable.append((row, svc.get_recent(1)))
+
+    for i in range(20):
+        durable = []
+        svc.add_intake(1, on_durable=slow)
+        svc.flush()
+        assert durable and durable[0][0] is not None, f"on_durable pendiente tras flush() (vuelta {i})"
+    total += 20
+    durable = []
+    svc.add_intake(250, on_durable=lambda row: durable.append((row, svc.get_recent(1))))
+    svc.flush()
+    assert durable and durable[0][0] is not None
+
+    connection = db.connection
+
+    def broken():
+        raise OSError("disco lleno")
+
+    db.connection = broken
+    try:
+        svc.add_intake(400, on_durable=durable.append)
+        svc.flush()
+    finally:
+        db.connection = connection
+    assert durable[-1] is None, "on_durable no recibió None"
+    assert svc.get_today_total() == total + 250, "quedaron ml pendientes de un lote fallido"
+    print("escritor: OK (on_durable lee sin bloquear; fallo al abrir la BD no deja ml fantasma)")
+
+
+def _baseline_open(data_dir: str) -> None:
+    """Lo que hacía cada llamada de intake_service antes de db.py, sin la
+    consulta: _data_dir() con makedirs, init_db() y la conexión de la consulta."""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, "intake.db")
+    con = sqlite3.connect(path)
+    try:
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS intake (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts TEXT NOT NULL,
+                amount_ml INTEGER NOT NULL
+            )
+            """
+        )
+        con.commit()
+    finally:
+        con.close()
+    con = sqlite3.connect(path)
+    con.close()
+
+
+def _shared_open() -> None:
+    with db.connection():
+        pass
+
+
+def _cold() -> None:
+    svc.flush()
+    db.close_db()
+    svc.invalidate_cache()
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    use_temp_data_dir()
+    _seed(rows)
+    check_query_plans()
+    check_rollup()
+    check_writer_failures()
+
+    today = date.today()
+    # Cursor que apunta a la penúltima página (la más profunda)
+    oldest, cursor = None, None
+    while True:
+        page, cursor = svc.get_page(cursor, 50)
+        if cursor is None:
+            break
+        oldest = cursor
+    calls = [
+        ("add_intake (encolar)", lambda: svc.add_intake(250)),
+        ("add_intake + flush", lambda: (svc.add_intake(250), svc.flush())),
+        ("get_today_total", svc.get_today_total),
+        ("get_recent(20)", lambda: svc.get_recent(20)),
+        ("get_between_dates(7d)", lambda: svc.get_between_dates(today - timedelta(days=6), today)),
+        ("get_daily_totals(7)", lambda: svc.get_daily_totals(7)),
+        ("delete_last_intake", svc.delete_last_intake),
+        ("get_page(50), primera", lambda: svc.get_page(None, 50)),
+        ("get_page(50), la más antigua", lambda: svc.get_page(oldest, 50)),
+    ]
+
+    results = []
+    for name, fn in calls:
+        cold = per_call_us(fn, setup=_cold)
+        db.close_db()
+        fn()  # calentamiento: abre la conexión compartida
+        warm = per_call_us(fn)
+        results.append((name, f"{cold:.1f}", f"{warm:.1f}", f"{cold / max(warm, 1e-9):.1f}x"))
+
+    print_table(
+        f"intake_service, {rows} filas x {_OTHER_USERS + 1} usuarios (µs/llamada, mediana)",
+        results, ("función", "en frío", "en caliente", "frío/caliente"),
+    )
+
+    # Costo fijo por llamada, sin la consulta: en un directorio aparte para no
+    # tocar la BD sembrada con el esquema viejo
+    baseline_dir = os.path.join(use_temp_data_dir(), "baseline")
+    _shared_open()
+    before = per_call_us(lambda: _baseline_open(baseline_dir))
+    after = per_call_us(_shared_open)
+    print_table(
+        "Abrir la BD en cada llamada (µs/llamada, mediana)",
+        [("patrón anterior vs db.connection()", f"{before:.1f}", f"{after:.1f}", f"{before / max(after, 1e-9):.1f}x")],
+        ("costo fijo", "antes", "después", "mejora"),
+    )
+    db.close_db()
+
+
+if __name__ == "__main__":
+    main()
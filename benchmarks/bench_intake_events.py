@@ -0,0 +1,177 @@
+"""Eventos de ingestas (services.intake_events) y parcheo de las vistas.
+
+Uso: python benchmarks/bench_intake_events.py [repeticiones]
+
+Comprueba qué publica intake_service (agregar, deshacer, cambio de día, meta,
+cambios en bloque). Con flet instalado mide además deshacer en el historial:
+antes se borraba y se reconstruía la lista (otra consulta y todos los
+controles); ahora el evento DELETED quita la fila y ajusta el total del día.
+Cuenta las sentencias SQL de cada modo.
+"""
+import sys
+import threading
+from datetime import datetime, timedelta
+
+from _common import per_call_us, print_table, use_temp_data_dir
+
+from services import db, intake_events, intake_service, user_service
+
+_statements = {"n": 0}
+
+
+def _count(_sql: str) -> None:
+    _statements["n"] += 1
+
+
+class _Page:
+    """Lo que el historial usa de ft.Page; update no hace nada."""
+
+    def __init__(self):
+        self.route = "/history"
+        self.views = []
+        self.snack_bar = None
+
+    def go(self, route):
+        self.route = route
+
+    def update(self):
+        pass
+
+
+def check() -> None:
+    events = []
+    unsubscribe = intake_events.subscribe(events.append)
+    try:
+        user = intake_service.get_active_user()
+        today = intake_service._day_key(intake_service.get_today())
+        total = intake_service.get_today_total()
+
+        intake_service.add_intake(250)
+        added = events[-1]
+        assert (added.kind, added.user_id, added.day, added.amount_ml, added.total_ml) == (
+            intake_events.ADDED, user, today, 250, total + 250)
+
+        row = intake_service.delete_last_intake()
+        deleted = events[-1]
+        assert (deleted.kind, deleted.ts, deleted.amount_ml, deleted.total_ml) == (
+            intake_events.DELETED, row.ts, 250, total)
+
+        user_service.update_user(user, daily_goal_ml=2600)
+        assert events[-1][:2] == (intake_events.GOAL_CHANGED, user) and events[-1].goal_ml == 2600
+
+        intake_service.add_intakes([(datetime.now() - timedelta(days=3), 300)])
+        assert events[-1].kind == intake_events.RELOADED and events[-1].user_id is None
+
+        # Como si el día visto por última vez fuera ayer
+        intake_service._today_seen["day"] -= 1
+        intake_service.get_today()
+        assert events[-1][:3] == (intake_events.DAY_ROLLOVER, user, today)
+        n = len(events)
+        intake_service.get_today()
+        assert len(events) == n  # solo una vez por cambio de día
+    finally:
+        unsubscribe()
+    intake_service.add_intake(100)
+    assert len(events) == n  # dado de baja
+    intake_service.flush()
+    print("eventos de ingestas: OK (agregar, deshacer, meta, en bloque, cambio de día)")
+
+
+def check_failed_write() -> None:
+    """Un suscriptor que relee al recibir RELOADED tras un commit fallido no
+    debe dejar bloqueado al hilo escritor (ni a flush())."""
+    reads = []
+
+    def on_event(event):
+        if event.kind == intake_events.RELOADED:
+            reads.append(intake_service.get_page(None, 10)[0])
+
+    with db.connection() as con:
+        con.execute(
+            "CREATE TEMP TRIGGER fail_13 BEFORE INSERT ON intake WHEN NEW.amount_ml = 13 "
+            "BEGIN SELECT RAISE(ABORT, 'forzado'); END"
+        )
+    unsubscribe = intake_events.subscribe(on_event)
+    try:
+        intake_service.add_intake(13)
+        done = threading.Thread(target=intake_service.flush, daemon=True)
+        done.start()
+        done.join(5)
+        assert not done.is_alive(), "flush() bloqueado tras un commit fallido"
+        assert reads
+    finally:
+        unsubscribe()
+        with db.connection() as con:
+            con.execute("DROP TRIGGER temp.fail_13")
+    print("commit fallido: OK (el suscriptor relee sin bloquear al escritor)")
+
+
+def main() -> None:
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    use_temp_data_dir()
+    intake_service.add_intakes(
+        (datetime.now() - timedelta(minutes=10 * i), 250) for i in range(1, 300)
+    )
+    check()
+    check_failed_write()
+
+    quiet = per_call_us(lambda: intake_service.add_intake(1), n=repeats)
+    unsubscribe = intake_events.subscribe(lambda event: None)
+    published = per_call_us(lambda: intake_service.add_intake(1), n=repeats)
+    unsubscribe()
+    intake_service.flush()
+    print_table(
+        f"add_intake ({repeats} llamadas, mediana)",
+        [("sin suscriptores", f"{quiet:.1f}"), ("con un suscriptor (evento + total)", f"{published:.1f}")],
+        ("modo", "µs/llamada"),
+    )
+
+    try:
+        import flet  # noqa: F401
+    except ImportError:
+        print("flet no está instalado: no se puede medir el historial")
+        return
+    from ui.pages import history
+
+    page = _Page()
+    view = history.create_history_page(page)
+    page.views.append(view)
+
+    def refill():
+        intake_service.add_intake(250)
+        intake_service.flush()
+
+    with db.connection() as con:
+        con.set_trace_callback(_count)
+    try:
+        # Antes: borrar y reconstruir la lista; el evento se ignora dando de baja la vista
+        view.data["dispose"]()
+        _statements["n"] = 0
+        rebuild = per_call_us(
+            lambda: (intake_service.delete_last_intake(), history._build_list_view("7d")), n=repeats, setup=refill
+        )
+        statements_rebuild = _statements["n"]
+
+        view = history.create_history_page(page)
+        page.views[:] = [view]
+        _statements["n"] = 0
+        patch = per_call_us(intake_service.delete_last_intake, n=repeats, setup=refill)
+        statements_patch = _statements["n"]
+        view.data["dispose"]()
+    finally:
+        with db.connection() as con:
+            con.set_trace_callback(None)
+    # refill también ejecuta sentencias: son las mismas en los dos modos
+    print_table(
+        f"Deshacer en el historial ({repeats} veces, mediana)",
+        [
+            ("borrar y reconstruir la lista (antes)", f"{rebuild:.1f}", statements_rebuild),
+            ("borrar y parchear con el evento", f"{patch:.1f}", statements_patch),
+        ],
+        ("modo", "µs", "sentencias SQL"),
+    )
+    db.close_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Cambio de persona en el kiosco (kiosk_service.switch_worker).
+
+Uso: python benchmarks/bench_kiosk.py [cambios]
+
+Simula una fila de descanso: con la plantilla real importada, alterna entre
+un grupo de personas que registran agua una tras otra. "Sin caché" vacía las
+cachés de perfiles y totales antes de cada cambio (cada cambio va a la BD);
+"con caché" usa las LRU. Reporta latencia por cambio y tasa de aciertos.
+"""
+import os
+import random
+import sys
+
+from _common import per_call_us, print_table, use_temp_data_dir
+
+from services import db, intake_service, kiosk_service, roster_service, user_service
+
+ROSTER = os.path.join(os.path.dirname(__file__), "..", "Plantilla del personal 08-12-2025.csv")
+# Personas que se turnan en el kiosco durante el descanso
+CREW = 30
+
+
+def _cold() -> None:
+    user_service.invalidate_cache()
+    intake_service.invalidate_cache()
+
+
+def check(crew: list) -> None:
+    local_total = intake_service.get_today_total()
+    first = kiosk_service.switch_worker(crew[0])
+    after = kiosk_service.log_intake(first, 250)
+    # Lo del kiosco no se atribuye al usuario del dispositivo
+    assert intake_service.get_active_user() == db.LOCAL_USER_ID
+    intake_service.add_intake(500)
+    assert intake_service.get_today_total() == local_total + 500
+    assert intake_service.get_today_total(crew[0]) == after.today_total
+    kiosk_service.switch_worker(crew[1])
+    back = kiosk_service.switch_worker(crew[0])
+    assert back.today_total == after.today_total == first.today_total + 250
+    intake_service.flush()
+    _cold()
+    assert kiosk_service.switch_worker(crew[0]).today_total == after.today_total
+    user_service.update_user(crew[0], daily_goal_ml=3100)
+    assert kiosk_service.switch_worker(crew[0]).goal_ml == 3100
+    try:
+        kiosk_service.switch_worker(10 ** 9)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("switch_worker aceptó un usuario inexistente")
+    print("kiosco: OK (estado consistente tras registrar, volver y editar la meta)")
+
+
+def main() -> None:
+    switches = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    use_temp_data_dir()
+    roster_service.import_roster(ROSTER)
+    rnd = random.Random(11)
+    crew = [u.id for u in rnd.sample([u for u in user_service.list_users() if u.area], CREW)]
+    check(crew)
+
+    order = iter([rnd.choice(crew) for _ in range(switches * 3)])
+
+    def switch():
+        kiosk_service.switch_worker(next(order))
+
+    before = per_call_us(switch, n=switches, setup=_cold)
+    _cold()
+    stats0 = kiosk_service.cache_stats()
+    after = per_call_us(switch, n=switches)
+    stats = kiosk_service.cache_stats()
+
+    def rate(name):
+        hits = stats[name]["hits"] - stats0[name]["hits"]
+        misses = stats[name]["misses"] - stats0[name]["misses"]
+        return f"{100.0 * hits / max(hits + misses, 1):.1f}%"
+
+    print_table(
+        f"Cambio de persona, {CREW} personas alternando ({switches:,} cambios)",
+        [
+            ("sin caché", f"{before:.1f}", "-", "-"),
+            ("con caché LRU", f"{after:.1f}", rate("profiles"), rate("totals")),
+        ],
+        ("modo", "µs/cambio", "aciertos perfil", "aciertos total"),
+    )
+    db.close_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Ranking por avance de meta (leaderboard_service).
+
+Uso: python benchmarks/bench_leaderboard.py [personas]
+
+Siembra una plantilla sintética con ingestas de hoy y compara ordenar a toda la
+plantilla con sorted() contra el heap acotado de top_workers/bottom_workers,
+sin caché y con caché. Verifica que ambos den el mismo resultado, que una
+ingesta nueva invalide la caché y que esta no crezca con los minutos.
+"""
+import os
+import sys
+import time
+import types
+from datetime import datetime, timedelta
+
+from _common import per_call_us, print_table, use_temp_data_dir
+from bench_roster_import import _write_roster
+
+from services import db, intake_service as svc, leaderboard_service as lb, roster_service, user_service
+
+K = 10
+
+
+def _seed(workers: int, data_dir: str) -> None:
+    path = os.path.join(data_dir, "plantilla.csv")
+    _write_roster(path, workers)
+    roster_service.import_roster(path)
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    for user in user_service.list_users():
+        n = user.id % 12
+        svc.add_intakes(((start + timedelta(minutes=30 * i), 250) for i in range(n)), user_id=user.id)
+
+
+def _sorted_top(area=None):
+    """Referencia: leer a todos y ordenar."""
+    with db.connection() as con:
+        sql, params = lb._SELECT.format(day="?"), [datetime.now().date().toordinal()]
+        if area is not None:
+            sql += " AND u.area = ?"
+            params.append(area)
+        rows = con.execute(sql, params).fetchall()
+    return [r[2] for r in sorted(rows, reverse=True)[:K]]
+
+
+def check() -> None:
+    assert [e.user_id for e in lb.top_workers(K)] == _sorted_top()
+    bottom = lb.bottom_workers(K, area="AEKOS")
+    assert all(e.area == "AEKOS" for e in bottom) and bottom[0].total_ml == 0
+    # El usuario local (perfil del dispositivo, sin nombre) no entra al ranking
+    svc.add_intake(50_000, user_id=db.LOCAL_USER_ID)
+    assert all(e.user_id != db.LOCAL_USER_ID for e in lb.top_workers(K) + lb.bottom_workers(K))
+    # Una ingesta que pone a alguien en primer lugar invalida la caché
+    target = bottom[0]
+    svc.add_intake(10 * target.goal_ml, user_id=target.user_id)
+    assert lb.top_workers(K)[0].user_id == target.user_id
+
+    # Una pantalla abierta sin ingestas pide "hoy" cada minuto: la caché no crece
+    real_time, now = lb.time, time.time()
+    try:
+        for minute in range(120):
+            lb.time = types.SimpleNamespace(time=lambda: now + 60 * minute)
+            lb.top_workers(K)
+            lb.top_workers(K, area="AEKOS")
+        assert len(lb._cache) == 2, len(lb._cache)
+    finally:
+        lb.time = real_time
+    for d in range(2 * lb._CACHE_SIZE):
+        lb.top_workers(K, day=datetime.now().date() - timedelta(days=d))
+    assert len(lb._cache) == lb._CACHE_SIZE
+    print("leaderboard: OK (igual que ordenar todo; la caché se invalida con ingestas y está acotada)")
+
+
+def main() -> None:
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    data_dir = use_temp_data_dir()
+    _seed(workers, data_dir)
+    check()
+
+    calls = [
+        ("top 10, plantilla", lambda: _sorted_top(), lambda: lb.top_workers(K)),
+        ("bottom 10, plantilla", lambda: _sorted_top(), lambda: lb.bottom_workers(K)),
+        ("top 10, un área", lambda: _sorted_top("AEKOS"), lambda: lb.top_workers(K, area="AEKOS")),
+    ]
+    results = []
+    for name, before_fn, after_fn in calls:
+        before = per_call_us(before_fn, n=30)
+        uncached = per_call_us(after_fn, n=30, setup=lb.invalidate_cache)
+        cached = per_call_us(after_fn)
+        results.append((name, f"{before:.0f}", f"{uncached:.0f}", f"{cached:.1f}"))
+    print_table(
+        f"Leaderboard, {workers:,} personas (µs/llamada, mediana)",
+        results,
+        ("consulta", "sorted()", "heap", "heap + caché"),
+    )
+    db.close_db()
+
+
+if __name__ == "__main__":
+    main()
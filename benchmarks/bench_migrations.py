@@ -0,0 +1,75 @@
+"""Migración de una BD heredada (esquema original: intake(id, ts, amount_ml))
+hasta la versión actual, y costo del camino rápido cuando ya está al día.
+
+Uso: python benchmarks/bench_migrations.py [filas]
+"""
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+from _common import per_call_us, print_table, use_temp_data_dir
+
+from services import db, intake_service as svc
+
+
+def _seed_legacy(path: str, rows: int) -> None:
+    rnd = random.Random(7)
+    now = datetime.now().replace(microsecond=0)
+    con = sqlite3.connect(path)
+    con.execute(
+        "CREATE TABLE intake (id INTEGER PRIMARY KEY AUTOINCREMENT, ts TEXT NOT NULL, amount_ml INTEGER NOT NULL)"
+    )
+    con.executemany(
+        "INSERT INTO intake (ts, amount_ml) VALUES (?, ?)",
+        (
+            ((now - timedelta(minutes=rnd.randint(0, 60 * 24 * 730))).isoformat(timespec="seconds"), rnd.choice((250, 500, 750)))
+            for _ in range(rows)
+        ),
+    )
+    con.commit()
+    con.close()
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    use_temp_data_dir()
+    path = db.db_path()
+    _seed_legacy(path, rows)
+    size_before = os.path.getsize(path)
+
+    t0 = time.perf_counter()
+    with db.connection() as con:
+        version = con.execute("PRAGMA user_version").fetchone()[0]
+    upgrade_s = time.perf_counter() - t0
+    assert version == db.SCHEMA_VERSION, version
+
+    # Resultado equivalente al esquema creado desde cero
+    with db.connection() as con:
+        assert con.execute("SELECT COUNT(*) FROM intake WHERE day IS NULL").fetchone()[0] == 0
+        assert con.execute("SELECT SUM(count) FROM daily_totals").fetchone()[0] == rows
+    assert svc.check_daily_totals() == []
+
+    # Camino rápido: reabrir una BD ya migrada
+    with db.connection() as con:
+        fast_us = per_call_us(lambda: db.migrate(con), n=1000)
+    reopen_us = per_call_us(svc.init_db, n=50, setup=db.close_db)
+
+    print_table(
+        f"Migración v0 -> v{db.SCHEMA_VERSION}",
+        [
+            ("filas", f"{rows:,}"),
+            ("tamaño BD heredada", f"{size_before / 1e6:.1f} MB"),
+            ("migración completa", f"{upgrade_s:.2f} s"),
+            ("migrate() con esquema al día", f"{fast_us:.1f} µs"),
+            ("abrir conexión (al día)", f"{reopen_us:.1f} µs"),
+        ],
+        ("medida", "valor"),
+    )
+    db.close_db()
+
+
+if __name__ == "__main__":
+    main()
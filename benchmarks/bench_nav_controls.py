@@ -0,0 +1,102 @@
+"""Controles creados por la barra inferior en cada navegación.
+
+Uso: python benchmarks/bench_nav_controls.py [navegaciones]
+
+"Por navegación (antes)" construye la barra completa en cada navegación, como
+hacía cada página con su copia de _bottom_nav; "por vista" usa ui.nav: cada
+View guardada en ui.router tiene su barra, construida una vez, y al montarla
+select_tab solo la repinta si hace falta. Cuenta los ft.Control creados
+(contando las llamadas a Control.__init__) y el tiempo por navegación.
+Requiere flet.
+"""
+import sys
+
+from _common import per_call_us, print_table
+
+_created = {"n": 0}
+
+
+class _Page:
+    """Lo que bottom_nav usa de ft.Page: la ruta."""
+
+    route = "/"
+
+
+class _View:
+    """Lo que select_tab usa de ft.View: view.data["nav"]."""
+
+    def __init__(self, nav):
+        self.data = {"nav": nav}
+
+
+def _count_controls(ft) -> None:
+    init = ft.Control.__init__
+
+    def counting_init(self, *args, **kwargs):
+        _created["n"] += 1
+        init(self, *args, **kwargs)
+
+    ft.Control.__init__ = counting_init
+
+
+def main() -> None:
+    navigations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    try:
+        import flet as ft
+    except ImportError:
+        print("flet no está instalado: no se pueden contar controles")
+        return
+    from config import Colors
+    from ui import nav
+
+    _count_controls(ft)
+    page = _Page()
+    routes = [route for _label, _icon, route in nav.TABS]
+
+    def navigate(show):
+        i = {"n": 0}
+
+        def run():
+            page.route = routes[i["n"] % len(routes)]
+            i["n"] += 1
+            show()
+        return run
+
+    def active(bar):
+        return [box.bgcolor == Colors.PRIMARY for box, _i, _t in bar.data["items"]]
+
+    # Comprobaciones: una barra por vista, con la pestaña de su ruta activa
+    views = {}
+    for i, route in enumerate(routes):
+        page.route = route
+        views[route] = _View(nav.bottom_nav(page))
+        assert active(views[route].data["nav"]) == [j == i for j in range(len(routes))]
+    assert len({id(v.data["nav"]) for v in views.values()}) == len(routes)
+    assert not nav.select_tab(views["/history"], "/history")  # ya activa: nada que repintar
+    assert nav.select_tab(views["/history"], "/")  # otra ruta: repinta
+    assert active(views["/history"].data["nav"]) == [True, False, False, False]
+    assert not nav.select_tab(_View(None), "/")  # vista sin barra
+    print("barra por vista: OK (una por View, una pestaña activa, repinta solo si cambia)")
+
+    # Antes: la barra entera en cada navegación. Ahora: la vista guardada ya
+    # la tiene y el router solo llama a select_tab
+    _created["n"] = 0
+    before = per_call_us(navigate(lambda: nav.bottom_nav(page)), n=navigations)
+    created_before = _created["n"]
+
+    _created["n"] = 0
+    after = per_call_us(navigate(lambda: nav.select_tab(views[page.route], page.route)), n=navigations)
+    created_after = _created["n"]
+
+    print_table(
+        f"Barra inferior ({navigations:,} navegaciones)",
+        [
+            ("por navegación (antes)", f"{created_before / navigations:.1f}", f"{before:.1f}"),
+            ("por vista guardada (ui.nav)", f"{created_after / navigations:.1f}", f"{after:.1f}"),
+        ],
+        ("barra", "controles/navegación", "µs/navegación"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Lectura del perfil en cada navegación (profile_service.load_profile).
+
+Uso: python benchmarks/bench_profile.py [navegaciones]
+
+Cada cambio de ruta llama a has_profile_data() y la página de inicio vuelve a
+leer el perfil. "Sin caché" descarta la copia en memoria de settings_service
+antes de cada navegación (un SELECT); "con caché" no toca la BD. Cuenta las
+sentencias SQL ejecutadas.
+"""
+import sys
+
+from _common import per_call_us, print_table, use_temp_data_dir
+
+from services import db, profile_service as ps, settings_service
+
+PROFILE = {
+    "name": "Ana Torres",
+    "weight_kg": 62,
+    "height_cm": 165,
+    "age": 31,
+    "activity": "moderada",
+    "daily_goal_ml": 2300,
+    "avatar_id": 2,
+}
+
+_statements = {"n": 0}
+
+
+def _count(_sql: str) -> None:
+    _statements["n"] += 1
+
+
+def _navigate() -> None:
+    """Lo que hace un cambio de ruta a inicio: main.py y create_home_page."""
+    assert ps.has_profile_data()
+    ps.load_profile()
+
+
+def check() -> None:
+    assert ps.load_profile() is None and not ps.has_profile_data()
+    ps.save_profile(PROFILE)
+    statements = _statements["n"]
+    assert ps.load_profile() == PROFILE and _statements["n"] == statements  # visible antes de escribirse
+    ps.flush_profile()
+    statements = _statements["n"]
+    assert ps.load_profile() == PROFILE and _statements["n"] == statements  # la escritura deja la copia lista
+    ps.load_profile()["name"] = "otra"  # las copias no alteran lo guardado
+    assert ps.load_profile()["name"] == PROFILE["name"]
+    settings_service.invalidate()
+    assert ps.load_profile() == PROFILE  # persistido en la BD
+    ps.delete_profile()
+    assert ps.load_profile() is None
+    settings_service.invalidate()
+    assert ps.load_profile() is None
+    ps.save_profile(PROFILE)
+    ps.flush_profile()
+    print("perfil: OK (guardar, recargar desde la BD y borrar)")
+
+
+def main() -> None:
+    navigations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    use_temp_data_dir()
+    with db.connection() as con:
+        con.set_trace_callback(_count)
+    try:
+        check()
+
+        _statements["n"] = 0
+        before = per_call_us(_navigate, n=navigations, setup=settings_service.invalidate)
+        statements_before = _statements["n"]
+
+        _statements["n"] = 0
+        stats0 = settings_service.cache_stats()
+        after = per_call_us(_navigate, n=navigations)
+        statements_after = _statements["n"]
+        stats = settings_service.cache_stats()
+    finally:
+        with db.connection() as con:
+            con.set_trace_callback(None)
+    hits = stats["hits"] - stats0["hits"]
+    loads = stats["loads"] - stats0["loads"]
+    print_table(
+        f"Perfil por navegación ({navigations:,} navegaciones)",
+        [
+            ("sin caché", f"{before:.1f}", statements_before, "-"),
+            ("con caché", f"{after:.1f}", statements_after, f"{100.0 * hits / max(hits + loads, 1):.1f}%"),
+        ],
+        ("modo", "µs/navegación", "sentencias SQL", "aciertos"),
+    )
+    db.close_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Guardado del perfil (profile_service.save_profile): atómico y agrupado.
+
+Uso: python benchmarks/bench_profile_write.py [guardados]
+
+Primero inyecta cortes: un proceso hijo guarda un perfil nuevo y muere
+(os._exit, sin atexit) con el UPSERT a medias, al empezar el COMMIT y justo
+después del COMMIT; el perfil guardado debe ser el anterior o el nuevo
+completos, nunca uno a medias. Como contraste, el mismo corte con la escritura
+en el lugar de profile.json de antes deja el archivo dañado. Luego comprueba
+que 50 guardados seguidos son un solo COMMIT (settings y el usuario local en
+users) y un solo GOAL_CHANGED. Después mide guardados seguidos (p. ej. un
+formulario que guarda en cada cambio).
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+from _common import APP_DIR, per_call_us, print_table, use_temp_data_dir
+
+from services import db, intake_events, profile_service as ps, settings_service, user_service
+
+OLD = {"name": "Ana Torres", "weight_kg": 62, "height_cm": 165, "daily_goal_ml": 2300}
+NEW = dict(OLD, name="Ana Torres Ruiz", weight_kg=64, daily_goal_ml=2400, notes="x" * 2000)
+
+# Proceso hijo: guarda NEW sobre OLD y muere en el punto indicado
+_CHILD = r"""
+import json, os, sys
+sys.path.insert(0, {app_dir!r})
+from services import db, profile_service as ps, settings_service
+db._data_dir = lambda: {data_dir!r}
+db._legacy_dirs = lambda: []
+new, where = json.loads({new!r}), {where!r}
+
+def die(*_a, **_k):
+    os._exit(1)
+
+if where == "in_place":
+    # La escritura de antes: open("w") + json.dump(indent=2) sobre profile.json
+    with open(os.path.join({data_dir!r}, "profile.json"), "w", encoding="utf-8") as f:
+        f.write(json.dumps(new, indent=2)[:100])
+        f.flush()
+        die()
+elif where in ("mid_upsert", "at_commit"):
+    prefix = "INSERT INTO settings" if where == "mid_upsert" else "COMMIT"
+    def trace(sql):
+        if sql.lstrip().upper().startswith(prefix.upper()):
+            die()
+    with db.connection() as con:
+        con.set_trace_callback(trace)
+elif where == "after_commit":
+    settings_service.json.loads = die  # set_value lo llama justo después del commit
+ps.save_profile(new)
+ps.flush_profile()
+"""
+
+
+def _crash(data_dir: str, where: str) -> object:
+    """Deja OLD guardado, corre el hijo y devuelve lo que queda: dict o 'dañado'."""
+    settings_service.set_value("profile", OLD)
+    if where == "in_place":
+        with open(os.path.join(data_dir, "profile.json"), "w", encoding="utf-8") as f:
+            json.dump(OLD, f)
+    db.close_db()
+    settings_service.invalidate()
+    code = _CHILD.format(app_dir=APP_DIR, data_dir=data_dir, new=json.dumps(NEW), where=where)
+    subprocess.run([sys.executable, "-c", code], check=False)
+    if where == "in_place":
+        try:
+            with open(os.path.join(data_dir, "profile.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except ValueError:
+            return "dañado"
+    return ps.load_profile()
+
+
+def check_crashes(data_dir: str) -> list:
+    rows = []
+    for where, expected in (
+        ("in_place", "dañado"),
+        ("mid_upsert", OLD),
+        ("at_commit", OLD),
+        ("after_commit", NEW),
+    ):
+        got = _crash(data_dir, where)
+        assert got == expected, (where, got)
+        label = "dañado" if got == "dañado" else ("anterior" if got == OLD else "nuevo")
+        rows.append((where, label))
+    with db.connection() as con:
+        assert con.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    print("cortes: OK (el perfil queda anterior o nuevo, nunca a medias)")
+    return rows
+
+
+def check_coalescing() -> None:
+    commits = {"n": 0}
+
+    def trace(sql):
+        if sql.lstrip().upper().startswith("COMMIT"):
+            commits["n"] += 1
+
+    events = []
+    unsubscribe = intake_events.subscribe(events.append)
+    with db.connection() as con:
+        changes = con.total_changes
+        con.set_trace_callback(trace)
+    try:
+        for i in range(50):
+            ps.save_profile(dict(OLD, weight_kg=60 + i, daily_goal_ml=2000 + i))
+            assert ps.load_profile()["weight_kg"] == 60 + i
+        with db.connection() as con:
+            assert con.total_changes == changes and commits["n"] == 0, "se escribió antes del flush"
+        assert not events
+        time.sleep(ps._SAVE_DELAY_S * 2)
+        with db.connection() as con:
+            # settings y users en una sola transacción
+            assert (commits["n"], con.total_changes - changes) == (1, 2), (commits, con.total_changes - changes)
+        assert [e.goal_ml for e in events] == [2049], events
+        assert user_service.get_user(user_service.LOCAL_USER_ID).daily_goal_ml == 2049
+        settings_service.invalidate()
+        assert ps.load_profile()["weight_kg"] == 109
+        ps.save_profile(OLD)
+        ps.delete_profile()  # un borrado descarta el guardado pendiente
+        time.sleep(ps._SAVE_DELAY_S * 2)
+        assert commits["n"] == 2 and ps.load_profile() is None
+    finally:
+        unsubscribe()
+        with db.connection() as con:
+            con.set_trace_callback(None)
+    print("agrupado: OK (50 guardados seguidos = 1 transacción y 1 GOAL_CHANGED)")
+
+
+def main() -> None:
+    saves = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    data_dir = use_temp_data_dir()
+    crash_rows = check_crashes(data_dir)
+    print_table("Corte durante el guardado", crash_rows, ("punto del corte", "perfil guardado"))
+    check_coalescing()
+
+    path = os.path.join(data_dir, "profile.json")
+    i = iter(range(10 ** 9))
+
+    def in_place():
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(dict(NEW, weight_kg=next(i)), f, ensure_ascii=False, indent=2)
+
+    def upsert():
+        settings_service.set_value("profile", dict(NEW, weight_kg=next(i)))
+
+    def debounced():
+        ps.save_profile(dict(NEW, weight_kg=next(i)))
+
+    before = per_call_us(in_place, n=saves)
+    direct = per_call_us(upsert, n=saves)
+    t0 = time.perf_counter()
+    coalesced = per_call_us(debounced, n=saves)
+    ps.flush_profile()
+    elapsed = time.perf_counter() - t0
+    print_table(
+        f"{saves:,} guardados seguidos (µs/guardado, mediana)",
+        [
+            ("profile.json en el lugar (antes)", f"{before:.1f}", "no"),
+            ("UPSERT en settings", f"{direct:.1f}", "sí"),
+            ("save_profile (agrupado)", f"{coalesced:.1f}", "sí"),
+        ],
+        ("escritura", "µs", "atómica"),
+    )
+    print(f"(save_profile: {saves:,} guardados en {elapsed * 1000:.0f} ms de reloj incluyendo el flush final)")
+    db.close_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Importación de la plantilla del personal (roster_service.import_roster).
+
+Uso: python benchmarks/bench_roster_import.py [filas]
+
+Importa la plantilla real del repositorio y una sintética de N filas (Latin-1,
+nombres "Apellidos, Nombres") tres veces: carga inicial, reimportación sin
+cambios y reimportación con 1% de filas modificadas. Verifica que reimportar
+sea idempotente y que solo se escriban las filas que cambiaron.
+"""
+import csv
+import os
+import random
+import sys
+import time
+
+from _common import print_table, use_temp_data_dir
+
+from services import db, roster_service, search_service, user_service
+
+ROSTER = os.path.join(os.path.dirname(__file__), "..", "Plantilla del personal 08-12-2025.csv")
+
+_LAST = ["García", "Hernández", "Muñoz", "López", "Pérez", "Ruiz", "Sánchez", "De La Cruz", "Ibáñez", "Ortiz"]
+_FIRST = ["María", "José", "Verónica", "Juan Carlos", "Ángel", "Nuria", "Iñaki", "Sofía", "Raúl", "Ana"]
+_AREAS = {
+    "Suministros": ["Montaje Taos", "Hojalateria Jetta"],
+    "AEKOS": ["Secuenciado"],
+    "Centro Logistico": ["Recibo", "Embarques"],
+    "Capacitación": ["Inducción"],
+}
+_PUESTOS = ["Seguidor", "Tractorista", "Supervisor", "Jefe De Área"]
+
+
+def _write_roster(path: str, rows: int, changed: float = 0.0) -> None:
+    rnd = random.Random(7)
+    change = random.Random(99)
+    with open(path, "w", encoding="latin-1", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["Nombre completo", "Puesto", "Area", "Sub área"])
+        for i in range(rows):
+            area = rnd.choice(list(_AREAS))
+            puesto = rnd.choice(_PUESTOS)
+            if change.random() < changed:
+                puesto = "Seguidor - Centro Log N.I."
+            name = f"{rnd.choice(_LAST)} {rnd.choice(_LAST)} {i}, {rnd.choice(_FIRST)}"
+            w.writerow([name, puesto, area, rnd.choice(_AREAS[area])])
+
+
+def _timed(path: str) -> tuple:
+    t0 = time.perf_counter()
+    counts = roster_service.import_roster(path)
+    return counts, time.perf_counter() - t0
+
+
+def check_real_roster() -> None:
+    counts, _ = _timed(ROSTER)
+    assert counts["inserted"] == 519 and counts["rejected"] == 0, counts
+    again, _ = _timed(ROSTER)
+    assert again == {"inserted": 0, "updated": 0, "unchanged": 519, "rejected": 0}, again
+    names = {u.name for u in user_service.list_users(area="Suministros")}
+    assert "Veronica Muñoz Perez" in names, "nombre Latin-1 mal decodificado"
+    # Filas con No. empleado antes del nombre: el nombre no es el número
+    assert not [u.name for u in user_service.list_users() if u.name.replace(" ", "").isdigit()]
+    hits = search_service.search("gomez perez rodrigo")
+    assert [(u.name, u.puesto, u.area, u.sub_area) for u in hits] == [
+        ("Rodrigo Gomez Perez", "COMISIONADOR", "Centro Logistico", None)], hits
+    assert search_service.search("lara huerta anita")[0].area == "Inventarios"
+    print(f"plantilla real: OK ({counts['inserted']} usuarios, reimportación sin escrituras)")
+
+
+def check_employee_number_migration() -> None:
+    """Una BD importada antes de leer las filas con No. empleado: la migración
+    las corrige en su lugar y reimportar ya no escribe nada."""
+    uid = search_service.search("gomez perez rodrigo")[0].id
+    with db.connection() as con:
+        con.execute(
+            "UPDATE users SET roster_key = '11962', name = '11962', puesto = 'Gomez Perez, Rodrigo', "
+            "sub_area = 'COMISIONADOR' WHERE id = ?",
+            (uid,),
+        )
+        # Una BD de antes de m012 aún no tenía lo que crean las migraciones siguientes
+        con.execute("DROP TRIGGER trg_users_day_start_area_intake")
+        con.execute("DROP TRIGGER trg_users_day_start_area")
+        con.execute(f"PRAGMA user_version = {db.MIGRATIONS.index(db._m012_roster_employee_number)}")
+        con.commit()
+    db.close_db()
+    user_service.invalidate_cache()
+    search_service.invalidate()
+    user = user_service.get_user(uid)
+    assert (user.name, user.puesto, user.sub_area) == ("Rodrigo Gomez Perez", "COMISIONADOR", None), user
+    again, _ = _timed(ROSTER)
+    assert again["unchanged"] == 519, again
+    print("plantilla con No. empleado: OK (la migración corrige lo ya importado)")
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    data_dir = use_temp_data_dir()
+    check_real_roster()
+    check_employee_number_migration()
+
+    use_temp_data_dir()
+    path = os.path.join(data_dir, "plantilla.csv")
+    _write_roster(path, rows)
+    results = []
+    first, first_s = _timed(path)
+    assert first["inserted"] == rows, first
+    same, same_s = _timed(path)
+    assert same["unchanged"] == rows and same["inserted"] == same["updated"] == 0, same
+    with db.connection() as con:
+        changes_before = con.total_changes
+    _write_roster(path, rows, changed=0.01)
+    diff, diff_s = _timed(path)
+    with db.connection() as con:
+        written = con.total_changes - changes_before
+    assert diff["inserted"] == 0 and written == diff["updated"] > 0, (diff, written)
+
+    for name, counts, secs in (
+        ("carga inicial", first, first_s),
+        ("reimportar sin cambios", same, same_s),
+        ("reimportar con 1% cambios", diff, diff_s),
+    ):
+        results.append((name, counts["inserted"], counts["updated"], f"{secs:.2f}", f"{rows / secs:,.0f}"))
+    print_table(
+        f"Importación de plantilla, {rows:,} filas",
+        results,
+        ("pasada", "altas", "cambios", "segundos", "filas/s"),
+    )
+    db.close_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Búsqueda de nombres por prefijos de palabra (search_service.search).
+
+Uso: python benchmarks/bench_search.py [personas]
+
+Con una plantilla sintética de N personas simula teclear nombres letra por
+letra y compara el índice de prefijos contra recorrer toda la plantilla
+normalizando cada nombre. Verifica acentos, orden de apellidos, el orden por
+relevancia (igual al de la referencia) y que una reimportación con nombres
+cambiados actualice el índice sin reconstruirlo.
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+from _common import print_table, use_temp_data_dir
+from bench_roster_import import _write_roster
+
+from services import db, roster_service, search_service, user_service
+
+ROSTER = os.path.join(os.path.dirname(__file__), "..", "Plantilla del personal 08-12-2025.csv")
+# Presupuesto por tecla
+BUDGET_MS = 5.0
+
+
+def _linear(users, query: str, limit: int = 20):
+    """Referencia: normalizar, filtrar y ordenar toda la plantilla en cada tecla."""
+    tokens = roster_service.roster_key(query).split()
+    found = []
+    for u in users:
+        key = roster_service.roster_key(u.name)
+        words = key.split()
+        if all(any(w.startswith(t) for w in words) for t in tokens):
+            leads = any(words[0].startswith(t) for t in tokens)
+            exact = any(t in words for t in tokens)
+            found.append(((not leads, not exact, key, u.id), u))
+    return [u for _rank, u in sorted(found, key=lambda item: item[0])[:limit]]
+
+
+def check() -> None:
+    roster_service.import_roster(ROSTER)
+    hits = search_service.search("de la cruz mau")
+    assert hits and hits[0].name == "Mauricia De La Cruz Ramirez", hits[:3]
+    assert search_service.search("MUÑOZ veró")[0].name == "Veronica Muñoz Perez"
+    assert search_service.search("munoz vero")[0].name == "Veronica Muñoz Perez"
+    assert search_service.search("zzzq") == []
+    assert search_service.search("ruz") == [], "solo prefijos de palabra"
+    uid = user_service.create_user("Zoe Quintanilla")
+    assert [u.id for u in search_service.search("quint")] == [uid]
+    user_service.update_user(uid, name="Zoe Ybarra")
+    assert search_service.search("quint") == [] and search_service.search("ybar")[0].id == uid
+    # Primero quien empieza con lo tecleado, luego la palabra exacta; alfabético al final
+    ids = [user_service.create_user(name) for name in
+           ("Ana Bel Quirogaz", "Ana Quiroga", "Quirogas Ana", "Quiroga Ximena")]
+    assert [u.id for u in search_service.search("quiroga") if u.id in ids] == ids[::-1]
+    print("búsqueda: OK (acentos, apellidos, altas, cambios de nombre y orden por relevancia)")
+
+
+def _typing_queries(users, n: int, rnd: random.Random):
+    """Prefijos de lo que se teclea: 'd', 'de', 'de l', ... para n nombres."""
+    for user in rnd.sample(users, n):
+        words = user.name.split()
+        text = " ".join(words[-2:] + words[:1])  # apellido(s) y luego nombre
+        for i in range(1, min(len(text), 14) + 1):
+            yield text[:i]
+
+
+def _timings(fn, queries):
+    samples = []
+    for q in queries:
+        t0 = time.perf_counter()
+        fn(q)
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1], samples[-1]
+
+
+def main() -> None:
+    people = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    data_dir = use_temp_data_dir()
+    check()
+
+    use_temp_data_dir()
+    search_service.invalidate()
+    path = os.path.join(data_dir, "plantilla.csv")
+    _write_roster(path, people)
+    roster_service.import_roster(path)
+    users = user_service.list_users()
+
+    t0 = time.perf_counter()
+    search_service.search("a")
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    rnd = random.Random(21)
+    queries = list(_typing_queries(users, 40, rnd))
+    linear = _timings(lambda q: _linear(users, q), queries[:60])
+    indexed = _timings(search_service.search, queries)
+    # Mismo orden que la referencia, también con muchos candidatos (recorrido por grupos)
+    for q in queries[:60] + ["a", "ma", "de", "jo ma"]:
+        assert [u.id for u in search_service.search(q)] == [u.id for u in _linear(users, q)], q
+
+    # Reimportar con 1% de cambios actualiza solo esas entradas
+    _write_roster(path, people, changed=0.01)
+    t0 = time.perf_counter()
+    roster_service.import_roster(path)
+    reimport_s = time.perf_counter() - t0
+
+    assert indexed[1] < BUDGET_MS, f"p99 {indexed[1]:.2f} ms > {BUDGET_MS} ms"
+    print_table(
+        f"Búsqueda por tecla, {people:,} personas, {len(queries)} teclas (ms)",
+        [
+            ("recorrido lineal", f"{linear[0]:.2f}", f"{linear[1]:.2f}", f"{linear[2]:.2f}"),
+            ("índice de prefijos", f"{indexed[0]:.3f}", f"{indexed[1]:.3f}", f"{indexed[2]:.3f}"),
+        ],
+        ("método", "mediana", "p99", "máx"),
+    )
+    print(f"construcción del índice: {build_ms:.0f} ms; reimportación con 1% cambios: {reimport_s:.2f} s")
+    db.close_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Día de turno para turnos nocturnos (user_service.set_day_start).
+
+Uso: python benchmarks/bench_shift_day.py [personas] [días]
+
+Siembra un área de turno nocturno (ingestas de 22:00 a 5:30) y verifica que al
+fijar el inicio del día a las 6:00 las ingestas de madrugada cuenten para la
+noche anterior en daily_totals, los resúmenes por área y el historial, también
+para quien llega al área después (update_user o reimportar la plantilla). Después
+compara leer los totales por día de turno desde la columna `day` ya calculada
+contra agruparlos al vuelo desde `ts`.
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from _common import per_call_us, print_table, use_temp_data_dir
+
+from services import (
+    compliance_service as cs, db, intake_service as svc, leaderboard_service, roster_service, user_service,
+)
+
+AREA = "Vigilancia"
+NIGHT_START = 6 * 60  # el día de turno cierra a las 6:00
+
+# Sin la columna precalculada: agrupar por día de turno recalculándolo desde ts
+_ON_THE_FLY = f"""
+    SELECT {db.SHIFT_DAY_SQL.format(ts="ts", minutes="?2")} AS shift_day, SUM(amount_ml)
+    FROM intake WHERE user_id = ?1
+    GROUP BY shift_day HAVING shift_day BETWEEN ?3 AND ?4 ORDER BY shift_day
+"""
+
+
+def _seed(people: int, days: int) -> list:
+    ids = [user_service.create_user(f"Guardia {i:04d}", area=AREA, sub_area="Nocturno") for i in range(people)]
+    night = datetime.now().replace(hour=22, minute=0, second=0, microsecond=0)
+    for user_id in ids:
+        rows = []
+        for d in range(1, days + 1):
+            start = night - timedelta(days=d)
+            rows.extend((start + timedelta(minutes=90 * i), 500) for i in range(6))  # 22:00 .. 5:30
+        svc.add_intakes(rows, user_id=user_id)
+    return ids
+
+
+def check(ids: list, days: int) -> None:
+    user_id = ids[0]
+
+    def dawn_rows():
+        return [r for r in svc.get_recent(50, user_id=user_id) if r.local_dt.hour < 6]
+
+    # Con el día a medianoche cada noche se parte en dos días de calendario
+    assert all(r.date == r.local_dt.date() for r in dawn_rows())
+    moved = user_service.set_day_start(NIGHT_START, area=AREA)
+    assert moved == len(ids) * days * 4, moved  # 0:00, 1:30, 3:00 y 4:30 de cada noche
+    assert user_service.set_day_start(NIGHT_START, area=AREA) == 0  # ya estaban en su día
+    assert all(r.date == r.local_dt.date() - timedelta(days=1) for r in dawn_rows())
+    totals = svc.get_daily_totals(days, user_id=user_id)
+    assert all(t == 3000 for _d, t in totals[:-1]), totals[-5:]
+    assert svc.check_daily_totals(user_id=user_id) == []
+    assert cs.check_area_rollups() == [], cs.check_area_rollups()[:5]
+
+    # El cálculo en Python (al escribir) coincide con el de SQL (al reasignar)
+    with db.connection() as con:
+        for ts, day in con.execute("SELECT ts, day FROM intake WHERE user_id=? LIMIT 200", (user_id,)):
+            assert svc._shift_day(ts, NIGHT_START) == day
+    # La madrugada cuenta para la noche anterior
+    late = datetime.now().replace(hour=3, minute=0, second=0, microsecond=0) - timedelta(days=1)
+    written = []
+    svc.add_intake(250, ts=late, user_id=user_id, on_durable=written.append)
+    svc.flush()
+    assert written[0].date == late.date() - timedelta(days=1), written
+    with db.connection() as con:
+        con.execute("DELETE FROM intake WHERE id=?", (written[0].id,))
+        con.commit()
+    svc.invalidate_cache()
+
+    # Las altas en el área heredan el inicio; lo demás sigue a medianoche
+    new_id = user_service.create_user("Guardia nueva", area=AREA)
+    assert user_service.get_user(new_id).day_start_min == NIGHT_START
+    assert user_service.get_user(db.LOCAL_USER_ID).day_start_min == 0
+    assert svc.get_today(new_id) == (datetime.now() - timedelta(minutes=NIGHT_START)).date()
+
+    # Un turno completo de hoy: el ranking de "hoy" usa el día de turno de cada quien
+    today = svc.get_today(user_id)
+    svc.add_intake(3000, ts=datetime.combine(today, datetime.min.time()) + timedelta(hours=23), user_id=user_id)
+    top = leaderboard_service.top_workers(1, area=AREA)
+    assert top[0].user_id == user_id and top[0].total_ml == svc.get_today_total(user_id), top
+    area = cs.get_area_compliance(AREA)
+    assert area.headcount == len(ids) + 1 and area.met_today >= 1, area
+    assert cs.check_area_rollups() == []
+    print("día de turno: OK (totales, resúmenes, historial y ranking por día de turno)")
+
+
+def _nights(user_id: int, days: int) -> None:
+    night = datetime.now().replace(hour=22, minute=0, second=0, microsecond=0)
+    rows = []
+    for d in range(1, days + 1):
+        rows.extend((night - timedelta(days=d) + timedelta(minutes=90 * i), 500) for i in range(6))
+    svc.add_intakes(rows, user_id=user_id)
+
+
+def _assert_shift(user_id: int, day_start: int, days: int) -> None:
+    user = user_service.get_user(user_id)
+    assert user.day_start_min == day_start, user
+    shift = timedelta(days=1) if day_start else timedelta(0)
+    assert all(
+        r.date == r.local_dt.date() - shift for r in svc.get_recent(50, user_id=user_id) if r.local_dt.hour < 6
+    )
+    if day_start:
+        assert all(t == 3000 for _d, t in svc.get_daily_totals(days, user_id=user_id)[:-1])
+    assert svc.check_daily_totals(user_id=user_id) == []
+    assert cs.check_area_rollups() == [], cs.check_area_rollups()[:5]
+
+
+def check_area_change(days: int) -> None:
+    """Quien llega al área nocturna después del set_day_start toma su inicio
+    del día (y sus registros su día de turno); al salir vuelve a medianoche."""
+    user_id = user_service.create_user("Guardia trasladada", area="Almacén", daily_goal_ml=2000)
+    _nights(user_id, days)
+    _assert_shift(user_id, 0, days)
+    user_service.update_user(user_id, area=AREA)
+    _assert_shift(user_id, NIGHT_START, days)
+    assert cs.get_area_compliance(AREA).headcount == len(user_service.list_users(area=AREA))
+    user_service.update_user(user_id, area="Almacén")
+    _assert_shift(user_id, 0, days)
+
+    # Igual al reimportar la plantilla con otra área
+    path = os.path.join(db._data_dir(), "plantilla.csv")
+
+    def roster(area: str) -> None:
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(f"Nombre completo,Puesto,Area,Sub área\nRuiz Soto Ana,Guardia,{area},\n")
+        roster_service.import_roster(path)
+
+    roster("Almacén")
+    with db.connection() as con:
+        imported = con.execute(
+            "SELECT id FROM users WHERE roster_key = ?", (roster_service.roster_key("Ruiz Soto Ana"),)
+        ).fetchone()[0]
+    _nights(imported, days)
+    _assert_shift(imported, 0, days)
+    roster(AREA)
+    _assert_shift(imported, NIGHT_START, days)
+    roster("Almacén")
+    _assert_shift(imported, 0, days)
+    print("cambio de área: OK (inicio del día y día de turno de quien entra o sale del área)")
+
+
+def main() -> None:
+    people = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    use_temp_data_dir()
+    ids = _seed(people, days)
+    t0 = time.perf_counter()
+    check(ids, days)
+    print(f"(verificación con reasignación de {people * days * 4:,} ingestas: {time.perf_counter() - t0:.2f} s)")
+    check_area_change(days)
+
+    user_id = ids[len(ids) // 2]
+    end = svc._day_key(svc.get_today(user_id))
+    start = end - 29
+    with db.connection() as con:
+        plan = " ".join(r[-1] for r in con.execute(
+            "EXPLAIN QUERY PLAN SELECT day, total_ml FROM daily_totals WHERE user_id=? AND day BETWEEN ? AND ?",
+            (user_id, start, end),
+        ))
+        assert "PRIMARY KEY (user_id=? AND day>? AND day<?)" in plan, plan
+        expected = [(d, t) for d, t in con.execute(
+            "SELECT day, total_ml FROM daily_totals WHERE user_id=? AND day BETWEEN ? AND ? ORDER BY day",
+            (user_id, start, end),
+        )]
+        assert [tuple(r) for r in con.execute(_ON_THE_FLY, (user_id, NIGHT_START, start, end))] == expected
+
+        def precomputed():
+            con.execute(
+                "SELECT day, total_ml FROM daily_totals WHERE user_id=? AND day BETWEEN ? AND ? ORDER BY day",
+                (user_id, start, end),
+            ).fetchall()
+
+        def on_the_fly():
+            con.execute(_ON_THE_FLY, (user_id, NIGHT_START, start, end)).fetchall()
+
+        rows = [
+            ("day precalculado (daily_totals)", f"{per_call_us(precomputed, n=300):.1f}"),
+            ("agrupado al vuelo desde ts", f"{per_call_us(on_the_fly, n=300):.1f}"),
+        ]
+    print_table(f"Totales de 30 días de turno de una persona ({days} días sembrados)", rows, ("consulta", "µs"))
+    db.close_db()
+
+
+if __name__ == "__main__":
+    main()
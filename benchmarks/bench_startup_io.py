@@ -0,0 +1,158 @@
+"""E/S del arranque: preferencias en archivos JSON (antes) vs. settings en la BD.
+
+Uso: python benchmarks/bench_startup_io.py [arranques]
+
+Verifica primero la migración: theme.json (en el directorio de más arriba
+donde lo dejaba theme_service) y profile.json pasan a la tabla settings, los
+archivos se renombran a *.migrated (solo tras el commit: si el paso falla
+siguen donde estaban) y un reset conserva el tema. Después corre
+cada arranque en un proceso nuevo, con la BD ya creada: abrir la BD, leer el
+tema, has_profile_data() en route_change y load_profile() en la página de
+inicio. "Antes" repite lo que hacían theme_service/profile_service con sus
+archivos (copiado abajo). Cuenta aperturas de archivo, stat y makedirs hechos
+desde Python (el E/S de SQLite es el mismo en ambos) y mide el tiempo.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from _common import APP_DIR, print_table, use_temp_data_dir
+
+from services import db, profile_service, settings_service, theme_service
+
+PROFILE = {"name": "Ana Torres", "weight_kg": 62, "height_cm": 165, "daily_goal_ml": 2300, "avatar_id": 2}
+
+_CHILD = r"""
+import builtins, json, os, sys, time
+sys.path.insert(0, {app_dir!r})
+from services import db, profile_service, theme_service
+data_dir, theme_dir, mode = {data_dir!r}, {theme_dir!r}, {mode!r}
+db._data_dir = lambda: data_dir
+db._legacy_dirs = lambda: []
+
+counts = {{"open": 0, "stat": 0, "makedirs": 0}}
+real_open, real_stat, real_makedirs = builtins.open, os.stat, os.makedirs
+def counting_open(*a, **k):
+    counts["open"] += 1
+    return real_open(*a, **k)
+def counting_stat(*a, **k):
+    counts["stat"] += 1
+    return real_stat(*a, **k)
+def counting_makedirs(*a, **k):
+    counts["makedirs"] += 1
+    return real_makedirs(*a, **k)
+
+# Lo que hacían theme_service y profile_service antes de settings
+def legacy_theme():
+    os.makedirs(theme_dir, exist_ok=True)
+    path = os.path.join(theme_dir, "theme.json")
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("dark_mode", False)
+    return False
+
+def legacy_profile():
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, "profile.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+builtins.open, os.stat, os.makedirs = counting_open, counting_stat, counting_makedirs
+t0 = time.perf_counter()
+with db.connection():
+    pass
+if mode == "antes":
+    dark = legacy_theme()
+    profile = legacy_profile()
+    assert {{"weight_kg", "height_cm", "daily_goal_ml"}}.issubset(profile)
+    legacy_profile()
+else:
+    dark = theme_service.load_theme_preference()
+    assert profile_service.has_profile_data()
+    profile_service.load_profile()
+elapsed = time.perf_counter() - t0
+builtins.open, os.stat, os.makedirs = real_open, real_stat, real_makedirs
+assert dark is True
+print(json.dumps(dict(counts, ms=elapsed * 1000)))
+"""
+
+
+def _write(path: str, data: dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def check_migration(data_dir: str, theme_dir: str) -> None:
+    db.delete_db()
+    settings_service.invalidate()
+    _write(os.path.join(data_dir, "profile.json"), PROFILE)
+    _write(os.path.join(theme_dir, "theme.json"), {"dark_mode": True})
+    db._legacy_dirs = lambda: [data_dir, theme_dir]
+
+    # Si el paso de la migración no llega al commit, los archivos siguen ahí
+    step = db.MIGRATIONS.index(db._m010_settings)
+
+    def failing(con):
+        db._m010_settings(con)
+        raise RuntimeError("forzado")
+
+    db.MIGRATIONS[step] = failing
+    try:
+        with db.connection():
+            pass
+        raise AssertionError("la migración debía fallar")
+    except RuntimeError:
+        pass
+    finally:
+        db.MIGRATIONS[step] = db._m010_settings
+    assert os.path.exists(os.path.join(data_dir, "profile.json"))
+    assert os.path.exists(os.path.join(theme_dir, "theme.json"))
+
+    assert profile_service.load_profile() == PROFILE
+    assert theme_service.load_theme_preference() is True
+    assert settings_service.get_value("onboarding_completed") is True
+    assert not os.path.exists(os.path.join(data_dir, "profile.json"))
+    assert os.path.exists(os.path.join(theme_dir, "theme.json.migrated"))
+    # Un reset borra el perfil (y no lo reimporta) pero conserva el tema
+    assert profile_service.reset_app_data()
+    assert profile_service.load_profile() is None and theme_service.load_theme_preference() is True
+    print("migración: OK (theme.json y profile.json importados una sola vez)")
+
+
+def main() -> None:
+    launches = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+    data_dir = use_temp_data_dir()
+    theme_dir = os.path.join(tempfile.mkdtemp(prefix="awa-bench-theme-"), "storage", "data")
+    check_migration(data_dir, theme_dir)
+
+    # Mismos datos en ambos formatos; la BD ya existe (arranque habitual)
+    profile_service.save_profile(PROFILE)
+    profile_service.flush_profile()
+    _write(os.path.join(data_dir, "profile.json"), PROFILE)
+    _write(os.path.join(theme_dir, "theme.json"), {"dark_mode": True})
+    db.close_db()
+
+    rows = []
+    for mode in ("antes", "settings"):
+        code = _CHILD.format(app_dir=APP_DIR, data_dir=data_dir, theme_dir=theme_dir, mode=mode)
+        runs = [
+            json.loads(subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout)
+            for _ in range(launches)
+        ]
+        r = runs[-1]
+        rows.append((mode, r["open"], r["stat"], r["makedirs"], f"{statistics.median(x['ms'] for x in runs):.2f}"))
+    print_table(
+        f"Arranque en frío con la BD creada ({launches} arranques, mediana)",
+        rows,
+        ("preferencias", "aperturas", "stat", "makedirs", "ms"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Tamaño de la BD y lectura de filas: `ts` como texto ISO (esquema v3) vs.
+epoch entero (esquema actual), con los mismos datos.
+
+Uso: python benchmarks/bench_storage.py [filas]
+"""
+import os
+import random
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from _common import print_table, use_temp_data_dir
+
+from services import db
+
+_TEXT_LAYOUT_VERSION = 3
+
+
+@contextmanager
+def _pinned_schema(version: int):
+    """Abre la BD migrando solo hasta `version`."""
+    current = db.SCHEMA_VERSION
+    db.SCHEMA_VERSION = version
+    try:
+        yield
+    finally:
+        db.SCHEMA_VERSION = current
+        db.close_db()
+
+
+def _seed_text_layout(rows: int) -> None:
+    """Crea la BD en v3 (ts TEXT) y la llena."""
+    rnd = random.Random(3)
+    now = datetime.now().replace(microsecond=0)
+    data = []
+    for _ in range(rows):
+        ts = now - timedelta(minutes=rnd.randint(0, 60 * 24 * 730))
+        data.append((ts.isoformat(timespec="seconds"), ts.date().toordinal(), rnd.choice((250, 500, 750))))
+    with db.connection() as con:
+        con.executemany("INSERT INTO intake (ts, day, amount_ml) VALUES (?, ?, ?)", data)
+        con.commit()
+
+
+def _measure(parse) -> tuple:
+    """(MB en disco tras VACUUM, filas/s leídas tal cual, filas/s convertidas a datetime)."""
+    sql = "SELECT id, ts, day, amount_ml FROM intake ORDER BY day DESC, ts DESC, id DESC"
+    with db.connection() as con:
+        con.execute("VACUUM")
+        con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        size = os.path.getsize(db.db_path()) / 1e6
+        t0 = time.perf_counter()
+        n = len(con.execute(sql).fetchall())
+        raw_rate = n / (time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        for _id, ts, _day, _amount in con.execute(sql):
+            parse(ts)
+        parsed_rate = n / (time.perf_counter() - t0)
+    return size, raw_rate, parsed_rate
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    use_temp_data_dir()
+    with _pinned_schema(_TEXT_LAYOUT_VERSION):
+        _seed_text_layout(rows)
+        text = _measure(datetime.fromisoformat)
+
+    t0 = time.perf_counter()
+    with db.connection():  # migra v3 -> actual
+        pass
+    migrate_s = time.perf_counter() - t0
+    epoch = _measure(datetime.fromtimestamp)
+
+    print_table(
+        f"Almacenamiento de ts, {rows:,} filas",
+        [
+            ("texto ISO (v3)", f"{text[0]:.1f}", f"{text[1]:,.0f}", f"{text[2]:,.0f}"),
+            (f"epoch entero (v{db.SCHEMA_VERSION})", f"{epoch[0]:.1f}", f"{epoch[1]:,.0f}", f"{epoch[2]:,.0f}"),
+        ],
+        ("formato", "MB", "filas/s (crudas)", "filas/s (a datetime)"),
+    )
+    print(f"migración v3 -> v{db.SCHEMA_VERSION}: {migrate_s:.2f} s")
+    db.close_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Cambio de pestaña: reconstruir la View en cada navegación vs. la caché de
+vistas de ui.router.
+
+Uso: python benchmarks/bench_tab_switch.py [vueltas]
+
+Recorre inicio -> historial -> perfil -> ajustes como lo hace route_change:
+"sin caché" llama a build_page (lo que hacía main.py antes), "con caché" a
+get_view. También mide volver a inicio tras registrar una ingesta (la vista
+guardada ya tiene el total nuevo: se lo parcheó el evento de intake_events) y
+tocar la pestaña actual. Mide
+solo el lado Python (construir o reutilizar controles), no el envío a Flutter.
+Requiere flet.
+"""
+import sys
+
+from _common import per_call_us, print_table, use_temp_data_dir
+
+TABS = [("home", "/"), ("history", "/history"), ("profile", "/profile"), ("settings", "/settings")]
+PROFILE = {"name": "Ana", "weight_kg": 62, "height_cm": 165, "age": 31, "daily_goal_ml": 2300, "avatar_id": 1}
+
+
+class _Page:
+    """Lo que las páginas usan de ft.Page al construirse (la ruta); el resto no hace nada."""
+
+    def __init__(self):
+        self.route = "/"
+        self.views = []
+        self.snack_bar = None
+        self.dialog = None
+
+    def go(self, route):
+        self.route = route
+
+    def update(self):
+        pass
+
+
+def _build(router):
+    """build_page sin caché: da de baja la vista del bus como haría el router al descartarla."""
+    def build(name, page):
+        router._dispose(router.build_page(name, page))
+    return build
+
+
+def check(router, page) -> None:
+    from config import Colors
+    from services import intake_events, intake_service, profile_service
+
+    router.clear_views()
+    page.route = "/"
+    home, changed = router.get_view("home", page)
+    assert changed
+    assert router.get_view("home", page) == (home, False)  # misma pestaña: nada que hacer
+
+    intake_service.add_intake(250)
+    assert router.get_view("home", page) == (home, False)  # el evento ya la actualizó
+
+    profile_service.save_profile(dict(PROFILE, name="Otra"))
+    assert router.get_view("home", page)[0] is not home  # perfil nuevo: se reconstruye
+    profile_service.save_profile(PROFILE)
+
+    for name, route in TABS:
+        page.route = route
+        router.get_view(name, page)
+    Colors.set_dark_mode(not Colors.is_dark_mode())
+    try:
+        for name, route in TABS:
+            page.route = route
+            router.get_view(name, page)
+        assert router.view_cache_stats()["size"] == router._VIEW_CACHE_SIZE
+        # Las descartadas se dieron de baja del bus: quedan inicio e historial del tema actual
+        assert len(intake_events._subscribers) == 2
+    finally:
+        Colors.set_dark_mode(not Colors.is_dark_mode())
+    intake_service.flush()
+    print("caché de vistas: OK (reutiliza, refresca, reconstruye con perfil nuevo y acota)")
+
+
+def main() -> None:
+    laps = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    try:
+        import flet  # noqa: F401
+    except ImportError:
+        print("flet no está instalado: no se puede medir el cambio de pestaña")
+        return
+    use_temp_data_dir()
+    from services import intake_service, profile_service
+    from ui import router
+
+    profile_service.save_profile(PROFILE)
+    intake_service.add_intakes(((1_700_000_000 + i * 3600, 250) for i in range(500)))
+    page = _Page()
+    check(router, page)
+
+    def lap(get):
+        def run():
+            for name, route in TABS:
+                page.route = route
+                get(name, page)
+        return run
+
+    build = per_call_us(lap(_build(router)), n=laps) / len(TABS)
+    router.clear_views()
+    lap(router.get_view)()
+    cached = per_call_us(lap(router.get_view), n=laps) / len(TABS)
+
+    def back_home_after_intake(get):
+        def run():
+            intake_service.add_intake(100)
+            page.route = "/"
+            get("home", page)
+        return run
+
+    rebuild_home = per_call_us(back_home_after_intake(_build(router)), n=laps)
+    patched_home = per_call_us(back_home_after_intake(router.get_view), n=laps)
+    page.route = "/"
+    same_tab = per_call_us(lambda: router.get_view("home", page), n=laps)
+    intake_service.flush()
+
+    print_table(
+        f"Cambio de pestaña ({laps} vueltas por {len(TABS)} pestañas, mediana)",
+        [
+            ("cambiar de pestaña, sin caché (antes)", f"{build:.1f}"),
+            ("cambiar de pestaña, con caché", f"{cached:.1f}"),
+            ("volver a inicio tras una ingesta, sin caché (antes)", f"{rebuild_home:.1f}"),
+            ("volver a inicio tras una ingesta, con caché", f"{patched_home:.1f}"),
+            ("tocar la pestaña actual, con caché", f"{same_tab:.1f}"),
+        ],
+        ("navegación", "µs"),
+    )
+    print(router.view_cache_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""page.update() directo en cada handler vs. ui.updates (un envío por cuadro).
+
+Uso: python benchmarks/bench_update_scheduler.py [teclas]
+
+Simula escribir en el formulario de perfil: update_preview corre en cada tecla
+de siete campos y antes llamaba a page.update() cada vez. Se prueban ritmos de
+tecleo (y una ráfaga, como pegar texto) contra una página que cuenta los
+update() recibidos y los controles de cada uno. "antes" es un update por tecla.
+"""
+import sys
+import time
+
+from _common import print_table
+
+from ui import updates
+
+
+class _Page:
+    """Cuenta los page.update() y cuántos fueron parciales (solo controles marcados)."""
+
+    def __init__(self):
+        self.updates = 0
+        self.partial = 0
+
+    def update(self, *controls):
+        self.updates += 1
+        if controls:
+            self.partial += 1
+
+
+def _type(page: _Page, keys: int, interval_s: float) -> float:
+    """Teclea `keys` veces: cada tecla cambia los dos textos del resumen."""
+    bmi_value, goal_value = object(), object()  # solo importa su identidad
+    t0 = time.perf_counter()
+    for _ in range(keys):
+        updates.request_update(page, bmi_value, goal_value)
+        if interval_s:
+            time.sleep(interval_s)
+    elapsed = time.perf_counter() - t0
+    time.sleep(updates._FRAME_S * 3)  # que salga el último cuadro
+    return elapsed
+
+
+def check() -> None:
+    page = _Page()
+    a, b = object(), object()
+    updates.request_update(page, a)
+    updates.request_update(page, b)
+    updates.request_update(page, a)
+    time.sleep(updates._FRAME_S * 3)
+    assert (page.updates, page.partial) == (1, 1)  # un envío con los controles marcados
+    updates.request_update(page, a)
+    updates.request_update(page)  # alguien pidió la página entera
+    updates.flush_updates(page)   # y un cambio de ruta la envía ya
+    time.sleep(updates._FRAME_S * 3)
+    assert (page.updates, page.partial) == (2, 1)  # el temporizador cancelado no envía otra vez
+
+    # Un handler que sigue cambiando controles tras pedir el update: nada sale
+    # hasta que devuelve, y sale una sola vez
+    page = _Page()
+
+    @updates.event_handler
+    def slow_handler(e):
+        updates.request_update(page, a)
+        time.sleep(updates._FRAME_S * 4)
+        assert page.updates == 0, "envío con el handler a medias"
+        updates.request_update(page, b)
+
+    slow_handler(None)
+    assert page.updates == 0
+    time.sleep(updates._FRAME_S * 3)
+    assert (page.updates, page.partial) == (1, 1)
+
+    # Las páginas sin nada pendiente no se quedan en el planificador
+    for _ in range(50):
+        updates.flush_updates(_Page())
+    time.sleep(updates._FRAME_S * 2)
+    updates.request_update(page)
+    assert updates.update_stats()["pages"] == 1, updates.update_stats()
+    time.sleep(updates._FRAME_S * 3)
+    print("planificador de updates: OK (junta controles, página entera, envío inmediato, "
+          "espera al handler y no retiene páginas)")
+
+
+def main() -> None:
+    keys = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+    check()
+    rows = []
+    for label, interval in (("ráfaga (pegar texto)", 0.0), ("tecleo rápido, 8 ms", 0.008), ("tecleo normal, 40 ms", 0.04)):
+        page = _Page()
+        stats0 = updates.update_stats()
+        elapsed = _type(page, keys, interval)
+        stats = updates.update_stats()
+        requested = stats["requested"] - stats0["requested"]
+        flushed = stats["flushed"] - stats0["flushed"]
+        assert requested == keys and flushed == page.updates
+        # Como mucho un envío por cuadro (más el del final)
+        assert page.updates <= elapsed / updates._FRAME_S + 2, (page.updates, elapsed)
+        rows.append((label, keys, requested, page.updates, f"{elapsed * 1000:.0f}"))
+    print_table(
+        f"Updates al teclear {keys} veces",
+        rows,
+        ("ritmo", "page.update() antes", "pedidos", "enviados", "ms tecleando"),
+    )
+
+
+if __name__ == "__main__":
+    main()